@@ -3,6 +3,13 @@ from django.contrib.auth import authenticate
 from django.contrib.auth.models import User, Group
 from .models import UserProfile
 
+
+def is_admin_user(user):
+    """判断用户是否属于管理员组（预取了 groups 时不再查询数据库）"""
+    if 'groups' in getattr(user, '_prefetched_objects_cache', {}):
+        return any(group.name == '管理员' for group in user.groups.all())
+    return user.groups.filter(name='管理员').exists()
+
 class LoginSerializer(serializers.Serializer):
     """登录序列化器"""
     username = serializers.CharField()
@@ -57,15 +64,14 @@ class UserSerializer(serializers.ModelSerializer):
     
     def get_user_type(self, obj):
         """获取用户类型"""
-        if obj.groups.filter(name='管理员').exists():
+        if is_admin_user(obj):
             return 'admin'
         return 'student'
     
     def get_student_id(self, obj):
         """获取学号"""
         try:
-            profile = UserProfile.objects.get(user=obj)
-            return profile.student_id
+            return obj.userprofile.student_id
         except UserProfile.DoesNotExist:
             return None
 
@@ -85,23 +91,21 @@ class UserDetailSerializer(serializers.ModelSerializer):
     
     def get_user_type(self, obj):
         """获取用户类型"""
-        if obj.groups.filter(name='管理员').exists():
+        if is_admin_user(obj):
             return 'admin'
         return 'student'
     
     def get_student_id(self, obj):
         """获取学号"""
         try:
-            profile = UserProfile.objects.get(user=obj)
-            return profile.student_id
+            return obj.userprofile.student_id
         except UserProfile.DoesNotExist:
             return None
     
     def get_plain_password(self, obj):
         """获取明文密码"""
         try:
-            profile = UserProfile.objects.get(user=obj)
-            return profile.plain_password
+            return obj.userprofile.plain_password
         except UserProfile.DoesNotExist:
             return None
 
@@ -0,0 +1,28 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .stats import invalidate_user_stats
+
+# 影响用户统计的字段；只更新其他字段（如 last_login）时不需要使统计过期
+STATS_FIELDS = {'is_active'}
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    """用户新增或启用状态变化后使用户统计过期"""
+    if not created and update_fields is not None and not set(update_fields) & STATS_FIELDS:
+        return
+    invalidate_user_stats()
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    invalidate_user_stats()
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def user_groups_changed(sender, action, **kwargs):
+    """用户加入或移出用户组（管理员）后使用户统计过期"""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_user_stats()
@@ -0,0 +1,38 @@
+"""
+用户统计
+
+统计结果保存在统计缓存中（见 ratemyprofessor.stats_cache），用户新增、删除、
+启用/停用或用户组变化时更新版本号使其过期
+"""
+from django.contrib.auth.models import User
+
+from ratemyprofessor.response_cache import bump_versions
+from ratemyprofessor.stats_cache import cached_stats
+
+# 统计缓存的名称，同时也是用户统计依赖的版本号名称
+USER_STATS = 'users:stats'
+
+
+def build_user_stats():
+    total_users = User.objects.count()
+    admin_users = User.objects.filter(groups__name='管理员').count()
+    student_users = total_users - admin_users
+    active_users = User.objects.filter(is_active=True).count()
+    
+    return {
+        'total_users': total_users,
+        'admin_users': admin_users,
+        'student_users': student_users,
+        'active_users': active_users,
+        'inactive_users': total_users - active_users
+    }
+
+
+def get_user_stats():
+    """读取用户统计，缓存过期时由一个请求重新计算"""
+    return cached_stats(USER_STATS, build_user_stats, [USER_STATS])
+
+
+def invalidate_user_stats():
+    """在事务提交后使用户统计过期"""
+    bump_versions([USER_STATS])
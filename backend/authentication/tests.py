@@ -1,3 +1,30 @@
-from django.test import TestCase
+from django.test import TransactionTestCase
 
-# Create your tests here.
+from ratemyprofessor.query_budgets import PASSWORD, QueryBudgetTestMixin
+
+
+class AuthenticationQueryBudgetTests(QueryBudgetTestMixin, TransactionTestCase):
+    """登录、用户管理接口的查询数不超过视图声明的预算"""
+    urlconf = 'authentication.urls'
+    scenarios = [
+        ('student_login', 'POST', {}, lambda f: {
+            'username': f['student'].username, 'password': PASSWORD,
+        }, None, 200),
+        ('admin_login', 'POST', {}, lambda f: {
+            'username': f['admin'].username, 'password': PASSWORD,
+        }, None, 200),
+        ('get_current_user', 'GET', {}, None, 'student', 200),
+        ('refresh_token', 'POST', {}, lambda f: {'refresh': f['refresh']}, None, 200),
+        ('logout', 'POST', {}, lambda f: {'refresh': f['refresh']}, 'student', None),
+        ('user_management', 'GET', {}, None, 'admin', 200),
+        ('user_management', 'POST', {}, lambda f: {
+            'username': 'budget-new-user', 'password': PASSWORD, 'user_type': 'student',
+            'student_id': '20240099',
+        }, 'admin', 201),
+        ('user_detail', 'GET', lambda f: {'user_id': f['student'].pk}, None, 'admin', 200),
+        ('user_detail', 'PUT', lambda f: {'user_id': f['student'].pk}, lambda f: {
+            'first_name': '同学', 'student_id': '20240001',
+        }, 'admin', 200),
+        ('user_detail', 'DELETE', lambda f: {'user_id': f['spare_student'].pk}, None, 'admin', 204),
+        ('user_stats', 'GET', {}, None, 'admin', 200),
+    ]
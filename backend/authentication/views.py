@@ -11,7 +11,10 @@ from .serializers import (
     UserDetailSerializer, UserCreateSerializer, UserUpdateSerializer
 )
 from .models import UserProfile
+from .stats import get_user_stats
+from ratemyprofessor.middleware import query_budget
 
+@query_budget(6)
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def student_login(request):
@@ -39,6 +42,7 @@ def student_login(request):
         'errors': serializer.errors
     }, status=status.HTTP_400_BAD_REQUEST)
 
+@query_budget(6)
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def admin_login(request):
@@ -66,6 +70,7 @@ def admin_login(request):
         'errors': serializer.errors
     }, status=status.HTTP_400_BAD_REQUEST)
 
+@query_budget(3)
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_current_user(request):
@@ -73,6 +78,7 @@ def get_current_user(request):
     serializer = UserSerializer(request.user)
     return Response(serializer.data)
 
+@query_budget(1)
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def logout(request):
@@ -92,6 +98,7 @@ def logout(request):
             'error': str(e)
         }, status=status.HTTP_400_BAD_REQUEST)
 
+@query_budget(0)
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def refresh_token(request):
@@ -119,6 +126,7 @@ def is_admin(user):
     return user.groups.filter(name='管理员').exists()
 
 
+@query_budget({'GET': 5, 'POST': 8})
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
 def user_management(request):
@@ -155,6 +163,9 @@ def user_management(request):
                 last_name__icontains=search
             )
         
+        # 一次取出用户资料和用户组，避免序列化时逐个用户查询
+        users = users.select_related('userprofile').prefetch_related('groups')
+        
         # 分页
         paginator = Paginator(users, page_size)
         page_obj = paginator.get_page(page)
@@ -184,6 +195,7 @@ def user_management(request):
         }, status=status.HTTP_400_BAD_REQUEST)
 
 
+@query_budget({'GET': 5, 'PUT': 8, 'DELETE': 9})
 @api_view(['GET', 'PUT', 'DELETE'])
 @permission_classes([IsAuthenticated])
 def user_detail(request, user_id):
@@ -237,6 +249,7 @@ def user_detail(request, user_id):
         }, status=status.HTTP_204_NO_CONTENT)
 
 
+@query_budget(5)
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def user_stats(request):
@@ -247,15 +260,4 @@ def user_stats(request):
             'message': '权限不足'
         }, status=status.HTTP_403_FORBIDDEN)
     
-    total_users = User.objects.count()
-    admin_users = User.objects.filter(groups__name='管理员').count()
-    student_users = total_users - admin_users
-    active_users = User.objects.filter(is_active=True).count()
-    
-    return Response({
-        'total_users': total_users,
-        'admin_users': admin_users,
-        'student_users': student_users,
-        'active_users': active_users,
-        'inactive_users': total_users - active_users
-    })
\ No newline at end of file
+    return Response(get_user_stats())
@@ -0,0 +1,368 @@
+"""
+接口基准测试
+
+用 Django 测试客户端请求各个接口，统计每个接口的延迟（p50/p95）、查询数和内存峰值，
+结果写入 JSON；compare 对比两次结果，超出阈值时以非 0 状态退出
+
+数据集由 generate_load_data 按 --seed 生成并保存为模板数据库（benchmarks/data/），
+每次运行都从模板复制一份工作数据库，因此写接口的测试不会影响下一次运行
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+DATA_DIR = Path(__file__).resolve().parent / 'data'
+
+# 对比时的默认阈值：延迟/内存增长超过 25% 视为退化
+DEFAULT_THRESHOLD = 0.25
+# 忽略过小的绝对变化，避免计时抖动造成误报
+MIN_LATENCY_DELTA_MS = 0.5
+MIN_MEMORY_DELTA_KB = 64
+
+ADMIN_USERNAME = 'bench_admin'
+PASSWORD = 'loadtest-password'
+# 批量读取场景每次请求的主键数量
+BATCH_SIZE = 20
+
+
+def percentile(values, percent):
+    """最近秩法计算百分位数"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(percent / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def prepare_database(options):
+    """准备本次运行的工作数据库，返回是否需要生成数据"""
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    template = DATA_DIR / (
+        f'dataset-s{options.seed}-t{options.teachers}-r{options.reviews}-u{options.users}.sqlite3'
+    )
+    work = DATA_DIR / 'bench.sqlite3'
+    if work.exists():
+        work.unlink()
+    os.environ['BENCHMARK_DB'] = str(work)
+    os.environ['BENCHMARK_RESPONSE_CACHE'] = '0' if options.no_response_cache else '1'
+    os.environ['BENCHMARK_FAST_SERIALIZATION'] = '0' if options.no_fast_serialization else '1'
+    os.environ['BENCHMARK_STATS_CACHE'] = '0' if options.no_stats_cache else '1'
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+    if template.exists() and not options.regenerate:
+        shutil.copyfile(template, work)
+        return template, False
+    return template, True
+
+
+def generate_dataset(options, template):
+    from django.contrib.auth.models import Group, User
+    from django.core.management import call_command
+    from django.db import connection
+
+    print(f'🧪 生成数据集（首次运行或 --regenerate）: {template.name}')
+    call_command('migrate', verbosity=0)
+    call_command(
+        'generate_load_data',
+        teachers=options.teachers,
+        reviews=options.reviews,
+        users=options.users,
+        seed=options.seed,
+        with_review_index=True,
+        stdout=open(os.devnull, 'w'),
+    )
+    admin = User.objects.create_user(ADMIN_USERNAME, password=PASSWORD)
+    admin.groups.add(Group.objects.get_or_create(name='管理员')[0])
+    connection.close()
+    shutil.copyfile(os.environ['BENCHMARK_DB'], template)
+
+
+def build_context():
+    """各场景共用的数据：评价最多的教师、其中一条评价、登录令牌等"""
+    from django.conf import settings
+    from django.contrib.auth.models import User
+    from django.db.models import Count
+    from django.test import Client
+    from django.urls import reverse
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    from reviews.models import Review
+    from teachers.models import Teacher
+
+    teacher = Teacher.objects.order_by('-total_reviews', 'pk').first()
+    review = Review.objects.filter(teacher=teacher).order_by('pk').first()
+    student = User.objects.filter(username__startswith='loadtest_').order_by('pk').first()
+    admin = User.objects.get(username=ADMIN_USERNAME)
+    page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+    review_count = Review.objects.aggregate(count=Count('id'))['count']
+    # 条件请求场景使用的 ETag（写接口场景排在之后，运行时仍然有效）
+    client = Client()
+    teacher_etag = client.get(reverse('teacher-detail', kwargs={'pk': teacher.pk}))['ETag']
+    review_etag = client.get(reverse('review-detail', kwargs={'pk': review.pk}))['ETag']
+    # 批量接口场景：按评分排在前面的教师和最新的评价（乱序请求）
+    teacher_ids = Teacher.objects.order_by('-average_rating', 'pk').values_list('pk', flat=True)[:BATCH_SIZE]
+    review_ids = Review.objects.order_by('-created_at', 'pk').values_list('pk', flat=True)[:BATCH_SIZE]
+    return {
+        'teacher_id': teacher.pk,
+        'review_id': review.pk,
+        'teacher_etag': teacher_etag,
+        'review_etag': review_etag,
+        'teacher_ids': ','.join(map(str, sorted(teacher_ids))),
+        'review_ids': ','.join(map(str, sorted(review_ids))),
+        'deep_page': max(1, int(review_count * 0.9) // page_size),
+        'student_username': student.username,
+        'admin_username': admin.username,
+        'password': PASSWORD,
+        'student_auth': f'Bearer {RefreshToken.for_user(student).access_token}',
+        'admin_auth': f'Bearer {RefreshToken.for_user(admin).access_token}',
+    }
+
+
+class EndpointBenchmark:
+    def __init__(self, client, context):
+        self.client = client
+        self.context = context
+        self.counter = 0
+
+    def request(self, build):
+        method, path, kwargs = build(self.context, self.counter)
+        self.counter += 1
+        return getattr(self.client, method)(path, **kwargs)
+
+    def run(self, build, iterations, warmup):
+        from ratemyprofessor.middleware import count_queries
+
+        for _ in range(warmup):
+            self.request(build)
+
+        timings = []
+        query_counts = []
+        statuses = Counter()
+        cache_outcomes = Counter()
+        for _ in range(iterations):
+            with count_queries() as queries:
+                started = time.perf_counter()
+                response = self.request(build)
+                elapsed = time.perf_counter() - started
+            timings.append(elapsed * 1000)
+            query_counts.append(queries.count)
+            statuses[response.status_code] += 1
+            if response.has_header('X-Cache'):
+                cache_outcomes[response['X-Cache']] += 1
+
+        # 响应体大小（压缩场景为压缩后的大小）和 JSON 编码耗时；
+        # 命中响应缓存时返回的是已编码的字节，没有编码开销
+        payload_bytes = len(response.content)
+        encode_ms = self.measure_encoding(response)
+
+        # 内存单独测一次，避免 tracemalloc 的开销影响计时
+        tracemalloc.start()
+        try:
+            self.request(build)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        result = {
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+            'mean_ms': round(statistics.fmean(timings), 3),
+            'queries': int(statistics.median(query_counts)),
+            'peak_memory_kb': round(peak / 1024, 1),
+            'status': statuses.most_common(1)[0][0],
+            'payload_bytes': payload_bytes,
+            'encode_ms': encode_ms,
+            'iterations': iterations,
+        }
+        if cache_outcomes:
+            result['cache_hit_rate'] = round(cache_outcomes['HIT'] / iterations, 4)
+        return result
+
+
+    @staticmethod
+    def measure_encoding(response, repeat=5):
+        """用响应协商出的渲染器重新编码响应数据，返回耗时的中位数（毫秒）"""
+        data = getattr(response, 'data', None)
+        renderer = getattr(response, 'accepted_renderer', None)
+        if data is None or renderer is None:
+            return 0.0
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            renderer.render(data, response.accepted_media_type, response.renderer_context)
+            timings.append((time.perf_counter() - started) * 1000)
+        return round(statistics.median(timings), 3)
+
+
+def run(options):
+    template, fresh = prepare_database(options)
+
+    import django
+    django.setup()
+    if fresh:
+        generate_dataset(options, template)
+
+    from django.test import Client
+    from django.test.utils import setup_test_environment
+
+    from benchmarks.scenarios import SCENARIOS
+
+    setup_test_environment()
+    names = options.only or list(SCENARIOS)
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        sys.exit(f'未知的场景: {", ".join(sorted(unknown))}')
+
+    benchmark = EndpointBenchmark(Client(), build_context())
+    print(f'⏱️  {len(names)} 个接口，每个 {options.iterations} 次（预热 {options.warmup} 次）')
+    print('━' * 78)
+    print(
+        f'{"接口":<26}{"p50(ms)":>10}{"p95(ms)":>10}{"查询数":>8}{"内存(KB)":>12}'
+        f'{"响应体(B)":>12}{"编码(ms)":>10}{"状态":>8}'
+    )
+    results = {}
+    for name in names:
+        result = benchmark.run(SCENARIOS[name], options.iterations, options.warmup)
+        results[name] = result
+        print(
+            f'{name:<26}{result["p50_ms"]:>10.2f}{result["p95_ms"]:>10.2f}'
+            f'{result["queries"]:>8}{result["peak_memory_kb"]:>12.1f}'
+            f'{result["payload_bytes"]:>12}{result["encode_ms"]:>10.3f}{result["status"]:>8}'
+        )
+
+    import django as django_module
+    from ratemyprofessor.renderers import json_encoder_name
+    report = {
+        'meta': {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'seed': options.seed,
+            'teachers': options.teachers,
+            'reviews': options.reviews,
+            'users': options.users,
+            'iterations': options.iterations,
+            'response_cache': not options.no_response_cache,
+            'fast_serialization': not options.no_fast_serialization,
+            'stats_cache': not options.no_stats_cache,
+            'json_encoder': json_encoder_name(),
+            'python': platform.python_version(),
+            'django': django_module.get_version(),
+        },
+        'results': results,
+    }
+    output = Path(options.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+    print('━' * 78)
+    if not options.no_response_cache:
+        from teachers.cache import get_teacher_cache_stats
+        for namespace, stats in get_teacher_cache_stats().items():
+            print(f'🗄️  响应缓存 {namespace}: 命中 {stats["hit"]} / 未命中 {stats["miss"]}')
+    if not options.no_stats_cache:
+        from authentication.stats import USER_STATS
+        from ratemyprofessor.home import HOME_STATS
+        from ratemyprofessor.stats_cache import get_stats_cache_stats
+        from reviews.cache import REVIEW_STATS
+        from teachers.stats import DEPARTMENT_ROLLUP_STATS
+        names = [DEPARTMENT_ROLLUP_STATS, REVIEW_STATS, USER_STATS, HOME_STATS]
+        for name, stats in get_stats_cache_stats(names).items():
+            print(
+                f'📊 统计缓存 {name}: 命中 {stats["hit"]} / 旧值 {stats["stale"]} / '
+                f'等待 {stats["wait"]} / 重算 {stats["recompute"]}'
+            )
+    print(f'📄 结果已写入 {output}')
+
+    if options.baseline:
+        baseline = json.loads(Path(options.baseline).read_text(encoding='utf-8'))
+        return report_regressions(baseline, report, options.threshold)
+    return 0
+
+
+def find_regressions(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """对比两次结果，返回 [(接口, 指标, 基线值, 当前值)]"""
+    regressions = []
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        for metric in ('p50_ms', 'p95_ms'):
+            if (result[metric] > base[metric] * (1 + threshold)
+                    and result[metric] - base[metric] > MIN_LATENCY_DELTA_MS):
+                regressions.append((name, metric, base[metric], result[metric]))
+        if result['queries'] > base['queries']:
+            regressions.append((name, 'queries', base['queries'], result['queries']))
+        if (result['peak_memory_kb'] > base['peak_memory_kb'] * (1 + threshold)
+                and result['peak_memory_kb'] - base['peak_memory_kb'] > MIN_MEMORY_DELTA_KB):
+            regressions.append((name, 'peak_memory_kb', base['peak_memory_kb'], result['peak_memory_kb']))
+        if result['status'] != base['status']:
+            regressions.append((name, 'status', base['status'], result['status']))
+    return regressions
+
+
+def report_regressions(baseline, current, threshold):
+    """输出对比结果，有退化时返回 1"""
+    dataset_keys = ('seed', 'teachers', 'reviews', 'users')
+    if any(baseline['meta'].get(key) != current['meta'].get(key) for key in dataset_keys):
+        print('⚠️  基线与本次使用的数据集参数不同，对比结果仅供参考')
+
+    print(f'\n📊 与基线对比（阈值 {threshold:.0%}）')
+    print('━' * 78)
+    print(f'{"接口":<26}{"p50 基线→当前":>24}{"查询数":>12}')
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            print(f'{name:<26}{"(新增)":>24}')
+            continue
+        print(
+            f'{name:<26}{base["p50_ms"]:>11.2f} → {result["p50_ms"]:<10.2f}'
+            f'{base["queries"]:>6} → {result["queries"]:<4}'
+        )
+
+    regressions = find_regressions(baseline, current, threshold)
+    print('━' * 78)
+    if not regressions:
+        print('✅ 没有发现性能退化')
+        return 0
+    for name, metric, before, after in regressions:
+        print(f'❌ {name}: {metric} {before} → {after}')
+    return 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='接口基准测试')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='运行基准测试')
+    run_parser.add_argument('--teachers', type=int, default=500)
+    run_parser.add_argument('--reviews', type=int, default=50000)
+    run_parser.add_argument('--users', type=int, default=200)
+    run_parser.add_argument('--seed', type=int, default=42)
+    run_parser.add_argument('--iterations', type=int, default=30, help='每个接口的测量次数')
+    run_parser.add_argument('--warmup', type=int, default=3, help='每个接口的预热次数')
+    run_parser.add_argument('--only', nargs='+', help='只运行指定的场景')
+    run_parser.add_argument('--output', default=str(DATA_DIR / 'results.json'), help='结果 JSON 路径')
+    run_parser.add_argument('--baseline', help='运行后与该基线 JSON 对比')
+    run_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    run_parser.add_argument('--regenerate', action='store_true', help='重新生成数据集')
+    run_parser.add_argument('--no-response-cache', action='store_true', help='关闭接口响应缓存')
+    run_parser.add_argument(
+        '--no-fast-serialization', action='store_true', help='列表接口改用普通序列化器（对比快速路径）'
+    )
+    run_parser.add_argument('--no-stats-cache', action='store_true', help='关闭统计接口缓存')
+
+    compare_parser = subparsers.add_parser('compare', help='对比两次结果')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+
+    options = parser.parse_args(argv)
+    if options.command == 'run':
+        return run(options)
+    baseline = json.loads(Path(options.baseline).read_text(encoding='utf-8'))
+    current = json.loads(Path(options.current).read_text(encoding='utf-8'))
+    return report_regressions(baseline, current, options.threshold)
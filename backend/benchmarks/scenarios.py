@@ -0,0 +1,88 @@
+"""
+基准测试的接口场景
+
+每个场景返回 (方法, 路径, 请求参数)；build 函数在每次请求前调用，
+写接口可以据此生成不重复的数据（例如不同的投票 IP）
+"""
+from django.urls import reverse
+
+REVIEW_DATA = {
+    'overall_rating': 4,
+    'difficulty_rating': 3,
+    'would_take_again': True,
+    'course': 'SE',
+    'semester': 'FALL_2024',
+    'title': '基准测试评价',
+    'content': '老师讲课思路清晰，重点突出。',
+    'tags': '认真负责,讲解清楚',
+}
+
+
+def _get(name, **kwargs):
+    """简单的 GET 场景，kwargs 为 URL 参数（从上下文中取值的函数）"""
+    def build(ctx, i):
+        return 'get', reverse(name, kwargs={key: value(ctx) for key, value in kwargs.items()}), {}
+    return build
+
+
+SCENARIOS = {
+    'teacher_list': _get('teacher-list'),
+    'teacher_list_gzip': lambda ctx, i: ('get', reverse('teacher-list'), {
+        'HTTP_ACCEPT_ENCODING': 'gzip, deflate, br',
+    }),
+    'teacher_list_search': lambda ctx, i: ('get', reverse('teacher-list'), {
+        'data': {'search': '软件工程'},
+    }),
+    'teacher_detail': _get('teacher-detail', pk=lambda ctx: ctx['teacher_id']),
+    'teacher_detail_304': lambda ctx, i: ('get', reverse('teacher-detail', kwargs={
+        'pk': ctx['teacher_id'],
+    }), {'HTTP_IF_NONE_MATCH': ctx['teacher_etag']}),
+    'teacher_batch': lambda ctx, i: ('get', reverse('teacher-batch'), {
+        'data': {'ids': ctx['teacher_ids']},
+    }),
+    'teacher_stats': _get('teacher-stats'),
+    'review_list': _get('review-list'),
+    'review_list_by_teacher': lambda ctx, i: ('get', reverse('review-list'), {
+        'data': {'teacher': ctx['teacher_id'], 'ordering': '-helpful_count'},
+    }),
+    'review_list_preview': lambda ctx, i: ('get', reverse('review-list'), {
+        'data': {'preview': '1'},
+    }),
+    'review_list_deep_page': lambda ctx, i: ('get', reverse('review-list'), {
+        'data': {'page': ctx['deep_page']},
+    }),
+    'review_detail': _get('review-detail', pk=lambda ctx: ctx['review_id']),
+    'review_detail_304': lambda ctx, i: ('get', reverse('review-detail', kwargs={
+        'pk': ctx['review_id'],
+    }), {'HTTP_IF_NONE_MATCH': ctx['review_etag']}),
+    'review_batch': lambda ctx, i: ('get', reverse('review-batch'), {
+        'data': {'ids': ctx['review_ids']},
+    }),
+    'review_stats': _get('review-stats'),
+    'review_helpful': lambda ctx, i: ('post', reverse('review-helpful', kwargs={
+        'review_id': ctx['review_id'],
+    }), {
+        'REMOTE_ADDR': f'172.16.{i // 256 % 256}.{i % 256}',
+        'HTTP_AUTHORIZATION': ctx['student_auth'],
+    }),
+    'review_create': lambda ctx, i: ('post', reverse('review-create'), {
+        'data': {**REVIEW_DATA, 'teacher': ctx['teacher_id']},
+        'content_type': 'application/json',
+        'HTTP_AUTHORIZATION': ctx['student_auth'],
+    }),
+    'student_login': lambda ctx, i: ('post', reverse('student_login'), {
+        'data': {'username': ctx['student_username'], 'password': ctx['password']},
+        'content_type': 'application/json',
+    }),
+    'admin_login': lambda ctx, i: ('post', reverse('admin_login'), {
+        'data': {'username': ctx['admin_username'], 'password': ctx['password']},
+        'content_type': 'application/json',
+    }),
+    'user_management': lambda ctx, i: ('get', reverse('user_management'), {
+        'HTTP_AUTHORIZATION': ctx['admin_auth'],
+    }),
+    'user_stats': lambda ctx, i: ('get', reverse('user_stats'), {
+        'HTTP_AUTHORIZATION': ctx['admin_auth'],
+    }),
+    'home': _get('home'),
+}
@@ -0,0 +1,42 @@
+"""
+基准测试使用的 Django 配置：在项目配置的基础上改用本地 SQLite，完全离线运行
+"""
+import os
+
+from ratemyprofessor.settings import *  # noqa: F401,F403
+from ratemyprofessor.settings import BASE_DIR
+
+BENCHMARK_DATA_DIR = BASE_DIR / 'benchmarks' / 'data'
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        # 由 benchmarks.runner 指向每次运行的数据库副本
+        'NAME': os.environ.get('BENCHMARK_DB', str(BENCHMARK_DATA_DIR / 'bench.sqlite3')),
+    }
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'benchmarks',
+    }
+}
+
+DEBUG = False
+ALLOWED_HOSTS = ['testserver', 'localhost', '127.0.0.1']
+HELPFUL_VOTE_BUFFER = {'ENABLED': False}
+# 由 benchmarks.runner --no-response-cache 关闭，用于对比
+RESPONSE_CACHE = {'ENABLED': os.environ.get('BENCHMARK_RESPONSE_CACHE', '1') == '1'}
+# 由 benchmarks.runner --no-fast-serialization 关闭，用于对比
+FAST_LIST_SERIALIZATION = os.environ.get('BENCHMARK_FAST_SERIALIZATION', '1') == '1'
+# 由 benchmarks.runner --no-stats-cache 关闭，用于对比
+STATS_CACHE = {'ENABLED': os.environ.get('BENCHMARK_STATS_CACHE', '1') == '1'}
+QUERY_BUDGET_ENFORCE = False
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {'null': {'class': 'logging.NullHandler'}},
+    'root': {'handlers': ['null']},
+}
@@ -0,0 +1,51 @@
+"""
+按主键列表批量读取（GET .../batch/?ids=3,1,2）
+
+- 一次 in_bulk() 查询取出所有对象，queryset 上的 select_related/prefetch_related 照常生效，
+  整批对象用详情序列化器一起序列化（例如教师的最新评价也是整批读取）
+- 结果按请求中主键的顺序返回，重复的主键只返回一次；不存在的主键列在 missing 中
+- 与详情接口一样经过 filter_queryset()，支持 ?fields= / ?omit=
+- 每次最多 batch_max_size 个主键，格式错误或超出上限时返回 400
+"""
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+IDS_PARAM = 'ids'
+BATCH_MAX_SIZE = 50
+
+
+def parse_ids(value, max_size=BATCH_MAX_SIZE):
+    """解析逗号分隔的主键列表，去掉重复项并保持顺序"""
+    ids = []
+    for part in value.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if not part.isdigit():
+            raise ValidationError({IDS_PARAM: f'无效的主键：{part}'})
+        ids.append(int(part))
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        raise ValidationError({IDS_PARAM: f'请提供要查询的主键，例如 ?{IDS_PARAM}=1,2,3'})
+    if len(ids) > max_size:
+        raise ValidationError({IDS_PARAM: f'每次最多查询 {max_size} 个'})
+    return ids
+
+
+class BatchRetrieveMixin:
+    """视图混入：batch 操作按 ?ids= 批量返回详情
+
+    视图集由路由器自动注册为 {basename}-batch；普通视图可以在 get() 中调用 self.batch()
+    """
+    batch_max_size = BATCH_MAX_SIZE
+
+    @action(detail=False, methods=['get'], url_path='batch')
+    def batch(self, request, *args, **kwargs):
+        ids = parse_ids(request.query_params.get(IDS_PARAM, ''), self.batch_max_size)
+        objects = self.filter_queryset(self.get_queryset()).in_bulk(ids)
+        serializer = self.get_serializer([objects[pk] for pk in ids if pk in objects], many=True)
+        return Response({
+            'results': serializer.data,
+            'missing': [pk for pk in ids if pk not in objects],
+        })
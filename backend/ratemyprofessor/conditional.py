@@ -0,0 +1,80 @@
+"""
+读接口的 HTTP 条件请求（ETag / Last-Modified）
+
+- 校验值在序列化之前计算：默认由响应缓存的版本号和视图的数据库指纹
+  （max(updated_at) + 行数等一次轻量查询，见 ResponseCacheMixin.get_fingerprint）生成；
+  指纹保证其他进程写入（版本号未更新）后校验值同样会变化。视图也可以重写 get_validators()
+- 请求带 If-None-Match / If-Modified-Since 且内容未变时直接返回 304，不执行序列化
+- 响应带 Cache-Control: no-cache，浏览器每次使用缓存前都会带上校验值重新验证
+"""
+import hashlib
+from calendar import timegm
+from datetime import datetime
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .response_cache import get_versions, version_timestamp
+
+
+def make_etag(request, *parts):
+    """由校验数据和请求（路径、排序后的查询参数、响应格式）生成强 ETag"""
+    query = sorted((key, sorted(values)) for key, values in request.GET.lists())
+    media_type = getattr(request, 'accepted_media_type', '')
+    values = [request.get_host(), request.path, repr(query), media_type, *map(str, parts)]
+    return hashlib.md5('\n'.join(values).encode('utf-8')).hexdigest()
+
+
+def version_validators(request, version_names, fingerprint=()):
+    """由版本号和数据库指纹生成 (ETag, Last-Modified)
+
+    Last-Modified 取版本号的更新时间和指纹中时间（如 max(updated_at)）的最大值
+    """
+    versions = get_versions(version_names)
+    etag = make_etag(request, *(f'{name}={versions[name]}' for name in sorted(versions)), *fingerprint)
+    timestamps = [version_timestamp(version) for version in versions.values()]
+    timestamps += [value for value in fingerprint if isinstance(value, datetime)]
+    last_modified = max(filter(None, timestamps), default=None)
+    return etag, last_modified
+
+
+class ConditionalGetMixin:
+    """为视图的 list/retrieve 提供 ETag / Last-Modified 条件请求
+
+    放在 ResponseCacheMixin 之前，304 时不会读取响应缓存
+    """
+
+    def get_validators(self):
+        """返回 (ETag, Last-Modified)，任一项可以为 None；返回 None 表示不处理条件请求"""
+        target = self.get_response_cache() if hasattr(self, 'get_response_cache') else None
+        if target is None:
+            return None
+        return version_validators(self.request, target[1], self.current_fingerprint())
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(super().retrieve, request, *args, **kwargs)
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        validators = self.get_validators() if request.method in ('GET', 'HEAD') else None
+        if validators is None:
+            return handler(request, *args, **kwargs)
+
+        etag, last_modified = validators
+        etag = quote_etag(etag) if etag else None
+        last_modified = timegm(last_modified.utctimetuple()) if last_modified else None
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code not in (200, 304):
+            return response
+
+        if etag:
+            # 压缩后的响应体与原始字节不同，只能使用弱 ETag（与 GZipMiddleware 相同）
+            response['ETag'] = f'W/{etag}' if response.has_header('Content-Encoding') else etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, no_cache=True)
+        return response
@@ -0,0 +1,205 @@
+"""
+列表接口的快速序列化（只读）
+
+列表请求不再创建模型实例、逐行走 DRF 字段机制，而是：
+- 按序列化器（已按 ?fields= / ?omit= 裁剪）的字段生成一次"输出计划"：
+  每个字段对应 values_list() 中的列和一个转换函数
+- 用 values_list(named=True) 一次取出当前页的元组，单次遍历拼出与序列化器逐字节相同的结果
+
+转换规则：普通字符/整数/布尔/主键列原样输出，Decimal 按字段精度格式化并按值缓存，
+日期时间、文件等仍调用字段自身的 to_representation；SerializerMethodField 等
+无法从列推断的字段由序列化器的 fast_fields 声明，声明不了时自动退回普通序列化器
+
+FAST_LIST_SERIALIZATION = False 时关闭（基准测试用来对比两条路径）
+"""
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import fields as drf_fields
+from rest_framework import relations
+from rest_framework.response import Response
+
+# 可以直接输出数据库值的字段类型（值为 None 时同样输出 None）
+PASSTHROUGH_FIELDS = (
+    drf_fields.CharField, drf_fields.IntegerField, drf_fields.BooleanField,
+    drf_fields.ChoiceField, relations.PrimaryKeyRelatedField,
+)
+
+
+def fast_list_enabled():
+    return getattr(settings, 'FAST_LIST_SERIALIZATION', True)
+
+
+class FastColumn:
+    """由若干列计算出的字段：func(*列值)"""
+
+    def __init__(self, columns, func):
+        self.columns = tuple(columns)
+        self.func = func
+
+
+class FastBatch:
+    """按主键批量加载的字段（例如预取的关联）：loader(主键列表) -> {主键: 值}"""
+
+    def __init__(self, loader, default=list):
+        self.loader = loader
+        self.default = default
+
+
+def passthrough(value):
+    return value
+
+
+def memoized(convert):
+    """按值缓存转换结果（Decimal 等取值很少的列）"""
+    cache = {}
+
+    def wrapper(value):
+        try:
+            return cache[value]
+        except KeyError:
+            result = cache[value] = convert(value)
+            return result
+    return wrapper
+
+
+def choice_label(choices):
+    """与 get_FOO_display() 相同：未知的值原样返回"""
+    labels = dict(choices)
+
+    def convert(value):
+        return labels.get(value, value)
+    return convert
+
+
+def file_url(field, model_field):
+    """与 FileField.to_representation 相同：返回（绝对）URL"""
+    request = field.context.get('request')
+
+    def convert(name):
+        if not name:
+            return None
+        url = model_field.storage.url(name)
+        return request.build_absolute_uri(url) if request is not None else url
+    return convert
+
+
+def none_safe(convert):
+    def wrapper(value):
+        return None if value is None else convert(value)
+    return wrapper
+
+
+class FastListPlan:
+    """序列化器的输出计划"""
+
+    def __init__(self, serializer, queryset):
+        self.columns = [queryset.model._meta.pk.attname]
+        self.outputs = []  # (字段名, 类型, 参数)
+        model_opts = queryset.model._meta
+        annotations = queryset.query.annotations
+        fast_fields = getattr(serializer, 'fast_fields', {})
+
+        for field in serializer._readable_fields:
+            name = field.field_name
+            spec = fast_fields.get(name)
+            if isinstance(spec, FastBatch):
+                self.outputs.append((name, 'batch', spec))
+            elif isinstance(spec, FastColumn):
+                indexes = [self._column(column) for column in spec.columns]
+                self.outputs.append((name, 'computed', (indexes, spec.func)))
+            elif field.source in annotations:
+                self.outputs.append((name, 'column', (self._column(field.source), passthrough)))
+            else:
+                column, model_field = self._resolve(model_opts, field)
+                self.outputs.append((name, 'column', (self._column(column), self._converter(field, model_field))))
+
+        # 排序字段（包括 search_rank 等注解）也要取出，游标分页据此生成下一页的游标
+        query = queryset.query
+        order_by = query.order_by or (model_opts.ordering if query.default_ordering else [])
+        for item in order_by:
+            if isinstance(item, str):
+                self._column(item.lstrip('-'))
+
+    def _column(self, column):
+        if column == 'pk':
+            column = self.columns[0]
+        if column not in self.columns:
+            self.columns.append(column)
+        return self.columns.index(column)
+
+    def _resolve(self, model_opts, field):
+        if field.source == '*' or not field.source_attrs:
+            raise FieldDoesNotExist(field.field_name)
+        opts = model_opts
+        model_field = None
+        for attr in field.source_attrs:
+            model_field = opts.get_field(attr)
+            if model_field.is_relation and attr != field.source_attrs[-1]:
+                opts = model_field.related_model._meta
+        return '__'.join(field.source_attrs), model_field
+
+    def _converter(self, field, model_field):
+        if isinstance(field, drf_fields.DecimalField):
+            return memoized(field.to_representation)
+        if isinstance(field, drf_fields.FileField):
+            return file_url(field, model_field)
+        if isinstance(field, PASSTHROUGH_FIELDS):
+            return passthrough
+        return none_safe(field.to_representation)
+
+    def build(self, rows):
+        """rows 为按 self.columns 取出的元组，返回与序列化器相同的字典列表"""
+        batches = {}
+        pks = [row[0] for row in rows]
+        for name, kind, spec in self.outputs:
+            if kind == 'batch':
+                batches[name] = (spec.loader(pks), spec.default)
+
+        results = []
+        for row in rows:
+            item = {}
+            for name, kind, spec in self.outputs:
+                if kind == 'column':
+                    index, convert = spec
+                    item[name] = convert(row[index])
+                elif kind == 'computed':
+                    indexes, func = spec
+                    item[name] = func(*[row[index] for index in indexes])
+                else:
+                    values, default = batches[name]
+                    value = values.get(row[0])
+                    item[name] = default() if value is None else value
+            results.append(item)
+        return results
+
+
+class FastListMixin:
+    """视图混入：list 使用快速序列化路径
+
+    序列化器可以定义 supports_fast_list()，在某些请求下（如需要模型实例生成搜索摘要）退回普通路径
+    """
+
+    def list(self, request, *args, **kwargs):
+        if not fast_list_enabled():
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer = self.get_serializer()
+        plan = None
+        if getattr(serializer, 'supports_fast_list', lambda: True)():
+            try:
+                plan = FastListPlan(serializer, queryset)
+            except FieldDoesNotExist:
+                pass
+        if plan is None:
+            page = self.paginate_queryset(queryset)
+            serializer = self.get_serializer(page if page is not None else queryset, many=True)
+            if page is not None:
+                return self.get_paginated_response(serializer.data)
+            return Response(serializer.data)
+
+        rows = queryset.prefetch_related(None).values_list(*plan.columns, named=True)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(plan.build(page))
+        return Response(plan.build(list(rows)))
@@ -0,0 +1,55 @@
+"""
+首页汇总接口（/api/home/）
+
+首页需要的教师统计、评价统计、评分最高的教师和最新评价由一个接口一次返回：
+- 教师统计和评价统计（含最新评价）直接复用统计接口的缓存汇总（见 ratemyprofessor.stats_cache），
+  只额外查询评分最高的教师（教师 + 科目预取），缓存为空时共 5 次查询
+- 整个汇总作为一个统计缓存项保存，依赖教师列表和评价列表的版本号，
+  教师或评价写入后过期，由一个请求重新生成
+- 汇总不依赖请求：教师照片保存为相对 URL，返回时再按本次请求转换为绝对 URL
+"""
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+
+from reviews.cache import REVIEW_LIST_VERSION
+from reviews.stats import get_review_stats
+from teachers.cache import TEACHER_LIST_VERSION
+from teachers.models import Teacher
+from teachers.serializers import TeacherListSerializer
+from teachers.stats import get_department_rollup
+
+from .middleware import query_budget
+from .stats_cache import cached_stats
+
+HOME_STATS = 'home'
+# 首页展示的评分最高的教师数量
+HOME_TOP_TEACHERS = 8
+
+
+def build_home_bundle():
+    review_stats = dict(get_review_stats())
+    recent_reviews = review_stats.pop('recent_reviews')
+    top_teachers = Teacher.objects.with_subjects().order_by('-average_rating')[:HOME_TOP_TEACHERS]
+    return {
+        'teacher_stats': get_department_rollup(),
+        'review_stats': review_stats,
+        'top_teachers': list(TeacherListSerializer(top_teachers, many=True).data),
+        'recent_reviews': recent_reviews,
+    }
+
+
+def get_home_bundle():
+    """读取首页汇总，教师或评价写入后由一个请求重新生成"""
+    return cached_stats(HOME_STATS, build_home_bundle, [TEACHER_LIST_VERSION, REVIEW_LIST_VERSION])
+
+
+@query_budget(5)
+@api_view(['GET'])
+def home(request):
+    """首页汇总：教师统计、评价统计、评分最高的教师和最新评价"""
+    bundle = get_home_bundle()
+    top_teachers = [
+        {**teacher, 'image': request.build_absolute_uri(teacher['image'])} if teacher['image'] else teacher
+        for teacher in bundle['top_teachers']
+    ]
+    return Response({**bundle, 'top_teachers': top_teachers})
@@ -0,0 +1,112 @@
+"""
+按请求统计 SQL 查询数和数据库耗时，并检查视图声明的查询预算
+
+- DEBUG 模式下在响应头中输出 X-DB-Queries（查询数）和 X-DB-Time（毫秒）
+- 视图用 @query_budget(...) 或类属性 query_budget 声明预算：
+  整数表示所有请求共用一个预算，字典按 HTTP 方法（视图集按 action）分别声明
+- 超出预算时记录警告；QUERY_BUDGET_ENFORCE = True 时直接抛出 QueryBudgetExceeded（附带 SQL），
+  测试客户端会把异常抛给测试用例（各应用 tests.py 中的查询预算测试即使用这种方式）
+- 生产环境只计数，DEBUG 或 QUERY_BUDGET_ENFORCE 开启时才记录耗时和 SQL 文本
+"""
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """请求的查询数超出视图声明的预算"""
+
+
+class QueryCollector:
+    """connection.execute_wrapper 使用的查询计数器
+
+    默认只计数；details=True 时才记录耗时和 SQL 文本（DEBUG 响应头、超出预算的异常信息使用）
+    """
+
+    def __init__(self, details=False):
+        self.details = details
+        self.count = 0
+        self.duration = 0.0
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        if not self.details:
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.queries.append(sql)
+
+
+@contextmanager
+def count_queries(details=False):
+    """统计代码块中所有数据库连接执行的查询
+
+        with count_queries(details=True) as queries:
+            ...
+        queries.count, queries.duration, queries.queries
+    """
+    collector = QueryCollector(details)
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(collector))
+        yield collector
+
+
+def query_budget(budget):
+    """声明视图的查询预算，可用于函数视图（放在 @api_view 之上）和视图类"""
+    def decorator(view):
+        view.query_budget = budget
+        return view
+    return decorator
+
+
+def get_query_budget(view_func, method):
+    """读取视图对本次请求声明的预算，未声明时返回 None"""
+    budget = getattr(view_func, 'query_budget', None)
+    for attr in ('cls', 'view_class'):
+        if budget is None:
+            budget = getattr(getattr(view_func, attr, None), 'query_budget', None)
+    if not isinstance(budget, dict):
+        return budget
+    # 视图集按 action 声明（list/retrieve/create...），其他视图按 HTTP 方法
+    actions = getattr(view_func, 'actions', None) or {}
+    return budget.get(actions.get(method.lower(), method.upper()))
+
+
+class QueryCountMiddleware:
+    """统计每个请求的查询数和数据库耗时"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        enforce = getattr(settings, 'QUERY_BUDGET_ENFORCE', False)
+        with count_queries(details=settings.DEBUG or enforce) as queries:
+            response = self.get_response(request)
+
+        if settings.DEBUG:
+            response['X-DB-Queries'] = str(queries.count)
+            response['X-DB-Time'] = f'{queries.duration * 1000:.2f}'
+
+        budget = getattr(request, 'query_budget', None)
+        if budget is not None and queries.count > budget:
+            message = (
+                f'{request.method} {request.path} 执行了 {queries.count} 个查询，'
+                f'超出预算 {budget}'
+            )
+            if enforce:
+                raise QueryBudgetExceeded(message + '\n' + '\n'.join(queries.queries))
+            logger.warning(message)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = get_query_budget(view_func, request.method)
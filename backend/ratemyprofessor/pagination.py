@@ -0,0 +1,128 @@
+"""
+列表分页
+
+默认仍是页码分页（?page=），请求中带 ?cursor= 参数时改用游标（keyset）分页：
+- 按当前排序字段（?ordering= 或视图默认排序）+ id 作为游标，用 WHERE 条件定位下一页，
+  不使用 OFFSET，也不执行 COUNT(*)，翻到多深都一样快
+- 第一页传空的 ?cursor=，之后使用响应中的 next 链接；游标无效时返回 400
+"""
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(PageNumberPagination):
+    """页码分页 + 可选的游标分页（?cursor=）"""
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = '无效的游标'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.use_cursor = self.cursor_query_param in request.query_params
+        if not self.use_cursor:
+            return super().paginate_queryset(queryset, request, view)
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        self.request = request
+        self.ordering = self.get_ordering(queryset)
+        queryset = queryset.order_by(*(
+            f'-{name}' if descending else name for name, descending in self.ordering
+        ))
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self.get_cursor_filter(queryset.model, cursor))
+
+        # 多取一条用来判断是否还有下一页
+        results = list(queryset[:page_size + 1])
+        self.has_next = len(results) > page_size
+        self.page = results[:page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        if not self.use_cursor:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+    def get_next_link(self):
+        if not self.use_cursor:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        position = [self._get_value(last, name) for name, _ in self.ordering]
+        cursor = base64.urlsafe_b64encode(
+            json.dumps(position, default=str, ensure_ascii=False).encode('utf-8')
+        ).decode('ascii')
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_ordering(self, queryset):
+        """当前排序字段 [(字段名, 是否降序)]，末尾补上 id 保证顺序唯一"""
+        query = queryset.query
+        order_by = query.order_by or (queryset.model._meta.ordering if query.default_ordering else [])
+        ordering = []
+        for item in order_by:
+            if not isinstance(item, str) or '__' in item or item.lstrip('-') == '?':
+                raise ValidationError({self.cursor_query_param: '当前排序不支持游标分页'})
+            descending = item.startswith('-')
+            name = item.lstrip('-')
+            ordering.append(('id' if name == 'pk' else name, descending))
+        names = [name for name, _ in ordering]
+        if 'id' in names:
+            # id 之后的排序字段不会影响顺序
+            ordering = ordering[:names.index('id') + 1]
+        else:
+            ordering.append(('id', ordering[0][1] if ordering else False))
+        return ordering
+
+    def get_cursor_filter(self, model, cursor):
+        """(a, b, id) > (x, y, z) 展开为 a > x OR (a = x AND b > y) OR ..."""
+        try:
+            position = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+            if not isinstance(position, list) or len(position) != len(self.ordering):
+                raise ValueError
+            values = [
+                self._to_python(model, name, value)
+                for (name, _), value in zip(self.ordering, position)
+            ]
+        except (TypeError, ValueError, UnicodeError, DjangoValidationError):
+            raise ValidationError({self.cursor_query_param: self.invalid_cursor_message})
+
+        condition = Q()
+        for index, (name, descending) in enumerate(self.ordering):
+            lookup = {
+                self.ordering[i][0]: values[i] for i in range(index)
+            }
+            lookup[f'{name}__{"lt" if descending else "gt"}'] = values[index]
+            condition |= Q(**lookup)
+        return condition
+
+    def _get_value(self, obj, name):
+        if not hasattr(obj, '_meta'):
+            # values_list(named=True) 的结果行（见 ratemyprofessor.fastpath）
+            return getattr(obj, name)
+        try:
+            return getattr(obj, obj._meta.get_field(name).attname)
+        except FieldDoesNotExist:
+            # 注解字段，如搜索相关度 search_rank
+            return getattr(obj, name)
+
+    def _to_python(self, model, name, value):
+        if value is None:
+            raise ValueError
+        try:
+            return model._meta.get_field(name).to_python(value)
+        except FieldDoesNotExist:
+            return value
@@ -0,0 +1,155 @@
+"""
+接口查询预算测试的公共部分
+
+各应用的 tests.py 用 QueryBudgetTestMixin 声明本应用接口的请求场景，manage.py test 时：
+- 每个场景在缓存为空（最坏情况）时请求一次，并开启 QUERY_BUDGET_ENFORCE，
+  查询数超出视图用 @query_budget / query_budget 声明的预算时中间件抛出 QueryBudgetExceeded
+- 未声明预算、状态码与期望不符（示例数据失效）的场景同样失败
+- 应用 urls.py 中有名称的接口都必须有对应的场景
+"""
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.urls import URLPattern, URLResolver, get_resolver, resolve, reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from authentication.models import UserProfile
+from reviews.models import Review, ReviewCounter
+from teachers.models import Teacher
+
+from .middleware import get_query_budget
+
+# 示例数据规模：列表接口的查询数不应随数量变化
+TEACHER_COUNT = 6
+REVIEWS_PER_TEACHER = 4
+STUDENT_COUNT = 5
+PASSWORD = 'budget-check-password'
+
+REVIEW_DATA = {
+    'overall_rating': 4,
+    'difficulty_rating': 3,
+    'would_take_again': True,
+    'course': 'SE',
+    'semester': 'FALL_2024',
+    'title': '讲解清楚',
+    'content': '课程内容充实，作业量适中',
+    'tags': '认真负责,讲解清楚',
+}
+
+
+def create_budget_fixtures():
+    """创建查询预算测试使用的示例数据"""
+    admin_group = Group.objects.create(name='管理员')
+    admin = User.objects.create_user('budget-admin', password=PASSWORD)
+    admin.groups.add(admin_group)
+    UserProfile.objects.create(user=admin)
+    students = []
+    for index in range(STUDENT_COUNT):
+        student = User.objects.create_user(f'budget-student-{index}', password=PASSWORD)
+        UserProfile.objects.create(user=student, student_id=f'2024{index:04d}')
+        students.append(student)
+
+    teachers = [
+        Teacher.objects.create(
+            name=f'示例教师{index}', department='计算机与软件工程', subjects='软件工程,数据库',
+            bio='示例简介',
+        )
+        for index in range(TEACHER_COUNT)
+    ]
+    reviews = [
+        Review.objects.create(teacher=teacher, reviewer_name=f'同学{index}', **REVIEW_DATA)
+        for teacher in teachers
+        for index in range(REVIEWS_PER_TEACHER)
+    ]
+    spare_teacher = Teacher.objects.create(name='待删除教师', subjects='编译原理')
+    # 评价计数表只在第一次读取时初始化，这里提前建好，按稳定状态检查预算
+    ReviewCounter.rebuild()
+
+    return {
+        'admin': admin,
+        'student': students[0],
+        'spare_student': students[-1],
+        'teacher': teachers[0],
+        'spare_teacher': spare_teacher,
+        'review': reviews[0],
+        'spare_review': reviews[-1],
+        # 批量接口：倒序并包含一个不存在的主键
+        'teacher_ids': ','.join(str(teacher.pk) for teacher in reversed(teachers)) + ',0',
+        'review_ids': ','.join(str(review.pk) for review in reversed(reviews)) + ',0',
+        'refresh': str(RefreshToken.for_user(students[0])),
+        'tokens': {
+            'admin': str(RefreshToken.for_user(admin).access_token),
+            'student': str(RefreshToken.for_user(students[0]).access_token),
+        },
+    }
+
+
+def url_names(urlconf):
+    """urls.py 中所有有名称的接口（不包括 DRF 路由器的根视图）"""
+    names = set()
+
+    def collect(patterns):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                collect(pattern.url_patterns)
+            elif isinstance(pattern, URLPattern) and pattern.name and pattern.name != 'api-root':
+                names.add(pattern.name)
+
+    collect(get_resolver(urlconf).url_patterns)
+    return names
+
+
+class QueryBudgetTestMixin:
+    """TransactionTestCase 混入：按顺序请求 scenarios 中的每个接口并检查查询预算
+
+    使用 TransactionTestCase 是为了和真实请求一样提交事务（TestCase 中的 atomic()
+    会变成额外计数的 SAVEPOINT，on_commit 回调也不会执行）
+
+    scenarios 的每一项为 (URL 名称, 方法, URL 参数, 请求数据, 登录身份, 期望状态码)，
+    URL 参数和请求数据可以是接收示例数据的函数；urlconf 中的每个接口都必须出现在 scenarios 中
+    """
+    urlconf = None
+    scenarios = []
+
+    def setUp(self):
+        self.fixtures = create_budget_fixtures()
+
+    def request_scenario(self, name, method, kwargs, data, user, expected_status):
+        kwargs = kwargs(self.fixtures) if callable(kwargs) else kwargs
+        path = reverse(name, kwargs=kwargs)
+        self.assertIsNotNone(get_query_budget(resolve(path).func, method), f'{method} {name} 没有声明查询预算')
+
+        headers = {}
+        if user:
+            headers['HTTP_AUTHORIZATION'] = f'Bearer {self.fixtures["tokens"][user]}'
+        cache.clear()
+        response = getattr(self.client, method.lower())(
+            path,
+            data=data(self.fixtures) if data else None,
+            content_type='application/json',
+            **headers,
+        )
+        if expected_status is not None:
+            self.assertEqual(
+                response.status_code, expected_status, f'{method} {name} 的示例数据可能已失效'
+            )
+
+    def test_query_budgets(self):
+        # 使用独立的本地内存缓存并禁用投票缓冲
+        with self.settings(
+            QUERY_BUDGET_ENFORCE=True,
+            CACHES={'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': 'query-budgets',
+            }},
+            HELPFUL_VOTE_BUFFER={'ENABLED': False},
+        ):
+            for scenario in self.scenarios:
+                with self.subTest(name=scenario[0], method=scenario[1]):
+                    self.request_scenario(*scenario)
+
+    def test_every_url_has_scenario(self):
+        if self.urlconf is None:
+            return
+        covered = {scenario[0] for scenario in self.scenarios}
+        self.assertEqual(url_names(self.urlconf) - covered, set())
+
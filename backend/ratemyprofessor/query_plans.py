@@ -0,0 +1,81 @@
+"""
+列表查询执行计划测试的公共部分
+
+各应用的 tests.py 用 QueryPlanTestMixin 指定列表视图，manage.py test 时按视图实际使用的
+FilterSet 和排序字段组合出 "过滤条件 × 排序" 的列表查询（取一页），对每个查询执行 EXPLAIN，
+出现意外的全表扫描时测试失败
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+
+# 每个过滤参数使用的示例值（执行计划与具体取值无关）
+SAMPLE_VALUES = {
+    'name': '王',
+    'department': '软件',
+    'subjects': '软件工程',
+    'min_rating': '4',
+    'max_difficulty': '3',
+    'teacher': '1',
+    'course': 'SE',
+    'semester': 'FALL_2024',
+    'would_take_again': 'true',
+}
+
+# 各数据库执行计划中表示全表扫描的模式，匹配组为表名
+FULL_SCAN_PATTERNS = {
+    'sqlite': re.compile(r'\bSCAN (\w+)(?!\s+USING)\s*$', re.MULTILINE),
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'mysql': re.compile(r'"table_name": "(\w+)",\s*"access_type": "ALL"'),
+}
+
+
+def list_queries(view_class):
+    """生成 (过滤参数, 排序, queryset)：默认排序和每个可选排序字段 × 无过滤和每个过滤参数"""
+    filterset_class = view_class.filterset_class
+    orderings = [list(view_class.ordering)] + [
+        [f'-{field}'] for field in view_class.ordering_fields
+        if [f'-{field}'] != list(view_class.ordering)
+    ]
+    for filter_name in [None, *filterset_class.base_filters]:
+        data = {filter_name: SAMPLE_VALUES[filter_name]} if filter_name else {}
+        filterset = filterset_class(data=data, queryset=view_class.queryset.all())
+        if not filterset.is_valid():
+            raise ValueError(f'过滤参数 {filter_name} 的示例值无效: {filterset.errors}')
+        for ordering in orderings:
+            yield filter_name, ordering, filterset.qs.order_by(*ordering)
+
+
+def explain(queryset):
+    if connection.vendor == 'mysql':
+        return queryset.explain(format='json')
+    return queryset.explain()
+
+
+class QueryPlanTestMixin:
+    """TestCase 混入：view_class 的每个 "过滤条件 × 排序" 列表查询都不能出现意外的全表扫描
+
+    expected_scans 为已知无法走索引的过滤参数（如子串匹配），
+    expected_scan_orderings 为有意不建索引的排序字段（如取值很少的评分字段），这些组合允许全表扫描
+    """
+    view_class = None
+    expected_scans = set()
+    expected_scan_orderings = set()
+
+    def is_expected_scan(self, filter_name, ordering):
+        return filter_name in self.expected_scans or any(
+            field.lstrip('-') in self.expected_scan_orderings for field in ordering
+        )
+
+    def test_list_queries_use_indexes(self):
+        pattern = FULL_SCAN_PATTERNS.get(connection.vendor)
+        if pattern is None:
+            self.skipTest(f'不支持的数据库: {connection.vendor}')
+        page_size = settings.REST_FRAMEWORK.get('PAGE_SIZE') or 20
+        for filter_name, ordering, queryset in list_queries(self.view_class):
+            if self.is_expected_scan(filter_name, ordering):
+                continue
+            with self.subTest(filter=filter_name, ordering=','.join(ordering)):
+                plan = explain(queryset[:page_size])
+                self.assertEqual(sorted(set(pattern.findall(plan))), [], f'出现全表扫描:\n{plan}')
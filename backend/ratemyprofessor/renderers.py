@@ -0,0 +1,90 @@
+"""
+JSON 渲染和预压缩的响应体
+
+- FastJSONRenderer：安装了 orjson 时用它编码，输出与 DRF 的 JSONRenderer 相同
+  （紧凑格式、不转义非 ASCII 字符、转义 U+2028/U+2029）；未安装或请求缩进时退回标准库 json
+- render_payload()：把数据编码成字节，并同时生成 gzip（安装了 brotli 时还有 br）压缩版本，
+  与响应缓存一起保存；payload_response() 按 Accept-Encoding 直接返回对应的字节，
+  命中缓存时既不编码也不压缩
+"""
+import gzip
+import re
+
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # 可选依赖
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # 可选依赖
+    brotli = None
+
+# 小于该长度的响应不压缩（与 Django 的 GZipMiddleware 相同）
+COMPRESS_MIN_LENGTH = 200
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 8
+
+ACCEPTS_ENCODING = {
+    'br': re.compile(r'\bbr\b'),
+    'gzip': re.compile(r'\bgzip\b'),
+}
+
+
+def json_encoder_name():
+    return 'orjson' if orjson is not None else 'json'
+
+
+class FastJSONRenderer(JSONRenderer):
+    """优先使用 orjson 编码的 JSONRenderer"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (orjson is None or data is None or not self.compact or self.ensure_ascii
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data,
+                default=encoders.JSONEncoder().default,
+                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        except TypeError:
+            # orjson 不支持的数据（如超出 64 位的整数），交给标准库处理
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+
+def render_payload(request, data, renderer_context=None):
+    """用本次请求协商出的渲染器编码数据，并生成压缩版本"""
+    renderer = request.accepted_renderer
+    body = renderer.render(data, request.accepted_media_type, renderer_context or {})
+    content_type = renderer.media_type
+    if renderer.charset:
+        content_type = f'{content_type}; charset={renderer.charset}'
+    payload = {'content_type': content_type, 'identity': body}
+    if len(body) >= COMPRESS_MIN_LENGTH:
+        payload['gzip'] = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+        if brotli is not None:
+            payload['br'] = brotli.compress(body, quality=BROTLI_QUALITY)
+    return payload
+
+
+def payload_response(request, payload):
+    """按客户端支持的压缩方式返回保存的字节"""
+    accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    response = HttpResponse(content_type=payload['content_type'])
+    for encoding, pattern in ACCEPTS_ENCODING.items():
+        if encoding in payload and pattern.search(accept_encoding):
+            response.content = payload[encoding]
+            response['Content-Encoding'] = encoding
+            break
+    else:
+        response.content = payload['identity']
+    if 'gzip' in payload:
+        patch_vary_headers(response, ('Accept-Encoding',))
+    return response
@@ -0,0 +1,177 @@
+"""
+接口响应缓存（按版本号失效）
+
+- 缓存键 = 命名空间 + 相关版本号 + 数据库指纹 + 规范化后的路径和查询参数（参数顺序不影响命中）
+- 数据变化时只需更新版本号（更新时间 + 随机令牌），旧版本的缓存不再被读取，等待过期即可，
+  不需要按通配符批量删除，因此可以使用 locmem/file 等任意 Django 缓存后端
+- 版本号中的更新时间同时用作条件请求的 Last-Modified（见 ratemyprofessor.conditional）
+- 版本号只在写入数据的进程中更新：本地内存缓存（默认）下，其他进程（其他 worker、管理命令、
+  shell）的写入不会更新本进程的版本号。因此视图可以再提供一个廉价的数据库指纹
+  （例如 max(updated_at) + 行数，见 ResponseCacheMixin.get_fingerprint），数据变化后缓存键随之变化
+- 缓存的是编码好的响应体及其 gzip/br 压缩版本（见 ratemyprofessor.renderers），
+  命中时不再编码和压缩；只缓存 JSON 响应，可浏览 API 等其他格式不缓存
+- 每个命名空间的命中/未命中次数保存在缓存中，响应头 X-Cache 标明本次是否命中
+"""
+import hashlib
+import time
+import uuid
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from .renderers import payload_response, render_payload
+
+DEFAULT_RESPONSE_CACHE_SETTINGS = {
+    'ENABLED': True,
+    'TIMEOUT': 60 * 10,
+}
+
+VERSION_KEY_PREFIX = 'version:'
+RESPONSE_KEY = 'response:{namespace}:{digest}'
+STATS_KEY = 'response:stats:{namespace}:{outcome}'
+
+
+def get_response_cache_settings():
+    return {**DEFAULT_RESPONSE_CACHE_SETTINGS, **getattr(settings, 'RESPONSE_CACHE', {})}
+
+
+def _new_version():
+    return f'{time.time_ns() // 1_000_000:x}.{uuid.uuid4().hex[:8]}'
+
+
+def version_timestamp(version):
+    """版本号的生成时间（UTC），无法解析时返回 None"""
+    try:
+        milliseconds = int(version.split('.', 1)[0], 16)
+    except (AttributeError, ValueError):
+        return None
+    return datetime.fromtimestamp(milliseconds / 1000, tz=timezone.utc)
+
+
+def get_versions(names):
+    """读取一组版本号，返回 {名称: 版本}；不存在（或已被淘汰）的版本号自动初始化"""
+    keys = {VERSION_KEY_PREFIX + name: name for name in names}
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    for key in missing:
+        # add 保证并发初始化时大家拿到同一个版本号
+        cache.add(key, _new_version(), timeout=None)
+    if missing:
+        versions.update(cache.get_many(missing))
+    return {keys[key]: version for key, version in versions.items()}
+
+
+def bump_versions(names):
+    """在事务提交后更新一组版本号，使依赖它们的缓存全部失效"""
+    names = set(names)
+    if names:
+        transaction.on_commit(lambda: cache.set_many(
+            {VERSION_KEY_PREFIX + name: _new_version() for name in names}, timeout=None
+        ))
+
+
+def response_cache_key(request, namespace, versions, fingerprint=()):
+    """由版本号、数据库指纹和规范化的请求（主机、路径、排序后的查询参数、响应格式）生成缓存键"""
+    query = sorted((key, sorted(values)) for key, values in request.GET.lists())
+    media_type = getattr(request, 'accepted_media_type', '')
+    parts = [request.get_host(), request.path, repr(query), media_type]
+    parts += [f'{name}={versions[name]}' for name in sorted(versions)]
+    parts += map(str, fingerprint)
+    digest = hashlib.md5('\n'.join(parts).encode('utf-8')).hexdigest()
+    return RESPONSE_KEY.format(namespace=namespace, digest=digest)
+
+
+def record_outcome(namespace, outcome):
+    """累加命中（hit）/未命中（miss）计数"""
+    key = STATS_KEY.format(namespace=namespace, outcome=outcome)
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def get_response_cache_stats(namespaces):
+    """各命名空间的命中统计 {命名空间: {'hit', 'miss', 'hit_rate'}}"""
+    keys = {
+        STATS_KEY.format(namespace=namespace, outcome=outcome): (namespace, outcome)
+        for namespace in namespaces
+        for outcome in ('hit', 'miss')
+    }
+    counts = cache.get_many(keys)
+    stats = {namespace: {'hit': 0, 'miss': 0} for namespace in namespaces}
+    for key, count in counts.items():
+        namespace, outcome = keys[key]
+        stats[namespace][outcome] = count
+    for item in stats.values():
+        total = item['hit'] + item['miss']
+        item['hit_rate'] = round(item['hit'] / total, 4) if total else None
+    return stats
+
+
+def cached_response(request, namespace, version_names, handler, renderer_context=None, fingerprint=()):
+    """读取或生成版本化的响应缓存，handler() 返回未渲染的 DRF Response"""
+    config = get_response_cache_settings()
+    if (not config['ENABLED'] or request.method != 'GET'
+            or not isinstance(getattr(request, 'accepted_renderer', None), JSONRenderer)):
+        return handler()
+
+    key = response_cache_key(request, namespace, get_versions(version_names), fingerprint)
+    payload = cache.get(key)
+    if payload is not None:
+        record_outcome(namespace, 'hit')
+        response = payload_response(request, payload)
+        response['X-Cache'] = 'HIT'
+        return response
+
+    record_outcome(namespace, 'miss')
+    response = handler()
+    # 只缓存成功的响应（404、参数错误等不缓存）
+    if response.status_code == 200:
+        payload = render_payload(request, response.data, renderer_context)
+        cache.set(key, payload, timeout=config['TIMEOUT'])
+        response = payload_response(request, payload)
+    response['X-Cache'] = 'MISS'
+    return response
+
+
+class ResponseCacheMixin:
+    """为视图的 list/retrieve 提供响应缓存
+
+    视图实现 get_response_cache() 返回 (命名空间, [版本号名称])，返回 None 表示不缓存；
+    get_fingerprint() 返回从数据库读取的指纹，参与缓存键和条件请求的校验值
+    """
+
+    def get_response_cache(self):
+        raise NotImplementedError
+
+    def get_fingerprint(self):
+        """数据库指纹（元组），例如 (max(updated_at), 行数)；默认不读取数据库"""
+        return ()
+
+    def current_fingerprint(self):
+        """本次请求的数据库指纹，缓存和条件请求共用，只查询一次"""
+        if not hasattr(self, '_fingerprint'):
+            self._fingerprint = tuple(self.get_fingerprint())
+        return self._fingerprint
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        target = self.get_response_cache() if request.method == 'GET' else None
+        if target is None:
+            return handler(request, *args, **kwargs)
+        namespace, version_names = target
+        return cached_response(
+            request, namespace, version_names,
+            lambda: handler(request, *args, **kwargs),
+            renderer_context=self.get_renderer_context(),
+            fingerprint=self.current_fingerprint(),
+        )
@@ -42,6 +42,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'ratemyprofessor.middleware.QueryCountMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -95,6 +96,43 @@ DATABASES = {
 #     }
 # }
 
+# 缓存配置（默认使用本地内存缓存，多进程部署时可切换为文件/Redis等共享缓存）
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='ratemyprofessor'),
+    }
+}
+
+# 接口响应缓存（教师列表/详情，按版本号失效）
+RESPONSE_CACHE = {
+    'ENABLED': config('RESPONSE_CACHE', default=True, cast=bool),
+    'TIMEOUT': 60 * 10,
+}
+
+# 统计接口缓存（教师/评价/用户统计）：超过 SOFT_TIMEOUT 或数据变化后由一个请求重新计算，
+# 其他请求继续返回旧值；缓存项在 HARD_TIMEOUT 后淘汰（见 ratemyprofessor.stats_cache）
+STATS_CACHE = {
+    'ENABLED': config('STATS_CACHE', default=True, cast=bool),
+    'SOFT_TIMEOUT': 60,
+    'HARD_TIMEOUT': 60 * 30,
+}
+
+# 列表接口的快速序列化路径（values_list + 预先生成的输出计划，见 ratemyprofessor.fastpath）
+FAST_LIST_SERIALIZATION = config('FAST_LIST_SERIALIZATION', default=True, cast=bool)
+
+# "有用"投票写回缓冲（默认关闭；BACKEND 可选 memory 或 sqlite）
+HELPFUL_VOTE_BUFFER = {
+    'ENABLED': config('HELPFUL_VOTE_BUFFER', default=False, cast=bool),
+    'BACKEND': config('HELPFUL_VOTE_BUFFER_BACKEND', default='memory'),
+    'PATH': BASE_DIR / 'helpful_votes_spool.sqlite3',
+    'FLUSH_INTERVAL': 5,
+    'FLUSH_SIZE': 100,
+}
+
+# 查询预算：超出视图声明的查询数时抛出异常（默认只记录警告，测试/检查时开启）
+QUERY_BUDGET_ENFORCE = config('QUERY_BUDGET_ENFORCE', default=False, cast=bool)
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -143,7 +181,13 @@ REST_FRAMEWORK = {
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    # 安装了 orjson 时用它编码 JSON（见 ratemyprofessor.renderers）
+    'DEFAULT_RENDERER_CLASSES': [
+        'ratemyprofessor.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    # 页码分页，带 ?cursor= 参数时使用游标分页
+    'DEFAULT_PAGINATION_CLASS': 'ratemyprofessor.pagination.KeysetPagination',
     'PAGE_SIZE': 20
 }
 
@@ -0,0 +1,99 @@
+"""
+稀疏字段集（?fields= / ?omit=）和按字段只读取需要的列
+
+- 序列化器混入 SparseFieldsetMixin 后，GET 请求可以用 ?fields=id,name 只返回指定字段，
+  或用 ?omit=bio 去掉某些字段（未知的字段名会被忽略）
+- 视图混入 SparseFieldsViewMixin 后，queryset 按序列化器实际输出的字段调用 only()，
+  序列化器用不到的列（例如列表中的 bio）不会从数据库读取；
+  排序字段和 select_related 的关联会自动保留，不需要的 select_related 会被去掉
+"""
+from django.core.exceptions import FieldDoesNotExist
+
+FIELDS_PARAM = 'fields'
+OMIT_PARAM = 'omit'
+
+
+def parse_field_names(value):
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+class SparseFieldsetMixin:
+    """序列化器混入：按 ?fields= / ?omit= 裁剪输出字段
+
+    field_columns 声明无法从 source 推断的字段所依赖的列，
+    例如 {'tags_list': ('tags',)}，空元组表示不依赖本表的列（如预取的关联）
+    """
+    field_columns = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method != 'GET':
+            return
+        params = request.query_params
+        if params.get(FIELDS_PARAM):
+            for name in set(self.fields) - parse_field_names(params[FIELDS_PARAM]):
+                self.fields.pop(name)
+        if params.get(OMIT_PARAM):
+            for name in parse_field_names(params[OMIT_PARAM]) & set(self.fields):
+                self.fields.pop(name)
+
+    def get_columns(self):
+        """输出字段所依赖的列，无法推断时返回 None（不做任何限制）"""
+        opts = self.Meta.model._meta
+        columns = {opts.pk.name}
+        for name, field in self.fields.items():
+            if name in self.field_columns:
+                columns.update(self.field_columns[name])
+                continue
+            if field.source == '*':
+                return None
+            try:
+                opts.get_field(field.source_attrs[0])
+            except FieldDoesNotExist:
+                return None
+            columns.add('__'.join(field.source_attrs))
+        return columns
+
+    def optimize_queryset(self, queryset):
+        """只读取输出字段、排序字段和 select_related 关联需要的列"""
+        columns = self.get_columns()
+        related = queryset.query.select_related
+        if columns is None or related is True:
+            return queryset
+
+        opts = queryset.model._meta
+        query = queryset.query
+        order_by = query.order_by or (opts.ordering if query.default_ordering else [])
+        for item in order_by:
+            if not isinstance(item, str):
+                continue
+            name = item.lstrip('-')
+            try:
+                opts.get_field(name)
+            except FieldDoesNotExist:
+                # 注解（如 search_rank）或跨表排序，不属于本表的列
+                continue
+            columns.add(name)
+
+        if related:
+            keep = [name for name in related if any(column.startswith(f'{name}__') for column in columns)]
+            if len(keep) != len(related):
+                queryset = queryset.select_related(None)
+                if keep:
+                    queryset = queryset.select_related(*keep)
+            columns.update(keep)
+        return queryset.only(*columns)
+
+
+class SparseFieldsViewMixin:
+    """视图混入：GET 请求的 queryset 按序列化器输出的字段调用 only()"""
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.request.method != 'GET':
+            return queryset
+        serializer = self.get_serializer()
+        if isinstance(serializer, SparseFieldsetMixin):
+            queryset = serializer.optimize_queryset(queryset)
+        return queryset
@@ -0,0 +1,118 @@
+"""
+统计接口的缓存（cache-aside + stale-while-revalidate + 单飞重算）
+
+- 每个缓存项记录计算时依赖的版本号和"新鲜"截止时间：
+  - 未过软过期时间且版本号未变：直接返回（hit）
+  - 超过软过期时间或版本号已更新：只有拿到重算锁的一个请求重新计算（recompute），
+    其他并发请求继续返回旧值（stale），不会一起重算
+  - 超过硬过期时间（缓存项已被淘汰）或冷启动：没有旧值可用，拿不到锁的请求
+    短暂等待持锁的请求算完（wait），等待超时则自己计算
+- 重算锁用缓存后端的 add() 实现，使用 Redis/Memcached 等共享缓存时在所有进程之间互斥；
+  锁有过期时间，持锁的请求异常退出时会自动释放
+- 数据变化时更新版本号（见 ratemyprofessor.response_cache.bump_versions），
+  缓存项变为"过期"而不是被删除，写入之后的第一批请求同样不会一起重算
+- 每个统计项的 hit/stale/wait/recompute 次数保存在缓存中
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .response_cache import get_versions
+
+DEFAULT_STATS_CACHE_SETTINGS = {
+    'ENABLED': True,
+    'SOFT_TIMEOUT': 60,
+    'HARD_TIMEOUT': 60 * 30,
+    'LOCK_TIMEOUT': 30,
+    'WAIT_TIMEOUT': 2,
+}
+
+# 等待其他请求重算时轮询缓存的间隔（秒）
+WAIT_INTERVAL = 0.05
+
+STATS_CACHE_KEY = 'stats:{name}'
+STATS_LOCK_KEY = 'stats:lock:{name}'
+STATS_COUNTER_KEY = 'stats:counter:{name}:{outcome}'
+OUTCOMES = ('hit', 'stale', 'wait', 'recompute')
+
+
+def get_stats_cache_settings():
+    return {**DEFAULT_STATS_CACHE_SETTINGS, **getattr(settings, 'STATS_CACHE', {})}
+
+
+def record_stats_outcome(name, outcome):
+    """累加 hit/stale/wait/recompute 计数"""
+    key = STATS_COUNTER_KEY.format(name=name, outcome=outcome)
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def get_stats_cache_stats(names):
+    """各统计项的计数 {名称: {'hit', 'stale', 'wait', 'recompute'}}"""
+    keys = {
+        STATS_COUNTER_KEY.format(name=name, outcome=outcome): (name, outcome)
+        for name in names
+        for outcome in OUTCOMES
+    }
+    counts = cache.get_many(keys)
+    stats = {name: dict.fromkeys(OUTCOMES, 0) for name in names}
+    for key, count in counts.items():
+        name, outcome = keys[key]
+        stats[name][outcome] = count
+    return stats
+
+
+def _recompute(name, compute, versions, config):
+    value = compute()
+    entry = {
+        'value': value,
+        'versions': versions,
+        'fresh_until': time.time() + config['SOFT_TIMEOUT'],
+    }
+    cache.set(STATS_CACHE_KEY.format(name=name), entry, timeout=config['HARD_TIMEOUT'])
+    record_stats_outcome(name, 'recompute')
+    return value
+
+
+def cached_stats(name, compute, version_names=(), soft_timeout=None):
+    """读取统计项，必要时由一个请求调用 compute() 重新计算
+
+    version_names 为统计数据依赖的版本号名称；soft_timeout 覆盖默认的软过期时间（秒）
+    """
+    config = get_stats_cache_settings()
+    if soft_timeout is not None:
+        config['SOFT_TIMEOUT'] = soft_timeout
+    if not config['ENABLED']:
+        return compute()
+
+    versions = get_versions(version_names) if version_names else {}
+    key = STATS_CACHE_KEY.format(name=name)
+    entry = cache.get(key)
+    if entry is not None and entry['versions'] == versions and time.time() < entry['fresh_until']:
+        record_stats_outcome(name, 'hit')
+        return entry['value']
+
+    lock_key = STATS_LOCK_KEY.format(name=name)
+    if cache.add(lock_key, 1, timeout=config['LOCK_TIMEOUT']):
+        try:
+            return _recompute(name, compute, versions, config)
+        finally:
+            cache.delete(lock_key)
+
+    if entry is not None:
+        record_stats_outcome(name, 'stale')
+        return entry['value']
+
+    # 没有旧值可用：等待持锁的请求写入结果
+    deadline = time.monotonic() + config['WAIT_TIMEOUT']
+    while time.monotonic() < deadline:
+        time.sleep(WAIT_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            record_stats_outcome(name, 'wait')
+            return entry['value']
+    return _recompute(name, compute, versions, config)
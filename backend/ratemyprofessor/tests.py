@@ -0,0 +1,332 @@
+import threading
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from reviews.models import Review
+from teachers.models import Teacher
+
+from .batch import BATCH_MAX_SIZE
+from .fastpath import FastListPlan
+from .home import HOME_TOP_TEACHERS
+from .query_budgets import QueryBudgetTestMixin
+from .response_cache import bump_versions
+from .stats_cache import STATS_LOCK_KEY, cached_stats, get_stats_cache_stats
+
+RATINGS = [Decimal('4.50'), Decimal('3.00'), Decimal('0.00')]
+
+
+class HomeQueryBudgetTests(QueryBudgetTestMixin, TransactionTestCase):
+    """首页汇总接口在缓存为空时的查询数不超过声明的预算"""
+    scenarios = [
+        ('home', 'GET', {}, None, None, 200),
+    ]
+
+
+class BatchRetrieveTests(TestCase):
+    """?ids= 批量读取：按请求顺序返回、列出不存在的主键、格式错误或超出上限返回 400"""
+
+    def setUp(self):
+        cache.clear()
+        self.teachers = [Teacher.objects.create(name=f'教师{index}') for index in range(3)]
+        self.reviews = [
+            Review.objects.create(
+                teacher=self.teachers[0], reviewer_name='同学', overall_rating=4, difficulty_rating=3,
+                would_take_again=True, title=f'评价{index}', content='内容',
+            )
+            for index in range(3)
+        ]
+
+    def batch(self, name, ids, **params):
+        return self.client.get(reverse(name), {'ids': ids, **params})
+
+    def test_results_follow_requested_order(self):
+        for name, objects in (('teacher-batch', self.teachers), ('review-batch', self.reviews)):
+            with self.subTest(name=name):
+                first, second, third = (obj.pk for obj in objects)
+                response = self.batch(name, f'{third}, {first},{third},,{second}')
+                self.assertEqual(response.status_code, 200)
+                data = response.json()
+                self.assertEqual([item['id'] for item in data['results']], [third, first, second])
+                self.assertEqual(data['missing'], [])
+
+    def test_missing_ids_are_reported(self):
+        first = self.teachers[0].pk
+        data = self.batch('teacher-batch', f'999999,{first},0').json()
+        self.assertEqual([item['id'] for item in data['results']], [first])
+        self.assertEqual(data['missing'], [999999, 0])
+
+    def test_sparse_fields(self):
+        data = self.batch('review-batch', str(self.reviews[0].pk), fields='id,title').json()
+        self.assertEqual(data['results'], [{'id': self.reviews[0].pk, 'title': '评价0'}])
+
+    def test_invalid_ids(self):
+        too_many = ','.join(str(pk) for pk in range(1, BATCH_MAX_SIZE + 2))
+        for ids in ['', ' , ', 'abc', '1,x', '-1', '1.5', too_many]:
+            for name in ('teacher-batch', 'review-batch'):
+                with self.subTest(name=name, ids=ids[:20]):
+                    response = self.batch(name, ids)
+                    self.assertEqual(response.status_code, 400)
+                    self.assertIn('ids', response.json())
+
+    def test_max_size_counts_distinct_ids(self):
+        ids = ','.join(str(pk) for pk in range(1, BATCH_MAX_SIZE + 1)) + ',1'
+        self.assertEqual(self.batch('teacher-batch', ids).status_code, 200)
+
+class HomeBundleTests(TestCase):
+    """首页汇总与各统计/列表接口的结果一致，教师或评价写入后重新生成"""
+
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.teachers = [
+                Teacher.objects.create(
+                    name=f'教师{index}', department=department, subjects='数据库',
+                    image='teacher_photos/a.png' if index % 2 else None,
+                )
+                for index, department in enumerate(['计算机与软件工程', '数学'] * 5)
+            ]
+            for index, teacher in enumerate(self.teachers):
+                for rating in range(1, index % 5 + 2):
+                    Review.objects.create(
+                        teacher=teacher, reviewer_name='同学', overall_rating=rating,
+                        difficulty_rating=3, would_take_again=True, title='标题', content='内容',
+                        course='SE', semester='FALL_2024', tags='认真负责',
+                    )
+        # 评分各不相同，评分最高的教师顺序确定
+        for index, teacher in enumerate(self.teachers):
+            Teacher.objects.filter(pk=teacher.pk).update(average_rating=Decimal('4.90') - index / Decimal(10))
+
+    def get(self, name, **params):
+        response = self.client.get(reverse(name), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_bundle_matches_individual_endpoints(self):
+        bundle = self.get('home')
+        review_stats = self.get('review-stats')
+        self.assertEqual(bundle['teacher_stats'], self.get('teacher-stats'))
+        self.assertEqual(bundle['recent_reviews'], review_stats.pop('recent_reviews'))
+        self.assertEqual(bundle['review_stats'], review_stats)
+        top = self.get('teacher-list', ordering='-average_rating')['results'][:HOME_TOP_TEACHERS]
+        self.assertEqual(bundle['top_teachers'], top)
+        self.assertTrue(any((teacher['image'] or '').startswith('http://testserver/') for teacher in top))
+
+    def test_review_write_invalidates_bundle(self):
+        before = self.get('home')
+        with self.captureOnCommitCallbacks(execute=True):
+            review = Review.objects.create(
+                teacher=self.teachers[1], reviewer_name='新同学', overall_rating=5, difficulty_rating=1,
+                would_take_again=True, title='新评价', content='内容', course='SE', semester='FALL_2024',
+            )
+        after = self.get('home')
+        self.assertEqual(after['review_stats']['total_reviews'], before['review_stats']['total_reviews'] + 1)
+        self.assertEqual(after['recent_reviews'][0]['id'], review.pk)
+
+    def test_teacher_write_invalidates_bundle(self):
+        before = self.get('home')
+        self.assertEqual(before['top_teachers'][0]['name'], '教师0')
+        with self.captureOnCommitCallbacks(execute=True):
+            teacher = Teacher.objects.get(pk=self.teachers[0].pk)
+            teacher.name = '改名教师'
+            teacher.save()
+        self.assertEqual(self.get('home')['top_teachers'][0]['name'], '改名教师')
+
+class KeysetPaginationTests(TestCase):
+    """?cursor= 游标分页：与页码分页结果一致、排序值相同时不重复不遗漏、插入新数据不影响后续页"""
+
+    def setUp(self):
+        cache.clear()
+        # 每 15 位教师评分相同，游标必须靠 id 区分排序值相同的行
+        Teacher.objects.bulk_create([
+            Teacher(name=f'教师{index}', average_rating=RATINGS[index % len(RATINGS)])
+            for index in range(45)
+        ])
+
+    def get(self, url, params=None):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def walk_cursor(self, params):
+        ids = []
+        data = self.get(reverse('teacher-list'), {**params, 'cursor': ''})
+        while True:
+            ids.extend(teacher['id'] for teacher in data['results'])
+            if data['next'] is None:
+                return ids
+            data = self.get(data['next'])
+
+    def walk_pages(self, params):
+        ids = []
+        page = 1
+        while True:
+            data = self.get(reverse('teacher-list'), {**params, 'page': page})
+            ids.extend(teacher['id'] for teacher in data['results'])
+            if data['next'] is None:
+                return ids
+            page += 1
+
+    def test_cursor_matches_offset_pagination(self):
+        for ordering in ['', '-average_rating', 'average_rating', 'name', '-total_reviews']:
+            with self.subTest(ordering=ordering):
+                params = {'ordering': ordering} if ordering else {}
+                cursor_ids = self.walk_cursor(params)
+                self.assertEqual(len(cursor_ids), len(set(cursor_ids)))
+                self.assertEqual(set(cursor_ids), set(self.walk_pages(params)))
+                self.assertEqual(len(cursor_ids), 45)
+
+    def test_ties_ordered_by_id(self):
+        expected = list(
+            Teacher.objects.order_by('-average_rating', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(self.walk_cursor({}), expected)
+
+    def test_invalid_cursor(self):
+        for cursor in ['not-base64!', 'W10=', 'WzEsMiwzXQ==', 'WyJ4IiwxXQ==', 'eyJhIjoxfQ==']:
+            with self.subTest(cursor=cursor):
+                response = self.client.get(reverse('teacher-list'), {'cursor': cursor})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('cursor', response.json())
+
+    def test_inserted_rows_do_not_shift_later_pages(self):
+        first = self.get(reverse('teacher-list'), {'cursor': ''})
+        expected = self.get(first['next'])
+        # 在第一页之前和排序值相同的位置插入新教师
+        Teacher.objects.create(name='新教师甲', average_rating=Decimal('5.00'))
+        Teacher.objects.create(name='新教师乙', average_rating=RATINGS[0])
+        cache.clear()
+        self.assertEqual(self.get(first['next'])['results'], expected['results'])
+
+
+class FastListSerializationTests(TestCase):
+    """列表快速序列化路径与 DRF 序列化器输出逐字节相同"""
+
+    def setUp(self):
+        # 未评价的教师（评分为 0）、无科目、无头像
+        self.empty = Teacher.objects.create(name='新教师', subjects='')
+        self.teacher = Teacher.objects.create(
+            name='张老师', subjects='Java, 数据库,,Java', image='teacher_photos/zhang.png'
+        )
+        # 需要格式化的 Decimal（位数不足、舍入后的值、三位整数）
+        Teacher.objects.filter(pk=self.teacher.pk).update(
+            average_rating=Decimal('4.5'), difficulty_rating=Decimal('3.33'),
+            would_take_again=Decimal('100.00'), total_reviews=3,
+        )
+        base = {
+            'overall_rating': 5, 'difficulty_rating': 2, 'would_take_again': False,
+            'title': '标题', 'content': '内容' * 200,
+        }
+        Review.objects.create(
+            teacher=self.teacher, reviewer_name='同学甲', course='SE', semester='FALL_2024',
+            tags=' 认真负责, ,Easy,认真负责 ', pros='', cons='无', **base
+        )
+        Review.objects.create(teacher=self.teacher, reviewer_name='', tags='', **base)
+        legacy = Review.objects.create(teacher=self.empty, reviewer_name='同学乙', **base)
+        # 已不在选项中的旧课程代码：显示名称退回原值
+        Review.objects.filter(pk=legacy.pk).update(course='LEGACY')
+
+    def render(self, url, params, fast):
+        cache.clear()
+        build = mock.patch.object(FastListPlan, 'build', autospec=True, side_effect=FastListPlan.build)
+        with override_settings(FAST_LIST_SERIALIZATION=fast), build as built:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        # 确认开启时确实走了快速路径（没有退回普通序列化器）
+        self.assertEqual(built.called, fast)
+        return response.content
+
+    def test_responses_are_identical(self):
+        cases = [
+            ('teacher-list', {}),
+            ('teacher-list', {'ordering': 'name'}),
+            ('teacher-list', {'fields': 'id,average_rating,subjects_list'}),
+            ('review-list', {}),
+            ('review-list', {'preview': '1'}),
+            ('review-list', {'omit': 'content', 'ordering': 'overall_rating'}),
+            ('review-manage-list', {}),
+        ]
+        for name, params in cases:
+            with self.subTest(name=name, **params):
+                url = reverse(name)
+                fast = self.render(url, params, True)
+                self.assertEqual(fast, self.render(url, params, False))
+                self.assertIn(b'"results"', fast)
+
+
+@override_settings(STATS_CACHE={'ENABLED': True, 'SOFT_TIMEOUT': 60, 'WAIT_TIMEOUT': 5})
+class StatsCacheTests(TestCase):
+    """统计缓存：并发未命中只计算一次、过期时返回旧值由一个请求重算、版本号更新后重算"""
+    name = 'tests:stats'
+
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        return self.calls
+
+    def outcomes(self):
+        return get_stats_cache_stats([self.name])[self.name]
+
+    def test_concurrent_misses_compute_once(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_compute():
+            started.set()
+            release.wait(5)
+            return self.compute()
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cached_stats(self.name, slow_compute)))]
+        threads[0].start()
+        self.assertTrue(started.wait(5))
+        # 持锁的请求正在计算，其余请求没有旧值可用，等待它写入结果
+        threads += [
+            threading.Thread(target=lambda: results.append(cached_stats(self.name, slow_compute)))
+            for _ in range(4)
+        ]
+        for thread in threads[1:]:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join(10)
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(results, [1] * 5)
+        self.assertEqual(self.outcomes()['recompute'], 1)
+        self.assertEqual(self.outcomes()['wait'], 4)
+
+    def test_expired_entry_served_stale_while_recomputing(self):
+        self.assertEqual(cached_stats(self.name, self.compute, soft_timeout=0), 1)
+        # 其他请求持有重算锁：本请求返回旧值，不重复计算
+        cache.add(STATS_LOCK_KEY.format(name=self.name), 1)
+        self.assertEqual(cached_stats(self.name, self.compute), 1)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.outcomes()['stale'], 1)
+
+        cache.delete(STATS_LOCK_KEY.format(name=self.name))
+        self.assertEqual(cached_stats(self.name, self.compute), 2)
+        self.assertEqual(cached_stats(self.name, self.compute), 2)
+        self.assertEqual(self.outcomes(), {'hit': 1, 'stale': 1, 'wait': 0, 'recompute': 2})
+
+    def bump(self, names):
+        # 版本号在事务提交后更新
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_versions(names)
+
+    def test_version_bump_forces_recompute(self):
+        versions = ['tests:version']
+        self.assertEqual(cached_stats(self.name, self.compute, versions), 1)
+        self.assertEqual(cached_stats(self.name, self.compute, versions), 1)
+        self.bump(versions)
+        self.assertEqual(cached_stats(self.name, self.compute, versions), 2)
+        # 不依赖该版本号的统计项不受影响
+        self.assertEqual(cached_stats('tests:other', self.compute), 3)
+        self.bump(versions)
+        self.assertEqual(cached_stats('tests:other', self.compute), 3)
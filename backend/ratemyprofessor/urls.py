@@ -6,9 +6,12 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from .home import home
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/teachers/', include('teachers.urls')),
     path('api/reviews/', include('reviews.urls')),
     path('api/auth/', include('authentication.urls')),
+    path('api/home/', home, name='home'),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Review, ReviewHelpful
+from .models import Review, ReviewHelpful, ReviewTag
 
 
 @admin.register(Review)
@@ -40,3 +40,9 @@ class ReviewHelpfulAdmin(admin.ModelAdmin):
     list_display = ['review', 'ip_address', 'created_at']
     list_filter = ['created_at']
     search_fields = ['review__title', 'ip_address']
+
+
+@admin.register(ReviewTag)
+class ReviewTagAdmin(admin.ModelAdmin):
+    list_display = ['name']
+    search_fields = ['name']
@@ -5,3 +5,6 @@ class ReviewsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'reviews'
     verbose_name = '评价管理'
+
+    def ready(self):
+        from . import signals  # noqa: F401
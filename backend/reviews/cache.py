@@ -0,0 +1,62 @@
+"""
+评价列表的版本号（用于条件请求的 ETag / Last-Modified，以及评价统计缓存的过期）
+
+评价新增/修改/删除、"有用"票数变化或教师姓名变化时（事务提交后）更新；
+缓存中的版本号只在写入的进程中更新，因此同时在数据库中维护版本号（评价列表变更次数、
+教师的评价版本号），条件请求和响应缓存按主键读取它作为指纹，不再对整张评价表做聚合
+"""
+from django.db import transaction
+from django.db.models import F
+
+from ratemyprofessor.response_cache import bump_versions
+from teachers.models import Teacher
+
+REVIEW_LIST_VERSION = 'reviews:list'
+# 评价统计在统计缓存中的名称（见 ratemyprofessor.stats_cache）
+REVIEW_STATS = 'reviews:stats'
+
+
+def _pending_versions(connection):
+    """获取当前事务中需要更新数据库版本号的教师，必要时注册提交回调"""
+    pending = getattr(connection, '_pending_review_versions', None)
+    # 回调已被回滚丢弃或已经执行过，说明这是一个新的事务
+    if pending is None or not any(
+        func is pending['flush'] for _, func, _ in connection.run_on_commit
+    ):
+        pending = {'teachers': set()}
+
+        def flush():
+            connection._pending_review_versions = None
+            bump_database_versions(pending['teachers'])
+
+        pending['flush'] = flush
+        connection._pending_review_versions = pending
+        transaction.on_commit(flush, using=connection.alias)
+    return pending
+
+
+def bump_database_versions(teacher_ids):
+    """评价列表变更次数加一，这些教师的评价版本号加一"""
+    from .models import ReviewCounter
+    ReviewCounter.bump_list_version()
+    if teacher_ids:
+        Teacher.objects.filter(pk__in=teacher_ids).update(review_version=F('review_version') + 1)
+
+
+def invalidate_review_cache(teacher_ids=(), using=None):
+    """更新评价列表版本号和数据库版本号（teacher_ids 为评价发生变化的教师）
+
+    事务中多次调用只在提交时更新一次数据库版本号
+    """
+    bump_versions([REVIEW_LIST_VERSION])
+    connection = transaction.get_connection(using)
+    if not connection.in_atomic_block:
+        bump_database_versions(set(teacher_ids))
+        return
+    _pending_versions(connection)['teachers'].update(teacher_ids)
+
+
+def review_list_fingerprint():
+    """评价列表的数据库指纹：评价列表变更次数（按主键读取一行）"""
+    from .models import ReviewCounter
+    return (ReviewCounter.list_version(),)
@@ -0,0 +1,312 @@
+"""
+"有用"投票的写回缓冲（write-behind）
+
+开启后 mark_helpful 不再每票都写数据库，而是先把 (评价ID, IP) 放入缓冲，
+达到数量阈值或时间间隔后批量写入 ReviewHelpful 并一次性累加 helpful_count
+
+缓冲后端：
+- memory：进程内缓冲，速度最快，进程异常退出会丢失未写回的投票
+- sqlite：本地 SQLite 文件，多个 worker 进程共享，进程重启不会丢失
+
+写回时会跳过数据库中已存在的 (评价, IP)，因此重复写回同一批投票不会重复计数
+"""
+import atexit
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing
+
+from django.conf import settings
+from django.db import close_old_connections, models, transaction
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUFFER_SETTINGS = {
+    'ENABLED': False,
+    'BACKEND': 'memory',
+    'PATH': 'helpful_votes_spool.sqlite3',
+    'FLUSH_INTERVAL': 5,
+    'FLUSH_SIZE': 100,
+}
+
+
+def get_buffer_settings():
+    return {**DEFAULT_BUFFER_SETTINGS, **getattr(settings, 'HELPFUL_VOTE_BUFFER', {})}
+
+
+class MemoryVoteBuffer:
+    """进程内投票缓冲"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._votes = {}  # (review_id, ip_address) -> None，保持插入顺序
+        self._counts = {}  # review_id -> 缓冲中的票数
+
+    def add(self, review_id, ip_address):
+        """加入一票，已在缓冲中则返回 False"""
+        key = (int(review_id), ip_address)
+        with self._lock:
+            if key in self._votes:
+                return False
+            self._votes[key] = None
+            self._counts[key[0]] = self._counts.get(key[0], 0) + 1
+            return True
+
+    def pending_count(self, review_id):
+        with self._lock:
+            return self._counts.get(int(review_id), 0)
+
+    def take(self, limit=None):
+        """取出一批投票，返回 (批次标识, 投票列表)"""
+        with self._lock:
+            keys = list(self._votes)[:limit] if limit else list(self._votes)
+            for key in keys:
+                del self._votes[key]
+                self._counts[key[0]] -= 1
+                if not self._counts[key[0]]:
+                    del self._counts[key[0]]
+        return keys, keys
+
+    def ack(self, token):
+        """确认一批投票已写回"""
+
+    def release(self, token):
+        """写回失败，把投票放回缓冲"""
+        with self._lock:
+            for key in token:
+                if key not in self._votes:
+                    self._votes[key] = None
+                    self._counts[key[0]] = self._counts.get(key[0], 0) + 1
+
+    def __len__(self):
+        with self._lock:
+            return len(self._votes)
+
+
+class SQLiteVoteBuffer:
+    """基于 SQLite 文件的投票缓冲，可在多个 worker 进程之间共享"""
+
+    # 认领后超过该时间仍未确认（worker 崩溃），允许其他 worker 重新认领
+    CLAIM_TIMEOUT = 60
+
+    def __init__(self, path):
+        self.path = str(path)
+        with closing(self._connect()) as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS helpful_votes ('
+                ' review_id INTEGER NOT NULL,'
+                ' ip_address TEXT NOT NULL,'
+                ' claimed_by TEXT,'
+                ' claimed_at REAL,'
+                ' PRIMARY KEY (review_id, ip_address))'
+            )
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    def add(self, review_id, ip_address):
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                'INSERT OR IGNORE INTO helpful_votes (review_id, ip_address) VALUES (?, ?)',
+                (int(review_id), ip_address),
+            )
+            return cursor.rowcount == 1
+
+    def pending_count(self, review_id):
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                'SELECT COUNT(*) FROM helpful_votes WHERE review_id = ?', (int(review_id),)
+            ).fetchone()[0]
+
+    def take(self, limit=None):
+        token = uuid.uuid4().hex
+        now = time.time()
+        conn = self._connect()
+        try:
+            # BEGIN IMMEDIATE 保证同一时刻只有一个 worker 在认领
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute(
+                'UPDATE helpful_votes SET claimed_by = ?, claimed_at = ?'
+                ' WHERE rowid IN (SELECT rowid FROM helpful_votes'
+                '  WHERE claimed_by IS NULL OR claimed_at < ? ORDER BY rowid LIMIT ?)',
+                (token, now, now - self.CLAIM_TIMEOUT, limit or -1),
+            )
+            votes = conn.execute(
+                'SELECT review_id, ip_address FROM helpful_votes WHERE claimed_by = ?', (token,)
+            ).fetchall()
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+        return token, [tuple(vote) for vote in votes]
+
+    def ack(self, token):
+        with closing(self._connect()) as conn:
+            conn.execute('DELETE FROM helpful_votes WHERE claimed_by = ?', (token,))
+
+    def release(self, token):
+        with closing(self._connect()) as conn:
+            conn.execute(
+                'UPDATE helpful_votes SET claimed_by = NULL, claimed_at = NULL WHERE claimed_by = ?',
+                (token,),
+            )
+
+    def __len__(self):
+        with closing(self._connect()) as conn:
+            return conn.execute('SELECT COUNT(*) FROM helpful_votes').fetchone()[0]
+
+
+def write_votes(votes):
+    """把一批投票写入数据库，返回实际新增的票数
+
+    已存在的 (评价, IP) 和已删除的评价会被跳过，所以同一批投票重复写回不会重复计数
+    """
+    from teachers.cache import invalidate_teacher_cache
+
+    from .cache import invalidate_review_cache
+    from .models import Review, ReviewHelpful
+    from .recent import invalidate_recent_reviews
+
+    votes = set(votes)
+    if not votes:
+        return 0
+    review_ids = {review_id for review_id, _ in votes}
+    with transaction.atomic():
+        live_reviews = dict(
+            Review.objects.filter(pk__in=review_ids).values_list('pk', 'teacher_id')
+        )
+        existing = set(
+            ReviewHelpful.objects.filter(review_id__in=review_ids)
+            .filter(ip_address__in={ip for _, ip in votes})
+            .values_list('review_id', 'ip_address')
+        )
+        new_votes = sorted(
+            (review_id, ip) for review_id, ip in votes
+            if review_id in live_reviews and (review_id, ip) not in existing
+        )
+        ReviewHelpful.objects.bulk_create(
+            [ReviewHelpful(review_id=review_id, ip_address=ip) for review_id, ip in new_votes]
+        )
+
+        per_review = {}
+        for review_id, _ in new_votes:
+            per_review[review_id] = per_review.get(review_id, 0) + 1
+        for review_id, count in per_review.items():
+            Review.objects.filter(pk=review_id).update(
+                helpful_count=models.F('helpful_count') + count
+            )
+        teacher_ids = {live_reviews[review_id] for review_id in per_review}
+        invalidate_recent_reviews(teacher_ids)
+        invalidate_teacher_cache(teacher_ids, include_list=False)
+        if teacher_ids:
+            invalidate_review_cache(teacher_ids)
+    return len(new_votes)
+
+
+def flush(buffer, batch_size=None):
+    """写回缓冲中的投票直到取空，返回新增的票数"""
+    batch_size = batch_size or get_buffer_settings()['FLUSH_SIZE'] * 10
+    written = 0
+    while True:
+        token, votes = buffer.take(batch_size)
+        if not votes:
+            buffer.ack(token)
+            return written
+        try:
+            written += write_votes(votes)
+        except Exception:
+            buffer.release(token)
+            raise
+        buffer.ack(token)
+
+
+class VoteBufferService:
+    """缓冲 + 自动写回（数量阈值、定时器和进程退出时）"""
+
+    def __init__(self, buffer, flush_interval, flush_size):
+        self.buffer = buffer
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self._flush_lock = threading.Lock()
+        self._timer = None
+        self._timer_lock = threading.Lock()
+
+    def add(self, review_id, ip_address):
+        added = self.buffer.add(review_id, ip_address)
+        if added:
+            if len(self.buffer) >= self.flush_size:
+                self.flush()
+            else:
+                self._schedule_flush()
+        return added
+
+    def pending_count(self, review_id):
+        return self.buffer.pending_count(review_id)
+
+    def flush(self):
+        # 同一进程内只允许一个写回在执行
+        if not self._flush_lock.acquire(blocking=False):
+            return 0
+        try:
+            return flush(self.buffer, self.flush_size)
+        finally:
+            self._flush_lock.release()
+
+    def _schedule_flush(self):
+        with self._timer_lock:
+            if self._timer is not None:
+                return
+            self._timer = threading.Timer(self.flush_interval, self._timer_flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _timer_flush(self):
+        with self._timer_lock:
+            self._timer = None
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('写回有用投票失败')
+        finally:
+            close_old_connections()
+        if len(self.buffer):
+            self._schedule_flush()
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def create_buffer(options=None):
+    options = options or get_buffer_settings()
+    if options['BACKEND'] == 'sqlite':
+        return SQLiteVoteBuffer(options['PATH'])
+    return MemoryVoteBuffer()
+
+
+def get_vote_buffer():
+    """获取当前进程的投票缓冲服务，未开启时返回 None"""
+    global _service
+    options = get_buffer_settings()
+    if not options['ENABLED']:
+        return None
+    with _service_lock:
+        if _service is None:
+            _service = VoteBufferService(
+                create_buffer(options), options['FLUSH_INTERVAL'], options['FLUSH_SIZE']
+            )
+            atexit.register(_flush_at_exit, _service)
+        return _service
+
+
+def _flush_at_exit(service):
+    try:
+        service.flush()
+    except Exception:
+        logger.exception('进程退出时写回有用投票失败')
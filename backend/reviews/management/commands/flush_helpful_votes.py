@@ -0,0 +1,31 @@
+"""
+把写回缓冲中尚未写入数据库的"有用"投票全部写回
+部署/停机前执行，确保缓冲中的投票不会丢失
+"""
+from django.core.management.base import BaseCommand
+
+from reviews.helpful_buffer import create_buffer, flush, get_buffer_settings
+
+
+class Command(BaseCommand):
+    help = '写回缓冲中的有用投票'
+
+    def handle(self, *args, **options):
+        buffer_settings = get_buffer_settings()
+        if buffer_settings['BACKEND'] != 'sqlite':
+            self.stdout.write(
+                self.style.WARNING(
+                    '⚠️  当前使用进程内缓冲(memory)，只能由各 worker 进程在退出时自行写回'
+                )
+            )
+            return
+
+        buffer = create_buffer(buffer_settings)
+        pending = len(buffer)
+        self.stdout.write(f'📥 缓冲中待写回的投票: {pending}')
+
+        written = flush(buffer)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ 写回完成，新增 {written} 票（跳过 {pending - written} 条重复或失效投票）')
+        )
@@ -0,0 +1,299 @@
+"""
+生成压测用的模拟数据：教师、评价、标签、"有用"投票和用户
+
+- 同一个 --seed 生成的数据完全相同，便于对比不同版本的基准测试结果
+- 分批 bulk_create 写入（不触发 save()/信号），全部写完后统一重建教师统计、
+  标签统计、评价计数和搜索索引
+- 主键由命令分配，MySQL 下 bulk_create 不返回主键也能写入关联表
+"""
+import random
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, models, transaction
+
+from authentication.models import UserProfile
+from reviews import search as review_search
+from reviews.models import (
+    Review, ReviewCounter, ReviewHelpful, ReviewSearchTerm, ReviewTag, TeacherTagCount,
+)
+from teachers import search as teacher_search
+from teachers.models import Subject, Teacher, TeacherSubject, normalize_subject
+from teachers.stats import invalidate_department_rollup
+
+# 生成的教师和用户使用固定前缀，--clear 只删除这些数据
+TEACHER_PREFIX = '压测'
+USERNAME_PREFIX = 'loadtest_'
+USER_PASSWORD = 'loadtest-password'
+
+# 评价时间分布在该日期之前的两年内（固定日期保证结果可复现）
+BASE_TIME = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+TIME_SPAN_SECONDS = 2 * 365 * 24 * 3600
+
+SURNAMES = '王李张刘陈杨黄赵吴周徐孙马朱胡郭何高林罗郑梁谢宋唐许韩冯邓曹彭曾肖田董袁潘于蒋蔡余杜叶程苏魏吕丁任沈姚卢姜崔钟谭陆汪范金石廖贾夏韦付方白邹孟熊秦邱江尹薛闫段雷侯龙史陶黎贺顾毛郝龚邵万钱严覃武戴莫孔向汤'
+GIVEN_NAMES = '伟芳娜敏静丽强磊军洋勇艳杰娟涛明超秀霞平刚桂英华玉兰萍红建文辉力宇鹏飞志军晨阳博凯'
+DEPARTMENTS = [
+    ('计算机与软件工程', 6), ('数学', 2), ('物理', 1), ('外国语', 2), ('管理科学', 1),
+]
+SUBJECT_POOL = [
+    '软件工程', '数据库', '操作系统', '计算机网络', '数据结构', '算法设计', '编译原理',
+    '人工智能', '机器学习', '面向对象程序设计', '软件测试', '人机交互', '高等数学',
+    '线性代数', '概率论', '大学英语', '学术写作', '项目管理', 'Web开发', 'Java程序设计',
+]
+TAG_POOL = [
+    ('认真负责', 10), ('讲解清楚', 9), ('作业适中', 6), ('给分好', 7), ('有趣', 5),
+    ('严格', 4), ('作业多', 4), ('考试难', 3), ('点名', 3), ('干货多', 5),
+    ('耐心', 6), ('幽默', 4), ('PPT清晰', 3), ('课堂互动多', 3), ('节奏快', 2),
+    ('重视实践', 3), ('答疑及时', 4), ('要求高', 2), ('轻松', 3), ('推荐', 6),
+]
+TITLES = [
+    '非常推荐的老师', '讲课很清楚', '收获很大', '一般般', '作业有点多', '考试偏难',
+    '认真负责的好老师', '上课很有意思', '要求比较严格', '给分很公道', '不太推荐',
+]
+SENTENCES = [
+    '老师讲课思路清晰，重点突出。', '课堂氛围很好，经常和同学互动。', '作业量适中，能巩固课堂内容。',
+    '考试内容和平时讲的比较贴近。', '课程项目很有挑战性，但是收获很大。', '老师对学生的问题回复很及时。',
+    '课件做得很用心，复习的时候很有帮助。', '上课节奏有点快，需要课后多花时间。',
+    '平时分占比较高，要认真完成作业。', 'The lectures are well organized and easy to follow.',
+    'Assignments are practical and closely related to real projects.',
+]
+PROS = ['讲解清楚', '耐心答疑', '课件详细', '案例丰富', '给分公道', '课堂有趣']
+CONS = ['作业偏多', '考试偏难', '节奏较快', '点名较多', '要求严格', '']
+
+# 评分分布：偏向高分；难度以 3 为中心
+RATING_WEIGHTS = [5, 8, 17, 35, 35]
+DIFFICULTY_WEIGHTS = [8, 22, 38, 22, 10]
+
+
+@contextmanager
+def explicit_timestamps(*model_fields):
+    """临时关闭 auto_now/auto_now_add，使 bulk_create 使用生成的时间"""
+    saved = []
+    for model, name in model_fields:
+        field = model._meta.get_field(name)
+        saved.append((field, field.auto_now, field.auto_now_add))
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = '生成压测用的模拟教师、评价、标签、有用投票和用户（可通过 --seed 复现）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--teachers', type=int, default=500, help='教师数量')
+        parser.add_argument('--reviews', type=int, default=50000, help='评价数量')
+        parser.add_argument('--users', type=int, default=200, help='用户数量')
+        parser.add_argument('--seed', type=int, default=42, help='随机种子，相同种子生成相同数据')
+        parser.add_argument('--batch-size', type=int, default=5000, help='每批写入的行数')
+        parser.add_argument(
+            '--with-review-index',
+            action='store_true',
+            help='同时重建评价搜索索引（每条评价约几十个词项，数据量大时较慢）'
+        )
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='先删除之前生成的压测数据（按教师姓名和用户名前缀识别）'
+        )
+
+    def handle(self, *args, **options):
+        if options['teachers'] < 1 and options['reviews'] > 0:
+            raise CommandError('生成评价至少需要 1 位教师')
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+
+        self.stdout.write(f'🧪 生成压测数据（seed={options["seed"]}）')
+        self.stdout.write('━' * 60)
+
+        if options['clear']:
+            self._clear()
+
+        usernames = self._create_users(options['users'])
+        teacher_ids = self._create_teachers(options['teachers'])
+        self._create_reviews(options['reviews'], teacher_ids, usernames)
+        self._reset_sequences()
+        self._rebuild(teacher_ids, options['with_review_index'])
+
+        self.stdout.write('\n' + '━' * 60)
+        self.stdout.write(self.style.SUCCESS('✅ 压测数据生成完成'))
+
+    def _clear(self):
+        teachers = Teacher.objects.filter(name__startswith=TEACHER_PREFIX)
+        reviews = Review.objects.filter(teacher__in=teachers)
+        count = teachers.count()
+        with transaction.atomic():
+            # 评价数量可能很大：先删除关联表，再直接删除评价（不逐条触发信号），统计最后统一重建
+            ReviewHelpful.objects.filter(review__in=reviews).delete()
+            Review.tag_items.through.objects.filter(review__in=reviews).delete()
+            ReviewSearchTerm.objects.filter(review__in=reviews).delete()
+            reviews._raw_delete(connection.alias)
+            teachers.delete()
+        User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+        ReviewCounter.rebuild()
+        invalidate_department_rollup()
+        self.stdout.write(f'   🗑️  删除了 {count} 位压测教师及其评价')
+
+    def _next_id(self, model):
+        return (model.objects.aggregate(max_id=models.Max('pk'))['max_id'] or 0) + 1
+
+    def _bulk_insert(self, model, objects):
+        with transaction.atomic():
+            model.objects.bulk_create(objects, batch_size=self.batch_size)
+
+    def _create_users(self, count):
+        """批量创建用户（共用同一个密码哈希）和用户资料"""
+        password = make_password(USER_PASSWORD)
+        start = self._next_id(User)
+        users = [
+            User(
+                pk=start + index,
+                username=f'{USERNAME_PREFIX}{start + index}',
+                password=password,
+                first_name=self.rng.choice(GIVEN_NAMES) + self.rng.choice(GIVEN_NAMES),
+                last_name=self.rng.choice(SURNAMES),
+            )
+            for index in range(count)
+        ]
+        self._bulk_insert(User, users)
+        self._bulk_insert(UserProfile, [
+            UserProfile(user_id=user.pk, student_id=f'2023{index:06d}')
+            for index, user in enumerate(users)
+        ])
+        self.stdout.write(f'   👤 用户: {count}')
+        return [user.last_name + user.first_name for user in users]
+
+    def _create_teachers(self, count):
+        """批量创建教师和科目关联"""
+        departments, department_weights = zip(*DEPARTMENTS)
+        subject_ids = self._get_or_create(Subject, [normalize_subject(name) for name in SUBJECT_POOL])
+        subjects = dict(zip(SUBJECT_POOL, subject_ids))
+        start = self._next_id(Teacher)
+
+        teachers = []
+        links = []
+        for index in range(count):
+            teacher_id = start + index
+            names = self.rng.sample(SUBJECT_POOL, self.rng.randint(1, 4))
+            teachers.append(Teacher(
+                pk=teacher_id,
+                name=f'{TEACHER_PREFIX}{self.rng.choice(SURNAMES)}{self.rng.choice(GIVEN_NAMES)}{index}',
+                department=self.rng.choices(departments, department_weights)[0],
+                subjects=','.join(names),
+                bio=f'主讲{"、".join(names)}等课程。' + self.rng.choice(SENTENCES),
+            ))
+            links.extend(
+                TeacherSubject(teacher_id=teacher_id, subject_id=subjects[name], position=position)
+                for position, name in enumerate(names)
+            )
+        self._bulk_insert(Teacher, teachers)
+        self._bulk_insert(TeacherSubject, links)
+        self.stdout.write(f'   👨‍🏫 教师: {count}（科目关联 {len(links)}）')
+        return [teacher.pk for teacher in teachers]
+
+    def _create_reviews(self, count, teacher_ids, usernames):
+        """分批创建评价、标签关联和有用投票"""
+        if not count:
+            return
+        rng = self.rng
+        # 教师热度近似 Zipf 分布：少数教师拥有大部分评价
+        teacher_weights = list(accumulate(1 / (rank + 1) ** 0.8 for rank in range(len(teacher_ids))))
+        courses = [code for code, _ in Review.COURSE_CHOICES]
+        course_weights = [rng.randint(1, 10) for _ in courses]
+        semesters = [code for code, _ in Review.SEMESTER_CHOICES]
+        semester_weights = [rng.randint(1, 10) for _ in semesters]
+        tag_names, tag_weights = zip(*TAG_POOL)
+        # 标签关联使用规范化的标签名，tags 字符串保留原始写法
+        tag_ids = self._get_or_create(ReviewTag, [ReviewTag.normalize_name(name) for name in tag_names])
+        tags = dict(zip(tag_names, tag_ids))
+        TagLink = Review.tag_items.through
+
+        start = self._next_id(Review)
+        created = 0
+        votes = 0
+        with explicit_timestamps((Review, 'created_at'), (Review, 'updated_at')):
+            while created < count:
+                size = min(self.batch_size, count - created)
+                reviews, tag_links, helpful = [], [], []
+                for offset in range(size):
+                    review_id = start + created + offset
+                    rating = rng.choices(range(1, 6), RATING_WEIGHTS)[0]
+                    review_tags = list(dict.fromkeys(
+                        rng.choices(tag_names, tag_weights, k=rng.choice((0, 1, 2, 2, 3)))
+                    ))
+                    helpful_count = min(int(rng.paretovariate(1.8)) - 1, 200)
+                    created_at = BASE_TIME - timedelta(seconds=rng.randrange(TIME_SPAN_SECONDS))
+                    reviews.append(Review(
+                        pk=review_id,
+                        teacher_id=rng.choices(teacher_ids, cum_weights=teacher_weights)[0],
+                        reviewer_name=rng.choice(usernames) if usernames and rng.random() < 0.6 else '匿名',
+                        overall_rating=rating,
+                        difficulty_rating=rng.choices(range(1, 6), DIFFICULTY_WEIGHTS)[0],
+                        # 评分越高越愿意再次选择
+                        would_take_again=rng.random() < rating / 5 * 0.9,
+                        course=rng.choices(courses, course_weights)[0],
+                        semester=rng.choices(semesters, semester_weights)[0],
+                        title=rng.choice(TITLES),
+                        content=''.join(rng.sample(SENTENCES, rng.randint(1, 4))),
+                        pros=rng.choice(PROS),
+                        cons=rng.choice(CONS),
+                        tags=','.join(review_tags),
+                        helpful_count=helpful_count,
+                        created_at=created_at,
+                        updated_at=created_at,
+                    ))
+                    tag_links.extend(
+                        TagLink(review_id=review_id, reviewtag_id=tags[name]) for name in review_tags
+                    )
+                    # 每条评价内 IP 唯一即可满足 (review, ip_address) 唯一约束
+                    helpful.extend(
+                        ReviewHelpful(review_id=review_id, ip_address=f'10.0.{vote // 256}.{vote % 256}')
+                        for vote in range(helpful_count)
+                    )
+                with transaction.atomic():
+                    Review.objects.bulk_create(reviews, batch_size=self.batch_size)
+                    TagLink.objects.bulk_create(tag_links, batch_size=self.batch_size)
+                    ReviewHelpful.objects.bulk_create(helpful, batch_size=self.batch_size)
+                created += size
+                votes += len(helpful)
+                self.stdout.write(f'   📝 评价: {created}/{count}', ending='\r')
+                self.stdout.flush()
+        self.stdout.write(f'   📝 评价: {count}（有用投票 {votes}）')
+
+    def _get_or_create(self, model, names):
+        """按名称批量获取或创建（科目/标签），返回与 names 顺序一致的主键列表"""
+        model.objects.bulk_create([model(name=name) for name in names], ignore_conflicts=True)
+        existing = model.objects.in_bulk(list(names), field_name='name')
+        return [existing[name].pk for name in names]
+
+    def _reset_sequences(self):
+        """显式指定主键后重置自增序列（PostgreSQL 等需要，SQLite/MySQL 无需处理）"""
+        statements = connection.ops.sequence_reset_sql(no_style(), [User, Teacher, Review])
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+
+    def _rebuild(self, teacher_ids, with_review_index):
+        """bulk_create 不会触发信号，统一重建派生数据"""
+        self.stdout.write('   🔧 重建教师统计、标签统计和评价计数...')
+        for index in range(0, len(teacher_ids), 500):
+            with transaction.atomic():
+                Teacher.rebuild_stats(teacher_ids[index:index + 500])
+        TeacherTagCount.rebuild(teacher_ids)
+        ReviewCounter.rebuild()
+        invalidate_department_rollup()
+
+        self.stdout.write('   🔎 重建教师搜索索引...')
+        teacher_search.rebuild_index()
+        if with_review_index:
+            self.stdout.write('   🔎 重建评价搜索索引...')
+            review_search.rebuild_index()
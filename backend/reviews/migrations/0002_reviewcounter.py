@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-17 15:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReviewCounter',
+            fields=[
+                ('key', models.CharField(max_length=50, primary_key=True, serialize=False, verbose_name='计数项')),
+                ('count', models.IntegerField(default=0, verbose_name='数量')),
+            ],
+            options={
+                'verbose_name': '评价计数',
+                'verbose_name_plural': '评价计数',
+            },
+        ),
+        migrations.AlterField(
+            model_name='review',
+            name='course',
+            field=models.CharField(choices=[('PSP', 'Problem Solving and Programming'), ('OOP', 'Object-Oriented Programming'), ('AOOP', 'Advanced Object-Oriented Programming'), ('SE', 'Software Engineering'), ('SAaT', 'Software Analysis and Testing'), ('HCI', 'Human-Computer Interaction'), ('DevOps', 'DevOps'), ('IPD', 'Innovative Product Development'), ('ML', 'Machine Learning'), ('SPM', 'Software Project Management'), ('DSA', 'Data Structures and Algorithms'), ('IS', 'Information Systems'), ('FCS', 'Fundamentals of Computing Science'), ('FOS', 'Foundations of Security'), ('SDCACPP', 'Software Development With C and C++'), ('SEE', 'Software Engineering Economics'), ('DB', 'Database'), ('WAD', 'Web Application Development'), ('MfC', 'Mathematics of Computing'), ('BCPCN', 'Basic Communications and PC Networking'), ('OTHER', '其他')], default='OTHER', max_length=50, verbose_name='课程'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.30 on 2026-10-17 15:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_search_index(apps, schema_editor):
+    """为已有评价建立搜索索引"""
+    from reviews.search import FIELD_WEIGHTS
+    from teachers.search import build_terms
+    Review = apps.get_model('reviews', 'Review')
+    ReviewSearchTerm = apps.get_model('reviews', 'ReviewSearchTerm')
+    terms = []
+    for review in Review.objects.all().iterator():
+        weights = build_terms(
+            {field: getattr(review, field) for field in FIELD_WEIGHTS}, FIELD_WEIGHTS
+        )
+        terms.extend(
+            ReviewSearchTerm(
+                review_id=review.pk, teacher_id=review.teacher_id, course=review.course,
+                term=term, weight=weight,
+            )
+            for term, weight in weights.items()
+        )
+        if len(terms) >= 10000:
+            ReviewSearchTerm.objects.bulk_create(terms, batch_size=1000)
+            terms = []
+    ReviewSearchTerm.objects.bulk_create(terms, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teachers', '0004_teachersearchterm'),
+        ('reviews', '0002_reviewcounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReviewSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, verbose_name='词项')),
+                ('course', models.CharField(max_length=50, verbose_name='课程')),
+                ('weight', models.IntegerField(default=1, verbose_name='权重')),
+                ('review', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='reviews.review', verbose_name='评价')),
+                ('teacher', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='teachers.teacher', verbose_name='教师')),
+            ],
+            options={
+                'verbose_name': '评价搜索词项',
+                'verbose_name_plural': '评价搜索词项',
+                'indexes': [models.Index(fields=['term', 'teacher'], name='review_term_teacher_idx'), models.Index(fields=['term', 'course'], name='review_term_course_idx')],
+                'unique_together': {('term', 'review')},
+            },
+        ),
+        migrations.RunPython(build_search_index, migrations.RunPython.noop),
+    ]
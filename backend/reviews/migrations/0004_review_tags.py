@@ -0,0 +1,78 @@
+# Generated by Django 4.2.30 on 2026-10-17 15:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_tags(apps, schema_editor):
+    """把已有的 tags 字符串拆分为标签关联（与 ReviewTag.normalize 一致：去空白、统一大小写），并统计每位教师的标签次数"""
+    Review = apps.get_model('reviews', 'Review')
+    ReviewTag = apps.get_model('reviews', 'ReviewTag')
+    TeacherTagCount = apps.get_model('reviews', 'TeacherTagCount')
+    review_tags = {}
+    teacher_counts = {}
+    for review_id, teacher_id, value in Review.objects.values_list('id', 'teacher_id', 'tags'):
+        names = list(dict.fromkeys(
+            tag.strip().casefold()[:100] for tag in (value or '').split(',') if tag.strip()
+        ))
+        if names:
+            review_tags[review_id] = names
+        for name in names:
+            teacher_counts[(teacher_id, name)] = teacher_counts.get((teacher_id, name), 0) + 1
+    all_names = {name for names in review_tags.values() for name in names}
+    ReviewTag.objects.bulk_create([ReviewTag(name=name) for name in sorted(all_names)])
+    tags = {tag.name: tag.pk for tag in ReviewTag.objects.all()}
+    Link = Review.tag_items.through
+    Link.objects.bulk_create([
+        Link(review_id=review_id, reviewtag_id=tags[name])
+        for review_id, names in review_tags.items()
+        for name in names
+    ], batch_size=1000)
+    TeacherTagCount.objects.bulk_create([
+        TeacherTagCount(teacher_id=teacher_id, tag_id=tags[name], count=count)
+        for (teacher_id, name), count in teacher_counts.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teachers', '0005_subjects'),
+        ('reviews', '0003_reviewsearchterm'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReviewTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='标签')),
+            ],
+            options={
+                'verbose_name': '标签',
+                'verbose_name_plural': '标签',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='tag_items',
+            field=models.ManyToManyField(blank=True, related_name='reviews', to='reviews.reviewtag', verbose_name='标签'),
+        ),
+        migrations.CreateModel(
+            name='TeacherTagCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.IntegerField(default=0, verbose_name='次数')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='teacher_counts', to='reviews.reviewtag', verbose_name='标签')),
+                ('teacher', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_counts', to='teachers.teacher', verbose_name='教师')),
+            ],
+            options={
+                'verbose_name': '教师标签统计',
+                'verbose_name_plural': '教师标签统计',
+                'indexes': [models.Index(fields=['teacher', '-count'], name='teacher_tag_count_idx')],
+                'unique_together': {('teacher', 'tag')},
+            },
+        ),
+        migrations.RunPython(populate_tags, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-17 17:45
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_list_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='review',
+            name='review_rating_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='review',
+            name='review_difficulty_idx',
+        ),
+    ]
@@ -1,8 +1,17 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
 from teachers.models import Teacher
 
+from .stats import queue_review_stats
+
+
+def split_tags(value):
+    """把逗号分隔的标签字符串拆分为列表（保留原样，不去重）"""
+    if value:
+        return [tag.strip() for tag in value.split(',')]
+    return []
+
 
 class Review(models.Model):
     COURSE_CHOICES = [
@@ -55,9 +64,10 @@ class Review(models.Model):
     title = models.CharField('评价标题', max_length=200)
     content = models.TextField('评价内容')
     
-    # 标签
+    # 标签（tags 为原始输入，tag_items 为规范化后的标签关联）
     tags = models.CharField('标签', max_length=500, blank=True, 
                           help_text='用逗号分隔，如：认真负责,讲解清楚,作业适中')
+    tag_items = models.ManyToManyField('ReviewTag', related_name='reviews', blank=True, verbose_name='标签')
     
     # 优缺点
     pros = models.TextField('优点', blank=True)
@@ -70,24 +80,71 @@ class Review(models.Model):
     created_at = models.DateTimeField('创建时间', auto_now_add=True)
     updated_at = models.DateTimeField('更新时间', auto_now=True)
     
+    # 影响教师统计、评价计数和标签统计的字段
+    STATS_FIELDS = ('teacher_id', 'overall_rating', 'difficulty_rating', 'would_take_again', 'course', 'tags')
+    
     class Meta:
         verbose_name = '评价'
         verbose_name_plural = '评价'
         ordering = ['-created_at']
+        # 与 ReviewFilter 的过滤字段和可选排序字段对应：教师/课程/学期 + 时间，以及单独的排序字段
+        indexes = [
+            models.Index(fields=['teacher', '-created_at'], name='review_teacher_created_idx'),
+            models.Index(fields=['teacher', '-helpful_count'], name='review_teacher_helpful_idx'),
+            models.Index(fields=['course', '-created_at'], name='review_course_created_idx'),
+            models.Index(fields=['semester', '-created_at'], name='review_semester_created_idx'),
+            models.Index(fields=['-created_at'], name='review_created_idx'),
+            models.Index(fields=['-helpful_count'], name='review_helpful_idx'),
+        ]
         
     def __str__(self):
         return f'{self.teacher.name} - {self.title}'
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # 记录从数据库读取时的统计字段，保存时据此计算增量
+        instance._stats_snapshot = instance.get_stats_snapshot()
+        return instance
+    
+    def get_stats_snapshot(self):
+        """获取统计字段快照，字段未加载时返回 None"""
+        if any(field not in self.__dict__ for field in self.STATS_FIELDS):
+            return None
+        return {field: self.__dict__[field] for field in self.STATS_FIELDS}
+    
     def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and not {
+            self._meta.get_field(name).attname for name in update_fields
+        } & set(self.STATS_FIELDS):
+            # 只更新了与统计无关的字段（如 helpful_count），无需同步统计
+            super().save(*args, **kwargs)
+            return
+        
+        previous = None
+        if not self._state.adding:
+            previous = getattr(self, '_stats_snapshot', None)
+            if previous is None:
+                previous = Review.objects.filter(pk=self.pk).values(*self.STATS_FIELDS).first()
+        
         super().save(*args, **kwargs)
-        # 更新教师的评分统计
-        self.teacher.update_ratings()
+        
+        # 按新旧值的差异同步教师统计和评价计数
+        current = self.get_stats_snapshot()
+        queue_review_stats(previous, current, using=kwargs.get('using'))
+        self._stats_snapshot = current
     
     def get_tags_list(self):
         """获取标签列表"""
-        if self.tags:
-            return [tag.strip() for tag in self.tags.split(',')]
-        return []
+        return split_tags(self.tags)
+    
+    def sync_tag_items(self):
+        """根据 tags 字符串同步规范化的标签关联"""
+        names = ReviewTag.normalize(self.tags)
+        if set(self.tag_items.values_list('name', flat=True)) == set(names):
+            return
+        self.tag_items.set(ReviewTag.get_or_create_many(names).values())
 
 
 class ReviewHelpful(models.Model):
@@ -100,3 +157,255 @@ class ReviewHelpful(models.Model):
         verbose_name = '有用投票'
         verbose_name_plural = '有用投票'
         unique_together = ['review', 'ip_address']  # 防止重复投票
+
+
+class ReviewCounter(models.Model):
+    """评价计数（总数、评分分布、课程分布），随评价写入增量维护"""
+    key = models.CharField('计数项', max_length=50, primary_key=True)
+    count = models.IntegerField('数量', default=0)
+    
+    TOTAL_KEY = 'total'
+    # 评价列表变更次数：评价或教师姓名每次变化时加一，用作评价列表的数据库指纹（见 reviews.cache）
+    LIST_VERSION_KEY = 'list_version'
+    
+    class Meta:
+        verbose_name = '评价计数'
+        verbose_name_plural = '评价计数'
+    
+    def __str__(self):
+        return f'{self.key}: {self.count}'
+    
+    @staticmethod
+    def rating_key(rating):
+        return f'rating_{rating}'
+    
+    @staticmethod
+    def course_key(course):
+        return f'course_{course}'
+    
+    @classmethod
+    def all_keys(cls):
+        return [cls.TOTAL_KEY] + [
+            cls.rating_key(rating) for rating in range(1, 6)
+        ] + [
+            cls.course_key(code) for code, _ in Review.COURSE_CHOICES
+        ]
+    
+    @classmethod
+    def keys_for(cls, snapshot):
+        """一条评价所计入的计数项"""
+        return [
+            cls.TOTAL_KEY,
+            cls.rating_key(snapshot['overall_rating']),
+            cls.course_key(snapshot['course']),
+        ]
+    
+    @classmethod
+    def rebuild(cls):
+        """用一次条件聚合重算全部计数并写回"""
+        aggregates = {cls.TOTAL_KEY: models.Count('id')}
+        for rating in range(1, 6):
+            aggregates[cls.rating_key(rating)] = models.Count(
+                'id', filter=models.Q(overall_rating=rating)
+            )
+        for code, _ in Review.COURSE_CHOICES:
+            aggregates[cls.course_key(code)] = models.Count('id', filter=models.Q(course=code))
+        counts = Review.objects.order_by().aggregate(**aggregates)
+        cls.objects.bulk_create(
+            [cls(key=key, count=count) for key, count in counts.items()],
+            update_conflicts=True,
+            unique_fields=['key'],
+            update_fields=['count'],
+        )
+        return counts
+    
+    @classmethod
+    def _add(cls, deltas):
+        """一条 UPDATE 给多个计数项加上各自的增量，返回更新的行数"""
+        return cls.objects.filter(key__in=list(deltas)).update(count=models.F('count') + models.Case(
+            *[models.When(key=key, then=models.Value(delta)) for key, delta in deltas.items()],
+            default=models.Value(0),
+        ))
+    
+    @classmethod
+    def apply_deltas(cls, deltas):
+        """按增量原子更新计数；计数表尚未初始化时跳过（读取时会重建）"""
+        deltas = {key: delta for key, delta in deltas.items() if delta}
+        if not deltas or cls._add(deltas) == len(deltas):
+            return
+        # 有计数项不存在：计数表尚未初始化，或出现了新的课程
+        if not cls.objects.filter(key=cls.TOTAL_KEY).exists():
+            return
+        existing = set(cls.objects.filter(key__in=list(deltas)).values_list('key', flat=True))
+        missing = {key: delta for key, delta in deltas.items() if key not in existing}
+        cls.objects.bulk_create([cls(key=key, count=0) for key in missing], ignore_conflicts=True)
+        cls._add(missing)
+    
+    @classmethod
+    def bump_list_version(cls):
+        """评价列表变更次数加一，计数项不存在时创建"""
+        if not cls.objects.filter(key=cls.LIST_VERSION_KEY).update(count=models.F('count') + 1):
+            cls.objects.bulk_create([cls(key=cls.LIST_VERSION_KEY, count=1)], ignore_conflicts=True)
+    
+    @classmethod
+    def list_version(cls):
+        return cls.objects.filter(key=cls.LIST_VERSION_KEY).values_list('count', flat=True).first()
+    
+    @classmethod
+    def read(cls):
+        """按主键读取全部计数，返回 {计数项: 数量}"""
+        keys = cls.all_keys()
+        counters = cls.objects.in_bulk(keys)
+        if cls.TOTAL_KEY not in counters:
+            return cls.rebuild()
+        return {key: counters[key].count if key in counters else 0 for key in keys}
+
+
+class ReviewSearchTerm(models.Model):
+    """评价搜索索引词项（由 reviews.search 维护）
+
+    冗余保存教师和课程，使按教师/课程过滤的搜索也能只走索引
+    """
+    term = models.CharField('词项', max_length=64)
+    review = models.ForeignKey(Review, on_delete=models.CASCADE, related_name='search_terms', verbose_name='评价')
+    teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE, related_name='+', verbose_name='教师')
+    course = models.CharField('课程', max_length=50)
+    weight = models.IntegerField('权重', default=1)
+    
+    class Meta:
+        verbose_name = '评价搜索词项'
+        verbose_name_plural = '评价搜索词项'
+        unique_together = ['term', 'review']
+        indexes = [
+            models.Index(fields=['term', 'teacher'], name='review_term_teacher_idx'),
+            models.Index(fields=['term', 'course'], name='review_term_course_idx'),
+        ]
+
+
+class ReviewTag(models.Model):
+    """评价标签"""
+    name = models.CharField('标签', max_length=100, unique=True)
+    
+    class Meta:
+        verbose_name = '标签'
+        verbose_name_plural = '标签'
+        ordering = ['name']
+    
+    def __str__(self):
+        return self.name
+    
+    @classmethod
+    def normalize_name(cls, name):
+        """规范化单个标签名：去空白并统一大小写（casefold），使 "Easy" 和 "easy" 是同一个标签"""
+        max_length = cls._meta.get_field('name').max_length
+        return name.strip().casefold()[:max_length]
+    
+    @classmethod
+    def normalize(cls, value):
+        """把逗号分隔的标签字符串拆分为去重、去空白、统一大小写的标签名列表"""
+        if not value:
+            return []
+        return list(dict.fromkeys(
+            cls.normalize_name(tag) for tag in value.split(',') if tag.strip()
+        ))
+    
+    @classmethod
+    def get_or_create_many(cls, names):
+        """批量获取标签，不存在的自动创建，返回 {规范化的标签名: 标签}
+
+        按规范化的名称对应：不区分大小写的排序规则（如 MySQL 默认）下，
+        数据库返回的可能是已有标签的原始写法
+        """
+        names = list(dict.fromkeys(cls.normalize_name(name) for name in names))
+        if not names:
+            return {}
+        cls.objects.bulk_create([cls(name=name) for name in names], ignore_conflicts=True)
+        return {
+            cls.normalize_name(tag.name): tag
+            for tag in cls.objects.in_bulk(names, field_name='name').values()
+        }
+
+
+class TeacherTagCount(models.Model):
+    """教师的标签出现次数（随评价写入增量维护，用于标签云）"""
+    teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE, related_name='tag_counts', verbose_name='教师')
+    tag = models.ForeignKey(ReviewTag, on_delete=models.CASCADE, related_name='teacher_counts', verbose_name='标签')
+    count = models.IntegerField('次数', default=0)
+    
+    class Meta:
+        verbose_name = '教师标签统计'
+        verbose_name_plural = '教师标签统计'
+        unique_together = ['teacher', 'tag']
+        indexes = [
+            models.Index(fields=['teacher', '-count'], name='teacher_tag_count_idx'),
+        ]
+    
+    @classmethod
+    def top_tags(cls, teacher_id, limit=10):
+        """教师出现次数最多的标签，返回 [{'tag', 'count'}]"""
+        rows = cls.objects.filter(teacher_id=teacher_id, count__gt=0).order_by(
+            '-count', 'tag_id'
+        ).values_list('tag__name', 'count')[:limit]
+        return [{'tag': name, 'count': count} for name, count in rows]
+    
+    @classmethod
+    def _add(cls, deltas):
+        """一条 UPDATE 给多个 (教师ID, 标签ID) 加上各自的增量，返回更新的行数"""
+        rows = models.Q()
+        cases = []
+        for (teacher_id, tag_id), delta in deltas.items():
+            rows |= models.Q(teacher_id=teacher_id, tag_id=tag_id)
+            cases.append(models.When(teacher_id=teacher_id, tag_id=tag_id, then=models.Value(delta)))
+        return cls.objects.filter(rows).update(
+            count=models.F('count') + models.Case(*cases, default=models.Value(0))
+        )
+    
+    @classmethod
+    def apply_deltas(cls, deltas):
+        """按增量原子更新 deltas: {(教师ID, 标签名): 增量}"""
+        deltas = {key: delta for key, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        tags = ReviewTag.get_or_create_many([name for _, name in deltas])
+        by_id = {}
+        for (teacher_id, name), delta in deltas.items():
+            key = (teacher_id, tags[ReviewTag.normalize_name(name)].pk)
+            by_id[key] = by_id.get(key, 0) + delta
+        by_id = {key: delta for key, delta in by_id.items() if delta}
+        if not by_id or cls._add(by_id) == len(by_id):
+            return
+        # 缺少的行：只为仍然存在的教师补建（级联删除教师时不再统计），减少的增量不补建
+        existing = set(cls.objects.filter(
+            teacher_id__in={teacher_id for teacher_id, _ in by_id}
+        ).values_list('teacher_id', 'tag_id'))
+        teacher_ids = set(Teacher.objects.filter(
+            pk__in={teacher_id for teacher_id, _ in by_id}
+        ).values_list('pk', flat=True))
+        missing = {
+            key: delta for key, delta in by_id.items()
+            if key not in existing and key[0] in teacher_ids and delta > 0
+        }
+        if missing:
+            cls.objects.bulk_create([
+                cls(teacher_id=teacher_id, tag_id=tag_id, count=0) for teacher_id, tag_id in missing
+            ], ignore_conflicts=True)
+            cls._add(missing)
+    
+    @classmethod
+    def rebuild(cls, teacher_ids=None):
+        """根据标签关联重算教师的标签统计（teacher_ids 为 None 时重算全部）"""
+        links = Review.tag_items.through.objects.all()
+        existing = cls.objects.all()
+        if teacher_ids is not None:
+            teacher_ids = list(teacher_ids)
+            links = links.filter(review__teacher_id__in=teacher_ids)
+            existing = existing.filter(teacher_id__in=teacher_ids)
+        rows = links.values('review__teacher_id', 'reviewtag_id').annotate(
+            count=models.Count('id')
+        ).order_by()
+        with transaction.atomic():
+            existing.delete()
+            cls.objects.bulk_create([
+                cls(teacher_id=row['review__teacher_id'], tag_id=row['reviewtag_id'], count=row['count'])
+                for row in rows
+            ], batch_size=1000)
@@ -0,0 +1,55 @@
+"""
+教师详情页的"最新评价"
+
+- 每位教师最新几条评价的序列化结果保存在缓存中，评价新增/修改/删除、"有用"票数变化
+  或教师姓名变化时（事务提交后）失效
+- 缓存未命中的教师用一次带切片的 Prefetch 查询补齐，评价直接复用父对象上的教师，
+  因此无论序列化多少位教师，查询数都是固定的
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
+
+RECENT_REVIEWS_LIMIT = 5
+RECENT_REVIEWS_CACHE_KEY = 'reviews:recent:{teacher_id}'
+# 兜底的过期时间，防止绕过 save() 的批量修改导致缓存长期不一致
+RECENT_REVIEWS_TIMEOUT = 60 * 10
+
+
+def recent_reviews_prefetch(limit=RECENT_REVIEWS_LIMIT):
+    """每位教师最新 limit 条评价（保存在 teacher.prefetched_recent_reviews）"""
+    from .models import Review
+    return Prefetch(
+        'review_set',
+        queryset=Review.objects.order_by('-created_at', '-id')[:limit],
+        to_attr='prefetched_recent_reviews',
+    )
+
+
+def get_recent_reviews(teachers):
+    """批量获取教师的最新评价，返回 {教师ID: 序列化后的评价列表}"""
+    from .serializers import ReviewSerializer
+    keys = {RECENT_REVIEWS_CACHE_KEY.format(teacher_id=teacher.pk): teacher for teacher in teachers}
+    cached = cache.get_many(keys)
+    result = {keys[key].pk: data for key, data in cached.items()}
+
+    missing = [teacher for key, teacher in keys.items() if key not in cached]
+    if missing:
+        prefetch_related_objects(missing, recent_reviews_prefetch())
+        fresh = {
+            teacher.pk: list(ReviewSerializer(teacher.prefetched_recent_reviews, many=True).data)
+            for teacher in missing
+        }
+        cache.set_many({
+            RECENT_REVIEWS_CACHE_KEY.format(teacher_id=teacher_id): data
+            for teacher_id, data in fresh.items()
+        }, timeout=RECENT_REVIEWS_TIMEOUT)
+        result.update(fresh)
+    return result
+
+
+def invalidate_recent_reviews(teacher_ids):
+    """在事务提交后使这些教师的最新评价缓存失效"""
+    keys = [RECENT_REVIEWS_CACHE_KEY.format(teacher_id=teacher_id) for teacher_id in set(teacher_ids)]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,164 @@
+"""
+评价全文搜索索引（标题/内容/优点/缺点）
+
+- 切分和匹配规则与教师搜索相同（teachers.search）：中文单字 + 双字，英文单词按前缀匹配
+- 词项冗余保存评价的教师和课程，按教师、课程过滤时也能直接走索引
+- 评价保存/删除时增量更新；通过 ?q= 参数使用，结果按相关度排序并附带高亮摘要
+"""
+import html
+from itertools import groupby
+
+from django.db import models, transaction
+from django.db.models import OuterRef, Subquery
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.settings import api_settings
+
+from teachers.search import build_terms, term_condition, tokenize_query
+
+# 各字段的权重：标题 > 优缺点 > 正文
+FIELD_WEIGHTS = {
+    'title': 5,
+    'pros': 2,
+    'cons': 2,
+    'content': 1,
+}
+
+# 这些字段变化时需要重建该评价的索引
+INDEXED_FIELDS = tuple(FIELD_WEIGHTS) + ('teacher_id', 'course')
+
+# 摘要长度（匹配位置前后各取的字符数）
+SNIPPET_RADIUS = 40
+
+
+def _review_terms(review):
+    from .models import ReviewSearchTerm
+    weights = build_terms({field: getattr(review, field) for field in FIELD_WEIGHTS}, FIELD_WEIGHTS)
+    return [
+        ReviewSearchTerm(
+            review_id=review.pk,
+            teacher_id=review.teacher_id,
+            course=review.course,
+            term=term,
+            weight=weight,
+        )
+        for term, weight in weights.items()
+    ]
+
+
+def index_review(review):
+    """重建单条评价的索引"""
+    from .models import ReviewSearchTerm
+    with transaction.atomic():
+        ReviewSearchTerm.objects.filter(review_id=review.pk).delete()
+        ReviewSearchTerm.objects.bulk_create(_review_terms(review))
+
+
+def rebuild_index(batch_size=500):
+    """重建全部评价的索引，返回索引的评价数量"""
+    from .models import Review, ReviewSearchTerm
+    count = 0
+    with transaction.atomic():
+        ReviewSearchTerm.objects.all().delete()
+        buffer = []
+        reviews = Review.objects.only('id', *INDEXED_FIELDS).order_by()
+        for review in reviews.iterator(chunk_size=batch_size):
+            count += 1
+            buffer.extend(_review_terms(review))
+            if len(buffer) >= batch_size * 20:
+                ReviewSearchTerm.objects.bulk_create(buffer, batch_size=batch_size)
+                buffer = []
+        ReviewSearchTerm.objects.bulk_create(buffer, batch_size=batch_size)
+    return count
+
+
+def search_reviews(queryset, query, teacher_id=None, course=None):
+    """在 queryset 中按索引搜索，返回带 search_rank 注解的结果（未排序）
+
+    必须命中查询中的全部词项（英文/数字为前缀）；teacher_id/course 会同时作用在索引上；
+    查询切分后没有词项时返回空结果
+    """
+    from .models import ReviewSearchTerm
+    terms = tokenize_query(query)
+    if not terms:
+        return queryset.none()
+    matches = ReviewSearchTerm.objects.all()
+    if teacher_id is not None:
+        matches = matches.filter(teacher_id=teacher_id)
+    if course:
+        matches = matches.filter(course=course)
+    conditions = [term_condition(term) for term in terms]
+    # 前缀可能命中同一评价的多个词项，因此每个查询词项分别过滤
+    for condition in conditions:
+        queryset = queryset.filter(pk__in=matches.filter(condition).values('review_id'))
+    any_term = models.Q()
+    for condition in conditions:
+        any_term |= condition
+    rank = matches.filter(any_term, review_id=OuterRef('pk')).values('review_id').annotate(
+        rank=models.Sum('weight')
+    ).values('rank')
+    return queryset.annotate(search_rank=Subquery(rank))
+
+
+def highlight(text, terms, radius=SNIPPET_RADIUS):
+    """截取第一个匹配位置附近的文本，并用 <mark> 标出匹配内容；没有匹配返回 None"""
+    if not text or not terms:
+        return None
+    # 标出所有被词项覆盖的字符（中文双字词项会相互重叠）
+    lowered = text.lower()
+    covered = [False] * len(text)
+    for term in terms:
+        position = lowered.find(term)
+        while position != -1:
+            covered[position:position + len(term)] = [True] * len(term)
+            position = lowered.find(term, position + 1)
+    if True not in covered:
+        return None
+
+    first = covered.index(True)
+    start = max(first - radius, 0)
+    end = min(first + radius * 2, len(text))
+    parts = []
+    for is_match, group in groupby(range(start, end), key=covered.__getitem__):
+        chunk = html.escape(''.join(text[i] for i in group))
+        parts.append(f'<mark>{chunk}</mark>' if is_match else chunk)
+    return ('…' if start > 0 else '') + ''.join(parts) + ('…' if end < len(text) else '')
+
+
+def make_snippet(review, terms):
+    """按 标题 → 内容 → 优点 → 缺点 的顺序取第一个有匹配的字段生成摘要"""
+    for field in ('title', 'content', 'pros', 'cons'):
+        snippet = highlight(getattr(review, field), terms)
+        if snippet:
+            return snippet
+    return None
+
+
+class ReviewSearchFilter(BaseFilterBackend):
+    """基于索引的评价搜索，使用 ?q= 参数（?search= 仍走原有的 SearchFilter）
+
+    未指定 ?ordering= 时按相关度排序，因此应放在 OrderingFilter 之后；
+    匹配的词项会记录在 request.review_search_terms 上，供序列化器生成高亮摘要
+    """
+    search_param = 'q'
+    ordering_param = api_settings.ORDERING_PARAM
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+        terms = tokenize_query(query)
+        # 只有标点等无法切分出词项的查询没有结果（与教师搜索一致）
+        if not terms:
+            return queryset.none()
+
+        teacher_id = request.query_params.get('teacher')
+        queryset = search_reviews(
+            queryset,
+            query,
+            teacher_id=int(teacher_id) if teacher_id and teacher_id.isdigit() else None,
+            course=request.query_params.get('course') or None,
+        )
+        if not request.query_params.get(self.ordering_param):
+            queryset = queryset.order_by('-search_rank', '-pk')
+        request.review_search_terms = terms
+        return queryset
@@ -1,13 +1,43 @@
+from django.db.models.functions import Substr
 from rest_framework import serializers
-from .models import Review, ReviewHelpful
 
+from ratemyprofessor.fastpath import FastColumn, choice_label
+from ratemyprofessor.sparse import SparseFieldsetMixin
 
-class ReviewSerializer(serializers.ModelSerializer):
-    """评价序列化器"""
+from .models import Review, ReviewHelpful, split_tags
+from .search import make_snippet
+
+PREVIEW_PARAM = 'preview'
+# ?preview=1 时长文本字段只返回前若干个字符
+PREVIEW_FIELDS = ('content', 'pros', 'cons')
+PREVIEW_LENGTH = 100
+# 生成搜索摘要时读取的字段（见 make_snippet）
+SNIPPET_FIELDS = ('title', 'content', 'pros', 'cons')
+
+
+def truncate_preview(text):
+    if text and len(text) > PREVIEW_LENGTH:
+        return text[:PREVIEW_LENGTH].rstrip() + '…'
+    return text
+
+
+class ReviewSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """评价序列化器（支持 ?fields= / ?omit= 和 ?preview=1）"""
     teacher_name = serializers.CharField(source='teacher.name', read_only=True)
     tags_list = serializers.SerializerMethodField()
     course_display = serializers.CharField(source='get_course_display', read_only=True)
     semester_display = serializers.CharField(source='get_semester_display', read_only=True)
+    field_columns = {
+        'tags_list': ('tags',),
+        'course_display': ('course',),
+        'semester_display': ('semester',),
+    }
+    # 列表快速序列化路径（见 ratemyprofessor.fastpath），显示名称使用预先生成的映射
+    fast_fields = {
+        'tags_list': FastColumn(('tags',), split_tags),
+        'course_display': FastColumn(('course',), choice_label(Review.COURSE_CHOICES)),
+        'semester_display': FastColumn(('semester',), choice_label(Review.SEMESTER_CHOICES)),
+    }
     
     class Meta:
         model = Review
@@ -20,8 +50,55 @@ class ReviewSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['helpful_count', 'created_at', 'updated_at']
     
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        self.preview = (
+            request is not None and request.method == 'GET'
+            and request.query_params.get(PREVIEW_PARAM) in ('1', 'true')
+        )
+        if self.preview:
+            # 长文本改为读取 optimize_queryset 中用 Substr 截取的注解，不读取整列
+            self.field_columns = {**self.field_columns}
+            self.fast_fields = {**self.fast_fields}
+            for name in PREVIEW_FIELDS:
+                if name in self.fields:
+                    self.fields[name] = serializers.CharField(source=f'{name}_preview', read_only=True)
+                    self.field_columns[name] = ()
+                    self.fast_fields[name] = FastColumn((f'{name}_preview',), truncate_preview)
+    
     def get_tags_list(self, obj):
         return obj.get_tags_list()
+    
+    def supports_fast_list(self):
+        # 搜索摘要需要模型实例
+        return not getattr(self.context.get('request'), 'review_search_terms', None)
+    
+    def get_columns(self):
+        columns = super().get_columns()
+        if columns is not None and getattr(self.context.get('request'), 'review_search_terms', None):
+            columns.update(SNIPPET_FIELDS)
+        return columns
+    
+    def optimize_queryset(self, queryset):
+        if self.preview:
+            queryset = queryset.annotate(**{
+                f'{name}_preview': Substr(name, 1, PREVIEW_LENGTH + 1)
+                for name in PREVIEW_FIELDS if name in self.fields
+            })
+        return super().optimize_queryset(queryset)
+    
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if self.preview:
+            for name in PREVIEW_FIELDS:
+                if name in data:
+                    data[name] = truncate_preview(data[name])
+        # 使用 ?q= 搜索时附带高亮摘要
+        terms = getattr(self.context.get('request'), 'review_search_terms', None)
+        if terms:
+            data['search_snippet'] = make_snippet(instance, terms)
+        return data
 
 
 class ReviewCreateSerializer(serializers.ModelSerializer):
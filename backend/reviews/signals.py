@@ -0,0 +1,78 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from teachers.cache import invalidate_teacher_cache
+from teachers.models import Teacher
+
+from .cache import invalidate_review_cache
+from .models import Review
+from .recent import invalidate_recent_reviews
+from .search import INDEXED_FIELDS, index_review
+from .stats import queue_review_stats
+
+
+@receiver(pre_delete, sender=Review)
+def snapshot_deleted_review(sender, instance, using, **kwargs):
+    """删除前记录统计字段快照
+
+    只加载了部分字段的实例（如 only('id')）删除后无法再读取未加载的字段，
+    因此在行还存在时从数据库补齐
+    """
+    snapshot = instance.get_stats_snapshot()
+    if snapshot is None:
+        snapshot = sender.objects.using(using).filter(pk=instance.pk).values(*sender.STATS_FIELDS).first()
+    instance._delete_snapshot = snapshot
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, using, **kwargs):
+    """评价删除后（包括级联删除）同步教师统计和评价计数"""
+    snapshot = getattr(instance, '_delete_snapshot', None)
+    if snapshot is None:
+        return
+    queue_review_stats(snapshot, None, using=using)
+
+
+@receiver(post_save, sender=Review)
+def reindex_review(sender, instance, update_fields=None, **kwargs):
+    """标题、内容、优缺点、教师或课程变化时更新搜索索引"""
+    if update_fields is not None and not {
+        sender._meta.get_field(name).attname for name in update_fields
+    } & set(INDEXED_FIELDS):
+        return
+    index_review(instance)
+
+
+@receiver(post_save, sender=Review)
+def sync_review_tags(sender, instance, update_fields=None, **kwargs):
+    """标签变化时同步规范化的标签关联"""
+    if update_fields is not None and 'tags' not in update_fields:
+        return
+    instance.sync_tag_items()
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def review_changed(sender, instance, **kwargs):
+    """评价变化后使所属教师（包括改动前的教师）的最新评价缓存、接口响应缓存和评价列表版本号失效"""
+    teacher_ids = set()
+    # 删除后不能再读取未加载的字段（会查询已删除的行），只使用已加载的值和快照
+    if 'teacher_id' in instance.__dict__:
+        teacher_ids.add(instance.teacher_id)
+    # post_save 时 _stats_snapshot 仍是保存前的快照；删除时使用删除前的快照
+    for attr in ('_stats_snapshot', '_delete_snapshot'):
+        previous = getattr(instance, attr, None)
+        if previous is not None:
+            teacher_ids.add(previous['teacher_id'])
+    invalidate_recent_reviews(teacher_ids)
+    invalidate_teacher_cache(teacher_ids)
+    invalidate_review_cache(teacher_ids)
+
+
+@receiver(post_save, sender=Teacher)
+def teacher_renamed(sender, instance, update_fields=None, **kwargs):
+    """最新评价和评价列表中包含教师姓名，姓名可能变化时使缓存失效"""
+    if update_fields is not None and 'name' not in update_fields:
+        return
+    invalidate_recent_reviews([instance.pk])
+    invalidate_review_cache()
@@ -0,0 +1,154 @@
+"""
+评价写入后的统计同步（教师评分统计 + 评价计数 + 教师标签统计）
+
+- 不在事务中（自动提交）：立即按增量更新
+- 在事务中：累加教师统计、评价计数和标签的增量，事务提交时一次性写入，
+  同一事务内多次修改同一教师的评价只会更新一次该教师；事务回滚则什么都不做
+- 全量重算只由 rebuild_teacher_stats 命令显式执行
+
+评价统计接口的汇总（计数 + 最新评价）保存在统计缓存中，评价列表版本号更新后过期
+"""
+from django.db import transaction
+
+from ratemyprofessor.stats_cache import cached_stats
+from teachers.models import Teacher
+
+from .cache import REVIEW_LIST_VERSION, REVIEW_STATS
+
+# 评价统计中最新评价的数量
+RECENT_REVIEWS_COUNT = 10
+
+
+def teacher_deltas(previous, current):
+    """根据新旧快照计算教师统计增量 {教师ID: 增量}"""
+    deltas = {}
+    for snapshot, sign in ((previous, -1), (current, 1)):
+        if snapshot is None:
+            continue
+        delta = deltas.setdefault(
+            snapshot['teacher_id'],
+            {'count': 0, 'rating': 0, 'difficulty': 0, 'would_take_again': 0},
+        )
+        delta['count'] += sign
+        delta['rating'] += sign * snapshot['overall_rating']
+        delta['difficulty'] += sign * snapshot['difficulty_rating']
+        delta['would_take_again'] += sign if snapshot['would_take_again'] else 0
+    return {
+        teacher_id: delta for teacher_id, delta in deltas.items() if any(delta.values())
+    }
+
+
+def counter_deltas(previous, current):
+    """根据新旧快照计算评价计数增量 {计数项: 增量}"""
+    from .models import ReviewCounter
+    deltas = {}
+    for snapshot, sign in ((previous, -1), (current, 1)):
+        if snapshot is None:
+            continue
+        for key in ReviewCounter.keys_for(snapshot):
+            deltas[key] = deltas.get(key, 0) + sign
+    return {key: delta for key, delta in deltas.items() if delta}
+
+
+def tag_deltas(previous, current):
+    """根据新旧快照计算教师标签增量 {(教师ID, 标签名): 增量}"""
+    from .models import ReviewTag
+    deltas = {}
+    for snapshot, sign in ((previous, -1), (current, 1)):
+        if snapshot is None:
+            continue
+        for name in ReviewTag.normalize(snapshot['tags']):
+            key = (snapshot['teacher_id'], name)
+            deltas[key] = deltas.get(key, 0) + sign
+    return {key: delta for key, delta in deltas.items() if delta}
+
+
+def merge_deltas(target, deltas):
+    """把增量累加到 target 中 {键: 增量}，增量也可以是 {字段: 增量}（教师统计）"""
+    for key, delta in deltas.items():
+        if isinstance(delta, dict):
+            merged = target.setdefault(key, dict.fromkeys(delta, 0))
+            for field, value in delta.items():
+                merged[field] += value
+        else:
+            target[key] = target.get(key, 0) + delta
+
+
+def _pending_stats(connection):
+    """获取当前事务累加的统计增量，必要时注册提交回调"""
+    pending = getattr(connection, '_pending_review_stats', None)
+    # 回调已被回滚丢弃或已经执行过，说明这是一个新的事务
+    if pending is None or not any(
+        func is pending['flush'] for _, func, _ in connection.run_on_commit
+    ):
+        pending = {'teachers': {}, 'counters': {}, 'tags': {}}
+
+        def flush():
+            from .models import ReviewCounter, TeacherTagCount
+            connection._pending_review_stats = None
+            Teacher.apply_review_deltas(pending['teachers'])
+            ReviewCounter.apply_deltas(pending['counters'])
+            TeacherTagCount.apply_deltas(pending['tags'])
+
+        pending['flush'] = flush
+        connection._pending_review_stats = pending
+        transaction.on_commit(flush, using=connection.alias)
+    return pending
+
+
+def queue_review_stats(previous, current, using=None):
+    """同步一条评价的变更（previous/current 为统计字段快照，新增或删除时为 None）"""
+    from .models import ReviewCounter, TeacherTagCount
+    if previous == current:
+        return
+    teachers = teacher_deltas(previous, current)
+    counters = counter_deltas(previous, current)
+    tags = tag_deltas(previous, current)
+
+    connection = transaction.get_connection(using)
+    if not connection.in_atomic_block:
+        for teacher_id, delta in teachers.items():
+            Teacher.apply_review_delta(teacher_id, **delta)
+        ReviewCounter.apply_deltas(counters)
+        TeacherTagCount.apply_deltas(tags)
+        return
+
+    pending = _pending_stats(connection)
+    merge_deltas(pending['teachers'], teachers)
+    merge_deltas(pending['counters'], counters)
+    merge_deltas(pending['tags'], tags)
+
+
+def build_review_stats():
+    """由评价计数表和最新评价生成评价统计"""
+    from .models import Review, ReviewCounter
+    from .serializers import ReviewSerializer
+    counts = ReviewCounter.read()
+
+    # 按评分统计
+    rating_stats = {
+        f'rating_{rating}': counts[ReviewCounter.rating_key(rating)]
+        for rating in range(1, 6)
+    }
+
+    # 按课程统计
+    course_stats = {
+        course_code: {
+            'name': course_name,
+            'count': counts[ReviewCounter.course_key(course_code)]
+        }
+        for course_code, course_name in Review.COURSE_CHOICES
+    }
+
+    recent_reviews = Review.objects.select_related('teacher').order_by('-created_at')[:RECENT_REVIEWS_COUNT]
+    return {
+        'total_reviews': counts[ReviewCounter.TOTAL_KEY],
+        'rating_stats': rating_stats,
+        'course_stats': course_stats,
+        'recent_reviews': list(ReviewSerializer(recent_reviews, many=True).data),
+    }
+
+
+def get_review_stats():
+    """读取评价统计，缓存过期时由一个请求重新计算"""
+    return cached_stats(REVIEW_STATS, build_review_stats, [REVIEW_LIST_VERSION])
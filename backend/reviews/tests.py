@@ -0,0 +1,501 @@
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from ratemyprofessor.middleware import count_queries
+from ratemyprofessor.query_budgets import QueryBudgetTestMixin
+from ratemyprofessor.query_plans import QueryPlanTestMixin
+from teachers.models import Teacher
+
+from . import helpful_buffer
+from .helpful_buffer import MemoryVoteBuffer, SQLiteVoteBuffer, flush, write_votes
+from .cache import bump_database_versions
+from .models import Review, ReviewCounter, ReviewHelpful, ReviewSearchTerm, ReviewTag, TeacherTagCount
+from .views import ReviewViewSet
+
+REVIEW_DATA = {
+    'overall_rating': 4,
+    'difficulty_rating': 3,
+    'would_take_again': True,
+    'course': 'SE',
+    'semester': 'FALL_2024',
+    'title': '讲解清楚',
+    'content': '课程内容充实',
+    'tags': '认真负责',
+}
+
+
+class ConditionalRequestTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        # 数据库版本号在事务提交时更新
+        with self.captureOnCommitCallbacks(execute=True):
+            self.teacher = Teacher.objects.create(name='张老师', subjects='数据库')
+            self.review = Review.objects.create(teacher=self.teacher, reviewer_name='同学', **REVIEW_DATA)
+
+    def test_list_changes_from_other_process(self):
+        url = reverse('review-list')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # 其他进程写入：只更新数据库中的版本号，本进程缓存中的版本号不变
+        Review.objects.filter(pk=self.review.pk).update(helpful_count=F('helpful_count') + 1)
+        bump_database_versions({self.teacher.pk})
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['helpful_count'], 1)
+
+    def test_fingerprints_do_not_aggregate(self):
+        # 列表和详情的指纹按主键读取一行数据库版本号，不聚合评价表
+        for url in (reverse('review-list'), reverse('teacher-detail', kwargs={'pk': self.teacher.pk})):
+            with self.subTest(url=url), count_queries(details=True) as queries:
+                self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH='"stale"').status_code, 200)
+            fingerprint_queries = [sql for sql in queries.queries if 'SUM(' in sql or 'MAX(' in sql]
+            self.assertEqual(fingerprint_queries, [])
+
+    def test_versions_follow_writes(self):
+        list_version = ReviewCounter.list_version()
+        self.teacher.refresh_from_db()
+        self.assertEqual(self.teacher.review_version, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                # 同一事务内的多次写入只更新一次版本号
+                self.review.content = '修改后的内容'
+                self.review.save()
+                Review.objects.create(teacher=self.teacher, reviewer_name='同学', **REVIEW_DATA)
+        self.assertEqual(ReviewCounter.list_version(), list_version + 1)
+        self.teacher.refresh_from_db()
+        self.assertEqual(self.teacher.review_version, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.teacher.name = '李老师'
+            self.teacher.save()
+        self.assertEqual(ReviewCounter.list_version(), list_version + 2)
+
+    def test_invalid_pk_returns_404(self):
+        for url in ('/api/reviews/abc/', '/api/reviews/manage/abc/'):
+            self.assertEqual(self.client.get(url).status_code, 404, url)
+
+
+class DeferredDeleteTests(TestCase):
+    """只加载了部分字段的评价删除后，教师统计和评价计数同样会更新"""
+
+    def setUp(self):
+        cache.clear()
+        self.teacher = Teacher.objects.create(name='张老师', subjects='数据库')
+        # 统计增量在事务提交时写入
+        with self.captureOnCommitCallbacks(execute=True):
+            self.reviews = [
+                Review.objects.create(teacher=self.teacher, reviewer_name=f'同学{index}', **REVIEW_DATA)
+                for index in range(2)
+            ]
+
+    def test_delete_deferred_instance(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Review.objects.only('id').get(pk=self.reviews[0].pk).delete()
+        self.assertFalse(Review.objects.filter(pk=self.reviews[0].pk).exists())
+        self.teacher.refresh_from_db()
+        self.assertEqual(self.teacher.total_reviews, 1)
+        self.assertEqual(ReviewCounter.read()[ReviewCounter.TOTAL_KEY], 1)
+
+    def test_delete_deferred_queryset(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Review.objects.only('id').delete()
+        self.teacher.refresh_from_db()
+        self.assertEqual(self.teacher.total_reviews, 0)
+        self.assertEqual(self.teacher.average_rating, 0)
+
+
+class ReviewStatsDeltaTests(TestCase):
+    """事务中的评价写入在提交时按累加的增量更新统计，不重新聚合"""
+
+    def setUp(self):
+        cache.clear()
+        self.teacher = Teacher.objects.create(name='张老师', subjects='数据库')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.reviews = [
+                Review.objects.create(teacher=self.teacher, reviewer_name=f'同学{index}', **REVIEW_DATA)
+                for index in range(3)
+            ]
+        ReviewCounter.rebuild()
+
+    def test_counters_apply_deltas(self):
+        # 故意让计数偏离真实值：按增量更新会保留偏差，重新聚合则会修正
+        ReviewCounter.objects.filter(key=ReviewCounter.TOTAL_KEY).update(count=100)
+        # 不存在的计数项（如新增的课程）会自动补上
+        ReviewCounter.objects.filter(key=ReviewCounter.course_key('OOP')).delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.reviews[0].delete()
+                self.reviews[1].overall_rating = 2
+                self.reviews[1].course = 'OOP'
+                self.reviews[1].save()
+        counts = ReviewCounter.read()
+        self.assertEqual(counts[ReviewCounter.TOTAL_KEY], 99)
+        self.assertEqual(counts[ReviewCounter.rating_key(4)], 1)
+        self.assertEqual(counts[ReviewCounter.rating_key(2)], 1)
+        self.assertEqual(counts[ReviewCounter.course_key('SE')], 1)
+        self.assertEqual(counts[ReviewCounter.course_key('OOP')], 1)
+
+    def flush_bulk_delete(self, count):
+        """批量删除 count 条评价（与管理后台批量删除相同），返回提交时同步统计的查询数"""
+        other = Teacher.objects.create(name=f'李老师{count}', subjects='操作系统')
+        with self.captureOnCommitCallbacks(execute=True):
+            for index in range(count):
+                teacher = self.teacher if index % 2 else other
+                Review.objects.create(teacher=teacher, reviewer_name=f'同学{index}', **REVIEW_DATA)
+        ids = list(Review.objects.order_by('-pk').values_list('pk', flat=True)[:count])
+        with self.captureOnCommitCallbacks() as callbacks:
+            Review.objects.filter(pk__in=ids).delete()
+        with count_queries(details=True) as queries:
+            for callback in callbacks:
+                callback()
+        # 不重新聚合评价表
+        self.assertFalse([sql for sql in queries.queries if 'COUNT(' in sql or 'SUM(' in sql])
+        return queries.count
+
+    def test_bulk_delete_queries_are_bounded(self):
+        small = self.flush_bulk_delete(4)
+        large = self.flush_bulk_delete(20)
+        self.assertEqual(small, large)
+        self.assertLessEqual(large, 10)
+        # 增量同步的结果与全量聚合一致
+        stats = Teacher.aggregate_review_stats([self.teacher.pk])[self.teacher.pk]
+        self.teacher.refresh_from_db()
+        self.assertEqual(self.teacher.total_reviews, stats['count'])
+        self.assertEqual(self.teacher.rating_sum, stats['rating_sum'])
+        self.assertEqual(ReviewCounter.read()[ReviewCounter.TOTAL_KEY], Review.objects.count())
+
+
+class ReviewTagTests(TestCase):
+    """标签名去空白、统一大小写；教师标签统计在事务中按增量更新"""
+
+    def setUp(self):
+        cache.clear()
+        self.teacher = Teacher.objects.create(name='张老师', subjects='数据库')
+
+    def create_review(self, tags):
+        return Review.objects.create(
+            teacher=self.teacher, reviewer_name='同学', **{**REVIEW_DATA, 'tags': tags}
+        )
+
+    def test_tags_differing_in_case_are_one_tag(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_review('Easy')
+            review = self.create_review(' easy ,EASY,幽默')
+        self.assertEqual(list(ReviewTag.objects.values_list('name', flat=True)), ['easy', '幽默'])
+        self.assertEqual(list(review.tag_items.values_list('name', flat=True)), ['easy', '幽默'])
+        self.assertEqual(TeacherTagCount.top_tags(self.teacher.pk), [
+            {'tag': 'easy', 'count': 2}, {'tag': '幽默', 'count': 1},
+        ])
+
+    def test_case_insensitive_collation_lookup(self):
+        # 不区分大小写的排序规则下，数据库返回已有标签的原始写法
+        legacy = ReviewTag.objects.create(name='Easy')
+        with mock.patch.object(ReviewTag.objects, 'in_bulk', return_value={'Easy': legacy}):
+            self.assertEqual(ReviewTag.get_or_create_many(['EASY ']), {'easy': legacy})
+
+    def test_tag_counts_apply_deltas(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            reviews = [self.create_review('幽默,严格') for _ in range(2)]
+        # 故意让计数偏离真实值：按增量更新会保留偏差，重新聚合则会修正
+        TeacherTagCount.objects.filter(tag__name='幽默').update(count=10)
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                reviews[0].delete()
+                reviews[1].tags = '幽默,耐心'
+                reviews[1].save()
+        self.assertEqual(
+            dict(TeacherTagCount.objects.values_list('tag__name', 'count')),
+            {'幽默': 9, '严格': 0, '耐心': 1},
+        )
+
+    def test_delete_teacher_with_tagged_reviews(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_review('幽默')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.teacher.delete()
+        self.assertFalse(TeacherTagCount.objects.exists())
+
+
+class ReviewSearchTests(TestCase):
+    """?q= 评价搜索：相关度排序、高亮摘要、与教师/课程过滤组合、索引随评价更新"""
+
+    def setUp(self):
+        cache.clear()
+        self.teacher = Teacher.objects.create(name='张老师', subjects='数据库')
+        self.other = Teacher.objects.create(name='李老师', subjects='操作系统')
+        self.in_title = self.create_review(self.teacher, title='Java 讲得好', content='作业适中')
+        self.in_content = self.create_review(self.teacher, title='推荐', content='主要讲 Java 和数据库')
+        self.other_teacher = self.create_review(self.other, title='Java 入门', content='内容简单', course='OOP')
+
+    def create_review(self, teacher, **data):
+        return Review.objects.create(teacher=teacher, reviewer_name='同学', **{**REVIEW_DATA, **data})
+
+    def search(self, **params):
+        response = self.client.get(reverse('review-list'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()['results']
+
+    def ids(self, **params):
+        return [review['id'] for review in self.search(**params)]
+
+    def test_ranking_order(self):
+        # 标题命中的权重高于正文
+        self.assertEqual(
+            self.ids(q='java', teacher=self.teacher.pk), [self.in_title.pk, self.in_content.pk]
+        )
+
+    def test_latin_prefix(self):
+        self.assertEqual(
+            set(self.ids(q='Jav')), {self.in_title.pk, self.in_content.pk, self.other_teacher.pk}
+        )
+        self.assertEqual(self.ids(q='jav 数据'), [self.in_content.pk])
+
+    def test_query_without_terms_returns_nothing(self):
+        self.assertEqual(self.ids(q='!!!'), [])
+        self.assertEqual(len(self.ids(q='')), 3)
+
+    def test_snippet_highlighting(self):
+        results = {review['id']: review for review in self.search(q='数据库')}
+        self.assertEqual(list(results), [self.in_content.pk])
+        self.assertEqual(results[self.in_content.pk]['search_snippet'], '主要讲 Java 和<mark>数据库</mark>')
+
+    def test_combined_with_filters(self):
+        self.assertEqual(self.ids(q='java', teacher=self.other.pk), [self.other_teacher.pk])
+        self.assertEqual(self.ids(q='java', course='OOP'), [self.other_teacher.pk])
+        self.assertEqual(self.ids(q='java', course='SE', teacher=self.other.pk), [])
+
+    def test_index_follows_save_and_delete(self):
+        self.in_title.title = 'Python 讲得好'
+        self.in_title.save()
+        self.assertNotIn(self.in_title.pk, self.ids(q='java'))
+        self.assertEqual(self.ids(q='python'), [self.in_title.pk])
+
+        review_id = self.in_title.pk
+        self.in_title.delete()
+        self.assertEqual(self.ids(q='python'), [])
+        self.assertFalse(ReviewSearchTerm.objects.filter(review_id=review_id).exists())
+
+
+@override_settings(HELPFUL_VOTE_BUFFER={'ENABLED': False})
+class MarkHelpfulTests(TestCase):
+    """有用投票：按 IP 去重，返回更新后的票数"""
+
+    def setUp(self):
+        cache.clear()
+        self.teacher = Teacher.objects.create(name='张老师', subjects='数据库')
+        self.review = Review.objects.create(teacher=self.teacher, reviewer_name='同学', **REVIEW_DATA)
+        user = User.objects.create_user('helpful-student', password='helpful-password')
+        self.token = str(RefreshToken.for_user(user).access_token)
+
+    def vote(self, review_id, ip_address='10.0.0.1'):
+        return self.client.post(
+            reverse('review-helpful', kwargs={'review_id': review_id}),
+            REMOTE_ADDR=ip_address,
+            HTTP_AUTHORIZATION=f'Bearer {self.token}',
+        )
+
+    def test_vote_returns_database_count(self):
+        # 其他进程已经写入的票数同样计入
+        Review.objects.filter(pk=self.review.pk).update(helpful_count=F('helpful_count') + 5)
+        response = self.vote(self.review.pk)
+        self.assertEqual(response.status_code, 200)
+        self.review.refresh_from_db()
+        self.assertEqual(self.review.helpful_count, 6)
+        self.assertEqual(response.json(), {'helpful_count': 6})
+        self.assertEqual(self.vote(self.review.pk, '10.0.0.2').json(), {'helpful_count': 7})
+
+    def test_duplicate_vote(self):
+        self.vote(self.review.pk)
+        response = self.vote(self.review.pk)
+        self.assertEqual(response.status_code, 400)
+        self.review.refresh_from_db()
+        self.assertEqual(self.review.helpful_count, 1)
+        self.assertEqual(ReviewHelpful.objects.filter(review=self.review).count(), 1)
+
+    def test_missing_review(self):
+        response = self.vote(self.review.pk + 100)
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(ReviewHelpful.objects.exists())
+
+
+class ReviewQueryBudgetTests(QueryBudgetTestMixin, TransactionTestCase):
+    """评价接口的查询数不超过视图声明的预算"""
+    urlconf = 'reviews.urls'
+    scenarios = [
+        ('review-list', 'GET', {}, None, None, 200),
+        ('review-create', 'POST', {}, lambda f: {
+            **REVIEW_DATA, 'teacher': f['teacher'].pk,
+        }, 'student', 201),
+        ('review-detail', 'GET', lambda f: {'pk': f['review'].pk}, None, None, 200),
+        ('review-batch', 'GET', {}, lambda f: {'ids': f['review_ids']}, None, 200),
+        ('review-helpful', 'POST', lambda f: {'review_id': f['review'].pk}, None, 'student', 200),
+        ('review-stats', 'GET', {}, None, None, 200),
+        ('teacher-tags', 'GET', lambda f: {'teacher_id': f['teacher'].pk}, None, None, 200),
+        ('review-manage-list', 'GET', {}, None, None, 200),
+        ('review-manage-list', 'POST', {}, lambda f: {
+            **REVIEW_DATA, 'teacher': f['teacher'].pk,
+        }, None, 201),
+        ('review-manage-detail', 'GET', lambda f: {'pk': f['review'].pk}, None, None, 200),
+        ('review-manage-batch', 'GET', {}, lambda f: {'ids': f['review_ids']}, None, 200),
+        ('review-manage-detail', 'PATCH', lambda f: {'pk': f['review'].pk}, lambda f: {
+            'overall_rating': 2, 'tags': '作业多',
+        }, None, 200),
+        ('review-manage-detail', 'DELETE', lambda f: {'pk': f['spare_review'].pk}, None, None, 204),
+    ]
+
+
+class ReviewQueryPlanTests(QueryPlanTestMixin, TestCase):
+    """评价列表的过滤和排序组合都能使用索引"""
+    view_class = ReviewViewSet
+    # 评分只有 1-5 五个取值，单列索引选择性很低却增加每次写入的开销，已删除；
+    # 不带教师/课程/学期过滤时按评分排序为全表扫描 + 排序
+    expected_scan_orderings = {'overall_rating', 'difficulty_rating'}
+
+
+class VoteBufferTestsMixin:
+    """两种缓冲后端共用的用例：投票不会丢失，也不会重复计数"""
+
+    def setUp(self):
+        cache.clear()
+        self.teacher = Teacher.objects.create(name='张老师', subjects='数据库')
+        self.reviews = [
+            Review.objects.create(teacher=self.teacher, reviewer_name=f'同学{index}', **REVIEW_DATA)
+            for index in range(3)
+        ]
+        self.buffer = self.make_buffer()
+
+    def make_buffer(self):
+        raise NotImplementedError
+
+    def add_votes(self, buffer, voters=4):
+        votes = [(review.pk, f'10.0.0.{index}') for review in self.reviews for index in range(voters)]
+        for review_id, ip in votes:
+            self.assertTrue(buffer.add(review_id, ip))
+        return votes
+
+    def assert_counts(self, votes_per_review):
+        for review in self.reviews:
+            review.refresh_from_db()
+            self.assertEqual(review.helpful_count, votes_per_review)
+            self.assertEqual(ReviewHelpful.objects.filter(review=review).count(), votes_per_review)
+
+    def test_duplicate_adds_are_counted_once(self):
+        self.add_votes(self.buffer)
+        review_id = self.reviews[0].pk
+        self.assertFalse(self.buffer.add(review_id, '10.0.0.0'))
+        self.assertEqual(self.buffer.pending_count(review_id), 4)
+        self.assertEqual(flush(self.buffer), 12)
+        self.assert_counts(4)
+
+        # 已写入数据库的投票再次进入缓冲，写回时跳过
+        self.assertTrue(self.buffer.add(review_id, '10.0.0.0'))
+        self.assertEqual(flush(self.buffer), 0)
+        self.assert_counts(4)
+        self.assertEqual(len(self.buffer), 0)
+
+    def test_replayed_batch_is_not_double_counted(self):
+        self.add_votes(self.buffer)
+        token, votes = self.buffer.take()
+        self.assertEqual(write_votes(votes), 12)
+        # 例如确认前崩溃后重新写回同一批
+        self.assertEqual(write_votes(votes), 0)
+        self.buffer.ack(token)
+        self.assert_counts(4)
+
+    def test_concurrent_flushers_claim_disjoint_batches(self):
+        votes = self.add_votes(self.buffer, voters=30)
+        claimed = []
+        claimed_lock = threading.Lock()
+        barrier = threading.Barrier(4)
+
+        def claim():
+            buffer = self.make_buffer()
+            barrier.wait()
+            while True:
+                token, batch = buffer.take(7)
+                if not batch:
+                    return
+                with claimed_lock:
+                    claimed.append((buffer, token, batch))
+
+        threads = [threading.Thread(target=claim) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        claimed_votes = [vote for _, _, batch in claimed for vote in batch]
+        self.assertEqual(len(claimed_votes), len(votes))
+        self.assertEqual(set(claimed_votes), set(votes))
+
+        for buffer, token, batch in claimed:
+            write_votes(batch)
+            buffer.ack(token)
+        self.assert_counts(30)
+        self.assertEqual(len(self.buffer), 0)
+
+    def test_failed_apply_returns_votes_to_buffer(self):
+        self.add_votes(self.buffer)
+        with mock.patch.object(helpful_buffer, 'write_votes', side_effect=RuntimeError('数据库不可用')):
+            with self.assertRaises(RuntimeError):
+                flush(self.buffer)
+        self.assertEqual(len(self.buffer), 12)
+        self.assert_counts(0)
+        self.assertEqual(flush(self.buffer), 12)
+        self.assert_counts(4)
+
+
+class MemoryVoteBufferTests(VoteBufferTestsMixin, TestCase):
+    def make_buffer(self):
+        # 并发用例中各个写回线程共享同一个进程内缓冲
+        if not hasattr(self, 'shared_buffer'):
+            self.shared_buffer = MemoryVoteBuffer()
+        return self.shared_buffer
+
+
+class SQLiteVoteBufferTests(VoteBufferTestsMixin, TestCase):
+    def setUp(self):
+        self.spool_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.spool_dir, ignore_errors=True)
+        super().setUp()
+
+    def make_buffer(self):
+        # 每个实例相当于一个 worker 进程，共享同一个缓冲文件
+        return SQLiteVoteBuffer(Path(self.spool_dir) / 'votes.sqlite3')
+
+    def test_crash_between_take_and_apply(self):
+        self.add_votes(self.buffer)
+        crashed = self.make_buffer()
+        _, votes = crashed.take()
+        self.assertEqual(len(votes), 12)
+        # 认领后崩溃：未超时前其他 worker 不会重复认领
+        self.assertEqual(self.make_buffer().take()[1], [])
+
+        recovery = self.make_buffer()
+        recovery.CLAIM_TIMEOUT = -1
+        self.assertEqual(flush(recovery), 12)
+        self.assert_counts(4)
+        self.assertEqual(len(recovery), 0)
+
+    def test_crash_between_apply_and_ack(self):
+        self.add_votes(self.buffer)
+        crashed = self.make_buffer()
+        _, votes = crashed.take()
+        write_votes(votes)
+
+        recovery = self.make_buffer()
+        recovery.CLAIM_TIMEOUT = -1
+        self.assertEqual(flush(recovery), 0)
+        self.assert_counts(4)
+        self.assertEqual(len(recovery), 0)
@@ -1,6 +1,9 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ReviewViewSet, ReviewListView, ReviewCreateView, ReviewDetailView, mark_helpful, review_stats
+from .views import (
+    ReviewViewSet, ReviewListView, ReviewCreateView, ReviewDetailView, ReviewBatchView,
+    mark_helpful, review_stats, teacher_tags,
+)
 
 # 创建DRF路由器用于CRUD操作
 router = DefaultRouter()
@@ -11,8 +14,10 @@ urlpatterns = [
     path('', ReviewListView.as_view(), name='review-list'),
     path('create/', ReviewCreateView.as_view(), name='review-create'),
     path('<int:pk>/', ReviewDetailView.as_view(), name='review-detail'),
+    path('batch/', ReviewBatchView.as_view(), name='review-batch'),
     path('<int:review_id>/helpful/', mark_helpful, name='review-helpful'),
     path('stats/', review_stats, name='review-stats'),
+    path('teacher/<int:teacher_id>/tags/', teacher_tags, name='teacher-tags'),
     
     # 管理API (支持完整CRUD)
     path('manage/', include(router.urls)),
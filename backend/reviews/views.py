@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction, IntegrityError
+from django.db.models import F
 from rest_framework import generics, status, viewsets
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
@@ -6,8 +7,21 @@ from django_filters.rest_framework import DjangoFilterBackend
 from django_filters import rest_framework as filters
 from rest_framework import filters as rest_filters
 
-from .models import Review, ReviewHelpful
+from ratemyprofessor.batch import BatchRetrieveMixin
+from ratemyprofessor.conditional import ConditionalGetMixin, make_etag, version_validators
+from ratemyprofessor.fastpath import FastListMixin
+from ratemyprofessor.middleware import query_budget
+from ratemyprofessor.sparse import SparseFieldsViewMixin
+from teachers.cache import invalidate_teacher_cache
+from teachers.models import Teacher
+
+from .cache import REVIEW_LIST_VERSION, invalidate_review_cache, review_list_fingerprint
+from .models import Review, ReviewHelpful, TeacherTagCount
+from .helpful_buffer import get_vote_buffer
+from .recent import invalidate_recent_reviews
+from .search import ReviewSearchFilter
 from .serializers import ReviewSerializer, ReviewCreateSerializer
+from .stats import get_review_stats
 
 
 class ReviewFilter(filters.FilterSet):
@@ -24,25 +38,57 @@ class ReviewFilter(filters.FilterSet):
         fields = ['teacher', 'course', 'semester', 'min_rating', 'max_difficulty', 'would_take_again']
 
 
-class ReviewListView(generics.ListAPIView):
+class ReviewConditionalMixin(ConditionalGetMixin):
+    """评价列表按评价列表版本号和数据库指纹、评价详情按 updated_at 等字段计算校验值"""
+    
+    def get_validators(self):
+        review_id = self.kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+        if review_id is None:
+            return version_validators(self.request, [REVIEW_LIST_VERSION], review_list_fingerprint())
+        # 只读取校验需要的几列，304 时不会加载和序列化整条评价；
+        # 主键格式错误时交给 DRF 的查找返回 404
+        try:
+            row = Review.objects.filter(pk=review_id).values_list(
+                'updated_at', 'helpful_count', 'teacher__name', 'teacher__updated_at'
+            ).first()
+        except (TypeError, ValueError):
+            return None
+        if row is None:
+            return None
+        updated_at, helpful_count, teacher_name, teacher_updated_at = row
+        etag = make_etag(self.request, updated_at.isoformat(), helpful_count, teacher_name)
+        return etag, max(updated_at, teacher_updated_at)
+
+
+class ReviewListView(
+    ReviewConditionalMixin, FastListMixin, SparseFieldsViewMixin, generics.ListAPIView
+):
     """评价列表视图"""
     queryset = Review.objects.select_related('teacher').all()
     serializer_class = ReviewSerializer
-    filter_backends = [DjangoFilterBackend, rest_filters.SearchFilter, rest_filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, rest_filters.SearchFilter, rest_filters.OrderingFilter, ReviewSearchFilter]
     filterset_class = ReviewFilter
     search_fields = ['title', 'content', 'teacher__name']
     ordering_fields = ['created_at', 'overall_rating', 'difficulty_rating', 'helpful_count']
     ordering = ['-created_at']
+    query_budget = {'GET': 3}
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(
+    ReviewConditionalMixin, FastListMixin, BatchRetrieveMixin, SparseFieldsViewMixin, viewsets.ModelViewSet
+):
     """评价管理视图集 - 支持完整CRUD操作"""
     queryset = Review.objects.select_related('teacher').all()
-    filter_backends = [DjangoFilterBackend, rest_filters.SearchFilter, rest_filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, rest_filters.SearchFilter, rest_filters.OrderingFilter, ReviewSearchFilter]
     filterset_class = ReviewFilter
     search_fields = ['title', 'content', 'teacher__name', 'reviewer_name']
     ordering_fields = ['created_at', 'overall_rating', 'difficulty_rating', 'helpful_count']
     ordering = ['-created_at']
+    # 各操作的查询预算（见 tests.py 中的查询预算测试）
+    query_budget = {
+        'list': 3, 'retrieve': 2, 'batch': 1,
+        'create': 22, 'update': 28, 'partial_update': 28, 'destroy': 16,
+    }
     
     # 临时禁用认证要求（开发阶段）
     authentication_classes = []
@@ -55,78 +101,107 @@ class ReviewViewSet(viewsets.ModelViewSet):
         return ReviewSerializer
     
     def perform_destroy(self, instance):
-        """删除评价时更新教师统计"""
-        teacher = instance.teacher
+        """删除评价（教师统计由 post_delete 信号按增量更新）"""
         super().perform_destroy(instance)
-        # 删除后重新计算教师统计
-        teacher.update_ratings()
 
 
 class ReviewCreateView(generics.CreateAPIView):
     """创建评价视图 - 向后兼容"""
     queryset = Review.objects.all()
     serializer_class = ReviewCreateSerializer
+    query_budget = {'POST': 22}
     
     # 临时禁用认证要求（开发阶段）
     authentication_classes = []
     permission_classes = []
 
 
-class ReviewDetailView(generics.RetrieveAPIView):
+class ReviewDetailView(ReviewConditionalMixin, SparseFieldsViewMixin, generics.RetrieveAPIView):
     """评价详情视图"""
     queryset = Review.objects.select_related('teacher').all()
     serializer_class = ReviewSerializer
+    query_budget = {'GET': 2}
 
 
+class ReviewBatchView(BatchRetrieveMixin, SparseFieldsViewMixin, generics.GenericAPIView):
+    """按 ?ids= 批量获取评价详情"""
+    queryset = Review.objects.select_related('teacher').all()
+    serializer_class = ReviewSerializer
+    query_budget = {'GET': 1}
+    
+    def get(self, request, *args, **kwargs):
+        return self.batch(request, *args, **kwargs)
+
+
+@query_budget(7)
 @api_view(['POST'])
 def mark_helpful(request, review_id):
     """标记评价为有用"""
+    ip_address = request.META.get('REMOTE_ADDR')
+    
+    vote_buffer = get_vote_buffer()
+    if vote_buffer is not None:
+        return _mark_helpful_buffered(vote_buffer, review_id, ip_address)
+    
     try:
-        review = Review.objects.get(id=review_id)
-        ip_address = request.META.get('REMOTE_ADDR')
-        
-        # 检查是否已经投过票
-        if ReviewHelpful.objects.filter(review=review, ip_address=ip_address).exists():
-            return Response({'error': '您已经投过票了'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        # 创建投票记录
-        ReviewHelpful.objects.create(review=review, ip_address=ip_address)
-        
-        # 更新有用投票数
-        review.helpful_count = ReviewHelpful.objects.filter(review=review).count()
-        review.save()
-        
-        return Response({'helpful_count': review.helpful_count})
-        
+        with transaction.atomic():
+            # 依靠 (review, ip_address) 唯一约束去重，重复投票会触发 IntegrityError
+            ReviewHelpful.objects.create(review_id=review_id, ip_address=ip_address)
+            # 只原子地更新 helpful_count 一列，不触发教师统计同步
+            if not Review.objects.filter(id=review_id).update(helpful_count=F('helpful_count') + 1):
+                raise Review.DoesNotExist
+    except IntegrityError:
+        # 外键约束失败（评价不存在）同样会触发 IntegrityError
+        if not Review.objects.filter(id=review_id).exists():
+            return Response({'error': '评价不存在'}, status=status.HTTP_404_NOT_FOUND)
+        return Response({'error': '您已经投过票了'}, status=status.HTTP_400_BAD_REQUEST)
     except Review.DoesNotExist:
         return Response({'error': '评价不存在'}, status=status.HTTP_404_NOT_FOUND)
+    
+    helpful_count, teacher_id = Review.objects.filter(id=review_id).values_list(
+        'helpful_count', 'teacher_id'
+    ).first()
+    invalidate_recent_reviews([teacher_id])
+    invalidate_teacher_cache([teacher_id], include_list=False)
+    invalidate_review_cache([teacher_id])
+    return Response({'helpful_count': helpful_count})
 
 
-@api_view(['GET'])
-def review_stats(request):
-    """评价统计信息"""
-    total_reviews = Review.objects.count()
-    
-    # 按评分统计
-    rating_stats = {}
-    for rating in range(1, 6):
-        rating_stats[f'rating_{rating}'] = Review.objects.filter(overall_rating=rating).count()
+def _mark_helpful_buffered(vote_buffer, review_id, ip_address):
+    """写回缓冲模式：投票先进入缓冲，稍后批量写入数据库"""
+    if not Review.objects.filter(id=review_id).exists():
+        return Response({'error': '评价不存在'}, status=status.HTTP_404_NOT_FOUND)
     
-    # 按课程统计
-    course_stats = {}
-    for course_code, course_name in Review.COURSE_CHOICES:
-        course_stats[course_code] = {
-            'name': course_name,
-            'count': Review.objects.filter(course=course_code).count()
-        }
+    if (ReviewHelpful.objects.filter(review_id=review_id, ip_address=ip_address).exists()
+            or not vote_buffer.add(review_id, ip_address)):
+        return Response({'error': '您已经投过票了'}, status=status.HTTP_400_BAD_REQUEST)
     
-    # 最新评价
-    recent_reviews = Review.objects.select_related('teacher').order_by('-created_at')[:10]
-    recent_reviews_data = ReviewSerializer(recent_reviews, many=True).data
+    # 已写入的票数 + 缓冲中尚未写回的票数（加入缓冲时可能刚好触发了写回，所以在之后读取）
+    helpful_count = Review.objects.filter(id=review_id).values_list('helpful_count', flat=True).first() or 0
+    return Response({'helpful_count': helpful_count + vote_buffer.pending_count(review_id)})
+
+
+@query_budget(5)
+@api_view(['GET'])
+def review_stats(request):
+    """评价统计信息（来自统计缓存，评价列表版本号更新后过期）"""
+    return Response(get_review_stats())
+
+
+# 教师标签接口返回数量的默认值和上限
+TOP_TAGS_DEFAULT_LIMIT = 10
+TOP_TAGS_MAX_LIMIT = 50
+
+
+@query_budget(1)
+@api_view(['GET'])
+def teacher_tags(request, teacher_id):
+    """教师最常见的标签（来自标签统计表，按次数降序）"""
+    limit = request.query_params.get('limit', '')
+    limit = int(limit) if limit.isdigit() else TOP_TAGS_DEFAULT_LIMIT
+    limit = min(max(limit, 1), TOP_TAGS_MAX_LIMIT)
     
-    return Response({
-        'total_reviews': total_reviews,
-        'rating_stats': rating_stats,
-        'course_stats': course_stats,
-        'recent_reviews': recent_reviews_data
-    })
+    tags = TeacherTagCount.top_tags(teacher_id, limit)
+    if not tags and not Teacher.objects.filter(id=teacher_id).exists():
+        return Response({'error': '教师不存在'}, status=status.HTTP_404_NOT_FOUND)
+    return Response({'teacher_id': teacher_id, 'tags': tags})
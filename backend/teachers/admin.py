@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Teacher
+from .models import Teacher, Subject
 
 
 @admin.register(Teacher)
@@ -26,3 +26,9 @@ class TeacherAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+
+@admin.register(Subject)
+class SubjectAdmin(admin.ModelAdmin):
+    list_display = ['name']
+    search_fields = ['name']
@@ -5,3 +5,6 @@ class TeachersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'teachers'
     verbose_name = '教师管理'
+
+    def ready(self):
+        from . import signals  # noqa: F401
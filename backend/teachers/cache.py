@@ -0,0 +1,67 @@
+"""
+教师接口的响应缓存版本号
+
+- 教师列表依赖全局的列表版本号，教师详情依赖该教师自己的版本号
+- 教师或评价写入时（事务提交后）更新相关教师的版本号和列表版本号；
+  "有用"票数只出现在详情的最新评价中，只需更新教师版本号
+- 版本号只在写入的进程中更新，缓存键和条件请求的校验值还包含一次轻量查询得到的数据库指纹，
+  其他进程（worker、管理命令、shell）写入后同样会失效；详情的指纹来自教师自己的一行
+  （updated_at + 评价写入时维护的 review_version），不聚合该教师的评价
+"""
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+from ratemyprofessor.response_cache import bump_versions, get_response_cache_stats
+
+from .models import Teacher
+
+TEACHER_LIST_NAMESPACE = 'teachers:list'
+TEACHER_DETAIL_NAMESPACE = 'teachers:detail'
+
+TEACHER_LIST_VERSION = 'teachers:list'
+TEACHER_VERSION = 'teachers:{teacher_id}'
+# 本进程最近一次看到的教师详情指纹
+TEACHER_FINGERPRINT_KEY = 'teachers:fingerprint:{teacher_id}'
+
+
+def teacher_version(teacher_id):
+    return TEACHER_VERSION.format(teacher_id=teacher_id)
+
+
+def teacher_list_fingerprint():
+    """教师列表的数据库指纹：(max(updated_at), 教师数)"""
+    row = Teacher.objects.aggregate(updated=Max('updated_at'), count=Count('id'))
+    return row['updated'], row['count']
+
+
+def teacher_detail_fingerprint(teacher_id):
+    """教师详情的数据库指纹：(教师 updated_at, 评价版本号)
+
+    教师不存在或主键格式错误时返回空元组。指纹与本进程上次看到的不同时（其他进程写入了评价），
+    同时清除本进程中该教师的最新评价缓存，避免用旧的最新评价生成新的响应
+    """
+    try:
+        row = Teacher.objects.filter(pk=teacher_id).values_list('updated_at', 'review_version').first()
+    except (TypeError, ValueError):
+        return ()
+    if row is None:
+        return ()
+
+    from reviews.recent import RECENT_REVIEWS_CACHE_KEY
+    seen_key = TEACHER_FINGERPRINT_KEY.format(teacher_id=teacher_id)
+    if cache.get(seen_key) != row:
+        cache.delete(RECENT_REVIEWS_CACHE_KEY.format(teacher_id=teacher_id))
+        cache.set(seen_key, row, timeout=None)
+    return row
+
+
+def invalidate_teacher_cache(teacher_ids, include_list=True):
+    """在事务提交后使这些教师的详情缓存（以及教师列表缓存）失效"""
+    names = {teacher_version(teacher_id) for teacher_id in teacher_ids}
+    if include_list:
+        names.add(TEACHER_LIST_VERSION)
+    bump_versions(names)
+
+
+def get_teacher_cache_stats():
+    return get_response_cache_stats([TEACHER_LIST_NAMESPACE, TEACHER_DETAIL_NAMESPACE])
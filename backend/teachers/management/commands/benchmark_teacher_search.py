@@ -0,0 +1,69 @@
+"""
+对比教师搜索的两种实现：
+- LIKE：SearchFilter 使用的 icontains（'%关键词%'），需要全表扫描
+- 索引：teachers.search 的词项索引
+"""
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from teachers.models import Teacher
+from teachers.search import search_teachers
+
+DEFAULT_QUERIES = ['软件工程', '教授', '数据库', 'software', '机器学习', '王']
+
+
+class Command(BaseCommand):
+    help = '对比 LIKE 搜索和索引搜索的耗时'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'queries',
+            nargs='*',
+            help='搜索关键词（默认使用内置的一组关键词）'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='每个关键词重复执行的次数'
+        )
+
+    def handle(self, *args, **options):
+        queries = options['queries'] or DEFAULT_QUERIES
+        repeat = options['repeat']
+
+        self.stdout.write(f'📊 教师数量: {Teacher.objects.count()}，每个关键词执行 {repeat} 次')
+        self.stdout.write('━' * 60)
+        self.stdout.write(f'{"关键词":<12}{"LIKE(ms)":>12}{"索引(ms)":>12}{"LIKE结果":>10}{"索引结果":>10}')
+
+        for query in queries:
+            like_ms, like_count = self._measure(repeat, lambda: self._like_search(query))
+            index_ms, index_count = self._measure(
+                repeat, lambda: search_teachers(Teacher.objects.all(), query).order_by('-search_rank')
+            )
+            self.stdout.write(
+                f'{query:<12}{like_ms:>12.2f}{index_ms:>12.2f}{like_count:>10}{index_count:>10}'
+            )
+
+        self.stdout.write('━' * 60)
+        self.stdout.write('💡 结果数量不同是正常的：索引按词项匹配，LIKE 按子串匹配')
+
+    def _like_search(self, query):
+        """与 SearchFilter(search_fields=['name', 'bio', 'subjects']) 相同的查询"""
+        condition = Q()
+        for term in query.split():
+            condition &= Q(name__icontains=term) | Q(bio__icontains=term) | Q(subjects__icontains=term)
+        return Teacher.objects.filter(condition)
+
+    def _measure(self, repeat, build_queryset):
+        """返回 (中位耗时毫秒, 结果数量)"""
+        timings = []
+        count = 0
+        for _ in range(repeat):
+            started = time.perf_counter()
+            count = len(list(build_queryset().values_list('pk', flat=True)))
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings), count
@@ -0,0 +1,40 @@
+"""
+重建教师/评价搜索索引
+索引会在教师、评价保存时自动更新，批量导入（绕过 save）之后需要手动重建
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from reviews import search as review_search
+from teachers import search as teacher_search
+
+
+class Command(BaseCommand):
+    help = '重建教师和评价的全文搜索索引'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target',
+            type=str,
+            choices=['all', 'teachers', 'reviews'],
+            default='all',
+            help='要重建的索引: all(全部), teachers(教师), reviews(评价)'
+        )
+
+    def handle(self, *args, **options):
+        target = options['target']
+
+        if target in ('all', 'teachers'):
+            self._rebuild('教师', teacher_search.rebuild_index)
+        if target in ('all', 'reviews'):
+            self._rebuild('评价', review_search.rebuild_index)
+
+    def _rebuild(self, label, rebuild):
+        self.stdout.write(f'🔎 开始重建{label}搜索索引')
+        started = time.perf_counter()
+        count = rebuild()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ 已索引 {count} 条{label}数据，用时 {elapsed:.2f}s')
+        )
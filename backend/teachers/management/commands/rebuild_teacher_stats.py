@@ -0,0 +1,128 @@
+"""
+批量重建教师的评分统计字段
+用一次分组聚合查询得到所有教师的统计，再分批 bulk_update 写回
+适用于批量导入、数据迁移之后修复统计值偏差
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from reviews.models import TeacherTagCount
+from teachers.cache import invalidate_teacher_cache
+from teachers.models import Teacher
+from teachers.stats import invalidate_department_rollup
+
+
+class Command(BaseCommand):
+    help = '批量重建教师的评价数、平均评分、难度评分、再次选择率和标签统计'
+
+    # 对比差异时输出的字段
+    DIFF_FIELDS = ['total_reviews', 'average_rating', 'difficulty_rating', 'would_take_again']
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--teacher-ids',
+            type=str,
+            default='',
+            help='只重建指定教师，用逗号分隔ID，如：1,2,3'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='只输出差异，不写入数据库'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='每批写入的教师数量'
+        )
+
+    def handle(self, *args, **options):
+        teacher_ids = self._parse_teacher_ids(options['teacher_ids'])
+        dry_run = options['dry_run']
+        batch_size = options['batch_size']
+
+        self.stdout.write('🔧 开始重建教师统计')
+        if dry_run:
+            self.stdout.write(self.style.WARNING('   Dry-run 模式：不会写入数据库'))
+        self.stdout.write('━' * 60)
+
+        # 一次分组聚合得到所有教师的累计值
+        stats = Teacher.aggregate_review_stats(teacher_ids or None)
+
+        teachers = Teacher.objects.only('id', 'name', *Teacher.STATS_FIELDS).order_by('pk')
+        if teacher_ids:
+            teachers = teachers.filter(pk__in=teacher_ids)
+
+        now = timezone.now()
+        checked = 0
+        changed = []
+        updated = 0
+        for teacher in teachers.iterator(chunk_size=batch_size):
+            checked += 1
+            before = {field: getattr(teacher, field) for field in self.DIFF_FIELDS}
+            sums_before = (
+                teacher.rating_sum, teacher.difficulty_sum, teacher.would_take_again_count
+            )
+
+            teacher.set_review_stats(stats.get(teacher.pk))
+
+            after = {field: getattr(teacher, field) for field in self.DIFF_FIELDS}
+            sums_after = (
+                teacher.rating_sum, teacher.difficulty_sum, teacher.would_take_again_count
+            )
+            if before == after and sums_before == sums_after:
+                continue
+
+            if dry_run:
+                self._write_diff(teacher, before, after)
+            teacher.updated_at = now
+            changed.append(teacher)
+            if len(changed) >= batch_size:
+                updated += self._flush(changed, dry_run)
+
+        updated += self._flush(changed, dry_run)
+
+        # 标签统计直接按标签关联整体重算
+        if not dry_run:
+            TeacherTagCount.rebuild(teacher_ids or None)
+
+        self.stdout.write('\n' + '━' * 60)
+        self.stdout.write(f'   检查: {checked} 位教师')
+        if dry_run:
+            self.stdout.write(
+                self.style.WARNING(f'⚠️  需要更新: {updated} 位教师（未写入）')
+            )
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(f'✅ 重建完成，更新了 {updated} 位教师')
+            )
+
+    def _parse_teacher_ids(self, value):
+        """解析 --teacher-ids 参数"""
+        if not value:
+            return []
+        try:
+            return [int(pk) for pk in value.split(',') if pk.strip()]
+        except ValueError:
+            raise CommandError(f'无效的教师ID列表: {value}')
+
+    def _flush(self, changed, dry_run):
+        """写回一批教师，返回写入数量"""
+        count = len(changed)
+        if count and not dry_run:
+            # bulk_update 不会触发 auto_now 和 post_save，updated_at 已在上面手动设置，缓存在这里失效
+            with transaction.atomic():
+                Teacher.objects.bulk_update(changed, Teacher.STATS_FIELDS)
+                invalidate_teacher_cache([teacher.pk for teacher in changed])
+            invalidate_department_rollup()
+        changed.clear()
+        return count
+
+    def _write_diff(self, teacher, before, after):
+        """输出单个教师的统计差异"""
+        self.stdout.write(f'   • {teacher.name} (ID: {teacher.pk}):')
+        for field in self.DIFF_FIELDS:
+            if before[field] != after[field]:
+                self.stdout.write(f'     - {field}: {before[field]} → {after[field]}')
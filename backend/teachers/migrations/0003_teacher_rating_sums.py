@@ -0,0 +1,47 @@
+# Generated by Django 4.2.30 on 2026-10-17 15:39
+
+from django.db import migrations, models
+
+
+def backfill_rating_sums(apps, schema_editor):
+    """根据已有评价回填累计值"""
+    Teacher = apps.get_model('teachers', 'Teacher')
+    Review = apps.get_model('reviews', 'Review')
+    rows = Review.objects.values('teacher_id').annotate(
+        rating_sum=models.Sum('overall_rating'),
+        difficulty_sum=models.Sum('difficulty_rating'),
+        would_take_again_count=models.Count('id', filter=models.Q(would_take_again=True)),
+    ).order_by()
+    for row in rows:
+        Teacher.objects.filter(pk=row['teacher_id']).update(
+            rating_sum=row['rating_sum'] or 0,
+            difficulty_sum=row['difficulty_sum'] or 0,
+            would_take_again_count=row['would_take_again_count'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teachers', '0002_alter_teacher_would_take_again'),
+        ('reviews', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='teacher',
+            name='difficulty_sum',
+            field=models.IntegerField(default=0, verbose_name='难度评分累计'),
+        ),
+        migrations.AddField(
+            model_name='teacher',
+            name='rating_sum',
+            field=models.IntegerField(default=0, verbose_name='总体评分累计'),
+        ),
+        migrations.AddField(
+            model_name='teacher',
+            name='would_take_again_count',
+            field=models.IntegerField(default=0, verbose_name='愿意再次选择数'),
+        ),
+        migrations.RunPython(backfill_rating_sums, migrations.RunPython.noop),
+    ]
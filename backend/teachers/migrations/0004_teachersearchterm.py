@@ -0,0 +1,46 @@
+# Generated by Django 4.2.30 on 2026-10-17 15:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_search_index(apps, schema_editor):
+    """为已有教师建立搜索索引"""
+    from teachers.search import FIELD_WEIGHTS, build_terms
+    Teacher = apps.get_model('teachers', 'Teacher')
+    TeacherSearchTerm = apps.get_model('teachers', 'TeacherSearchTerm')
+    terms = []
+    for teacher in Teacher.objects.all().iterator():
+        weights = build_terms(
+            {field: getattr(teacher, field) for field in FIELD_WEIGHTS}, FIELD_WEIGHTS
+        )
+        terms.extend(
+            TeacherSearchTerm(teacher_id=teacher.pk, term=term, weight=weight)
+            for term, weight in weights.items()
+        )
+    TeacherSearchTerm.objects.bulk_create(terms, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teachers', '0003_teacher_rating_sums'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeacherSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, verbose_name='词项')),
+                ('weight', models.IntegerField(default=1, verbose_name='权重')),
+                ('teacher', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='teachers.teacher', verbose_name='教师')),
+            ],
+            options={
+                'verbose_name': '教师搜索词项',
+                'verbose_name_plural': '教师搜索词项',
+                'unique_together': {('term', 'teacher')},
+            },
+        ),
+        migrations.RunPython(build_search_index, migrations.RunPython.noop),
+    ]
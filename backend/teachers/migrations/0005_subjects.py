@@ -0,0 +1,70 @@
+# Generated by Django 4.2.30 on 2026-10-17 15:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_subjects(apps, schema_editor):
+    """把已有的 subjects 字符串拆分为科目关联"""
+    Teacher = apps.get_model('teachers', 'Teacher')
+    Subject = apps.get_model('teachers', 'Subject')
+    TeacherSubject = apps.get_model('teachers', 'TeacherSubject')
+    teacher_subjects = {}
+    for teacher_id, value in Teacher.objects.values_list('id', 'subjects'):
+        # 与 teachers.models.normalize_subject 相同的规范化（迁移中不导入模型模块）
+        names = list(dict.fromkeys(
+            subject.strip().casefold()[:200]
+            for subject in (value or '').split(',') if subject.strip()
+        ))
+        if names:
+            teacher_subjects[teacher_id] = names
+    all_names = {name for names in teacher_subjects.values() for name in names}
+    Subject.objects.bulk_create([Subject(name=name) for name in sorted(all_names)])
+    subjects = {subject.name: subject.pk for subject in Subject.objects.all()}
+    TeacherSubject.objects.bulk_create([
+        TeacherSubject(teacher_id=teacher_id, subject_id=subjects[name], position=position)
+        for teacher_id, names in teacher_subjects.items()
+        for position, name in enumerate(names)
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teachers', '0004_teachersearchterm'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Subject',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, unique=True, verbose_name='科目名称')),
+            ],
+            options={
+                'verbose_name': '科目',
+                'verbose_name_plural': '科目',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TeacherSubject',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField(default=0, verbose_name='顺序')),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='teacher_links', to='teachers.subject', verbose_name='科目')),
+                ('teacher', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subject_links', to='teachers.teacher', verbose_name='教师')),
+            ],
+            options={
+                'verbose_name': '教师科目',
+                'verbose_name_plural': '教师科目',
+                'unique_together': {('subject', 'teacher')},
+            },
+        ),
+        migrations.AddField(
+            model_name='teacher',
+            name='subject_tags',
+            field=models.ManyToManyField(blank=True, related_name='teachers', through='teachers.TeacherSubject', to='teachers.subject', verbose_name='科目'),
+        ),
+        migrations.RunPython(populate_subjects, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-17 15:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teachers', '0005_subjects'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='teacher',
+            index=models.Index(fields=['-average_rating', '-total_reviews'], name='teacher_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teacher',
+            index=models.Index(fields=['difficulty_rating'], name='teacher_difficulty_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teacher',
+            index=models.Index(fields=['total_reviews'], name='teacher_total_reviews_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teacher',
+            index=models.Index(fields=['name'], name='teacher_name_idx'),
+        ),
+    ]
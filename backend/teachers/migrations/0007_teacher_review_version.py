@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-17 18:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teachers', '0006_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='teacher',
+            name='review_version',
+            field=models.PositiveIntegerField(default=0, verbose_name='评价版本号'),
+        ),
+    ]
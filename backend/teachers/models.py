@@ -1,7 +1,40 @@
-from django.db import models
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import models, transaction
+from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 
 
+SUBJECT_NAME_MAX_LENGTH = 200
+
+
+def normalize_subject(name):
+    """规范化单个科目名：去空白并统一大小写（casefold），与评价标签的规范化方式一致
+
+    科目名称列在 MySQL 的默认排序规则下不区分大小写，"Java" 和 "java" 必须是同一个科目
+    """
+    return name.strip().casefold()[:SUBJECT_NAME_MAX_LENGTH]
+
+
+def split_subjects(value):
+    """把逗号分隔的科目字符串拆分为去重、规范化的列表（保持原顺序）"""
+    if not value:
+        return []
+    return list(dict.fromkeys(
+        normalize_subject(subject) for subject in value.split(',') if subject.strip()
+    ))
+
+
+class TeacherQuerySet(models.QuerySet):
+    def with_subjects(self):
+        """预取按顺序排列的科目，供 get_subjects_list 使用"""
+        return self.prefetch_related(models.Prefetch(
+            'subject_links',
+            queryset=TeacherSubject.objects.select_related('subject').order_by('position'),
+            to_attr='prefetched_subject_links',
+        ))
+
+
 class Teacher(models.Model):
     name = models.CharField('姓名', max_length=200)
     bio = models.TextField('简介', blank=True)
@@ -15,42 +48,239 @@ class Teacher(models.Model):
     difficulty_rating = models.DecimalField('难度评分', max_digits=3, decimal_places=2, default=0.00)
     would_take_again = models.DecimalField('再次选择率', max_digits=5, decimal_places=2, default=0.00)
     
-    # 学科标签
+    # 累计值（用于增量更新统计字段，避免每次写评价都全量重算）
+    rating_sum = models.IntegerField('总体评分累计', default=0)
+    difficulty_sum = models.IntegerField('难度评分累计', default=0)
+    would_take_again_count = models.IntegerField('愿意再次选择数', default=0)
+    # 该教师的评价（内容、"有用"票数）每次变化时加一，用作教师详情的数据库指纹（见 teachers.cache）
+    review_version = models.PositiveIntegerField('评价版本号', default=0)
+    
+    # 学科标签（subjects 为原始输入，subject_tags 为规范化后的科目关联，用于按科目精确过滤）
     subjects = models.CharField('教授科目', max_length=500, blank=True, help_text='用逗号分隔多个科目')
+    subject_tags = models.ManyToManyField(
+        'Subject', through='TeacherSubject', related_name='teachers', blank=True, verbose_name='科目'
+    )
     department = models.CharField('系别', max_length=200, default='计算机与软件工程')
     
     created_at = models.DateTimeField('创建时间', auto_now_add=True)
     updated_at = models.DateTimeField('更新时间', auto_now=True)
 
+    objects = TeacherQuerySet.as_manager()
+
     class Meta:
         verbose_name = '教师'
         verbose_name_plural = '教师'
         ordering = ['-average_rating', '-total_reviews']
+        # 与默认排序、TeacherFilter 的评分过滤和可选排序字段对应
+        indexes = [
+            models.Index(fields=['-average_rating', '-total_reviews'], name='teacher_rating_idx'),
+            models.Index(fields=['difficulty_rating'], name='teacher_difficulty_idx'),
+            models.Index(fields=['total_reviews'], name='teacher_total_reviews_idx'),
+            models.Index(fields=['name'], name='teacher_name_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
-    def update_ratings(self):
-        """更新教师的评分统计"""
-        from reviews.models import Review
-        reviews = Review.objects.filter(teacher=self)
-        
-        if reviews.exists():
-            self.total_reviews = reviews.count()
-            self.average_rating = reviews.aggregate(
-                avg=models.Avg('overall_rating')
-            )['avg'] or 0
-            self.difficulty_rating = reviews.aggregate(
-                avg=models.Avg('difficulty_rating')
-            )['avg'] or 0
-            
-            # 计算再次选择率
-            would_take_again_count = reviews.filter(would_take_again=True).count()
-            self.would_take_again = (would_take_again_count / self.total_reviews * 100) if self.total_reviews > 0 else 0
+    def get_subjects_list(self):
+        """科目列表：优先使用预取的科目关联，否则直接拆分 subjects 字符串
+
+        两种方式结果一致：去掉空项和重复项，保持原顺序（科目关联表中每个科目只出现一次）
+        """
+        links = getattr(self, 'prefetched_subject_links', None)
+        if links is not None:
+            return [link.subject.name for link in links]
+        return split_subjects(self.subjects)
+
+    @staticmethod
+    def subject_lists(teacher_ids):
+        """一次查询得到多位教师按顺序排列的科目 {教师ID: [科目名]}（与 get_subjects_list 一致）"""
+        result = {}
+        rows = TeacherSubject.objects.filter(teacher_id__in=teacher_ids).order_by(
+            'position'
+        ).values_list('teacher_id', 'subject__name')
+        for teacher_id, name in rows:
+            result.setdefault(teacher_id, []).append(name)
+        return result
+
+    def sync_subject_tags(self):
+        """根据 subjects 字符串同步科目关联"""
+        names = split_subjects(self.subjects)
+        current = list(
+            self.subject_links.order_by('position').values_list('subject__name', flat=True)
+        )
+        if current == names:
+            return
+        # 预取的科目关联已过期
+        self.__dict__.pop('prefetched_subject_links', None)
+        with transaction.atomic():
+            Subject.objects.bulk_create(
+                [Subject(name=name) for name in names], ignore_conflicts=True
+            )
+            subjects = Subject.objects.in_bulk(names, field_name='name')
+            self.subject_links.all().delete()
+            TeacherSubject.objects.bulk_create([
+                TeacherSubject(teacher=self, subject=subjects[name], position=position)
+                for position, name in enumerate(names)
+            ])
+
+    STATS_FIELDS = [
+        'total_reviews', 'rating_sum', 'difficulty_sum', 'would_take_again_count',
+        'average_rating', 'difficulty_rating', 'would_take_again', 'updated_at',
+    ]
+
+    def _refresh_derived_ratings(self):
+        """根据累计值计算平均分和再次选择率"""
+        if self.total_reviews > 0:
+            total = Decimal(self.total_reviews)
+            quantum = Decimal('0.01')
+            self.average_rating = (Decimal(self.rating_sum) / total).quantize(quantum, ROUND_HALF_UP)
+            self.difficulty_rating = (Decimal(self.difficulty_sum) / total).quantize(quantum, ROUND_HALF_UP)
+            self.would_take_again = (
+                Decimal(self.would_take_again_count) * 100 / total
+            ).quantize(quantum, ROUND_HALF_UP)
         else:
             self.total_reviews = 0
+            self.rating_sum = 0
+            self.difficulty_sum = 0
+            self.would_take_again_count = 0
             self.average_rating = 0
             self.difficulty_rating = 0
             self.would_take_again = 0
-            
+
+    @classmethod
+    def apply_review_delta(cls, teacher_id, count=0, rating=0, difficulty=0, would_take_again=0):
+        """按增量更新教师统计（评价新增/修改/删除时调用）
+
+        只锁定并更新一行教师记录，不扫描该教师的全部评价。
+        """
+        if not (count or rating or difficulty or would_take_again):
+            return
+        with transaction.atomic():
+            teacher = cls.objects.select_for_update().filter(pk=teacher_id).first()
+            if teacher is None:
+                # 教师已被删除（例如级联删除评价时），无需更新
+                return
+            teacher.total_reviews += count
+            teacher.rating_sum += rating
+            teacher.difficulty_sum += difficulty
+            teacher.would_take_again_count += would_take_again
+            teacher._refresh_derived_ratings()
+            teacher.save(update_fields=cls.STATS_FIELDS)
+
+    @classmethod
+    def apply_review_deltas(cls, deltas):
+        """按增量批量更新多位教师的统计 deltas: {教师ID: {'count', 'rating', 'difficulty', 'would_take_again'}}
+
+        事务提交时同步整个事务累加的增量：一次加锁读取 + 一次批量更新，与评价数量无关
+        """
+        deltas = {teacher_id: delta for teacher_id, delta in deltas.items() if any(delta.values())}
+        if not deltas:
+            return 0
+        now = timezone.now()
+        with transaction.atomic():
+            # 已被删除的教师（例如级联删除评价时）不在结果中，无需更新
+            teachers = list(
+                cls.objects.select_for_update().filter(pk__in=deltas).only('id', *cls.STATS_FIELDS)
+            )
+            for teacher in teachers:
+                delta = deltas[teacher.pk]
+                teacher.total_reviews += delta['count']
+                teacher.rating_sum += delta['rating']
+                teacher.difficulty_sum += delta['difficulty']
+                teacher.would_take_again_count += delta['would_take_again']
+                teacher._refresh_derived_ratings()
+                teacher.updated_at = now
+            cls.objects.bulk_update(teachers, cls.STATS_FIELDS)
+        # bulk_update 不会触发 post_save 信号，需要手动使汇总缓存和接口响应缓存失效
+        from .cache import invalidate_teacher_cache
+        from .stats import invalidate_department_rollup
+        invalidate_department_rollup()
+        invalidate_teacher_cache([teacher.pk for teacher in teachers])
+        return len(teachers)
+
+    @staticmethod
+    def aggregate_review_stats(teacher_ids=None):
+        """一次分组聚合得到教师的评价累计值，返回 {教师ID: 统计}"""
+        from reviews.models import Review
+        reviews = Review.objects.all()
+        if teacher_ids is not None:
+            reviews = reviews.filter(teacher_id__in=teacher_ids)
+        rows = reviews.values('teacher_id').annotate(
+            count=models.Count('id'),
+            rating_sum=models.Sum('overall_rating'),
+            difficulty_sum=models.Sum('difficulty_rating'),
+            would_take_again_count=models.Count('id', filter=models.Q(would_take_again=True)),
+        ).order_by()
+        return {row['teacher_id']: row for row in rows}
+
+    def set_review_stats(self, stats):
+        """用聚合结果设置统计字段（stats 为 None 表示没有评价）"""
+        stats = stats or {}
+        self.total_reviews = stats.get('count') or 0
+        self.rating_sum = stats.get('rating_sum') or 0
+        self.difficulty_sum = stats.get('difficulty_sum') or 0
+        self.would_take_again_count = stats.get('would_take_again_count') or 0
+        self._refresh_derived_ratings()
+
+    @classmethod
+    def rebuild_stats(cls, teacher_ids):
+        """全量重算一批教师的统计：一次聚合查询 + 一次批量更新"""
+        teacher_ids = list(teacher_ids)
+        if not teacher_ids:
+            return 0
+        stats = cls.aggregate_review_stats(teacher_ids)
+        teachers = list(cls.objects.filter(pk__in=teacher_ids).only('id', *cls.STATS_FIELDS))
+        now = timezone.now()
+        for teacher in teachers:
+            teacher.set_review_stats(stats.get(teacher.pk))
+            teacher.updated_at = now
+        cls.objects.bulk_update(teachers, cls.STATS_FIELDS)
+        # bulk_update 不会触发 post_save 信号，需要手动使汇总缓存和接口响应缓存失效
+        from .cache import invalidate_teacher_cache
+        from .stats import invalidate_department_rollup
+        invalidate_department_rollup()
+        invalidate_teacher_cache(teacher_ids)
+        return len(teachers)
+
+    def update_ratings(self):
+        """全量重算教师的评分统计（用于修复累计值偏差）"""
+        self.set_review_stats(self.aggregate_review_stats([self.pk]).get(self.pk))
         self.save()
+
+
+class TeacherSearchTerm(models.Model):
+    """教师搜索索引词项（由 teachers.search 维护）"""
+    term = models.CharField('词项', max_length=64)
+    teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE, related_name='search_terms', verbose_name='教师')
+    weight = models.IntegerField('权重', default=1)
+
+    class Meta:
+        verbose_name = '教师搜索词项'
+        verbose_name_plural = '教师搜索词项'
+        unique_together = ['term', 'teacher']
+
+
+class Subject(models.Model):
+    """科目"""
+    name = models.CharField('科目名称', max_length=SUBJECT_NAME_MAX_LENGTH, unique=True)
+
+    class Meta:
+        verbose_name = '科目'
+        verbose_name_plural = '科目'
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
+class TeacherSubject(models.Model):
+    """教师与科目的关联（保留 subjects 字符串中的顺序）"""
+    teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE, related_name='subject_links', verbose_name='教师')
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE, related_name='teacher_links', verbose_name='科目')
+    position = models.PositiveSmallIntegerField('顺序', default=0)
+
+    class Meta:
+        verbose_name = '教师科目'
+        verbose_name_plural = '教师科目'
+        unique_together = ['subject', 'teacher']
@@ -0,0 +1,160 @@
+"""
+教师全文搜索索引
+
+- 中文按单字 + 相邻双字（bigram）切分，英文/数字按单词切分并转为小写
+- 每位教师的词项和权重保存在 TeacherSearchTerm 表中（按词项建索引），
+  教师保存时自动更新，搜索时按命中词项的权重之和排序
+- 查询中的英文/数字词项按前缀匹配（?search=Zha 可以搜到 Zhang），用词项范围查询实现，同样走索引
+- 不依赖外部搜索引擎，直接使用本地数据库
+"""
+import re
+
+from django.db import models, transaction
+from django.db.models import OuterRef, Subquery
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.settings import api_settings
+
+CJK_RANGES = '\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff'
+TOKEN_RE = re.compile(f'[{CJK_RANGES}]+|[a-z0-9]+')
+CJK_RE = re.compile(f'[{CJK_RANGES}]')
+
+# 词项最大长度（与 TeacherSearchTerm.term 一致）
+MAX_TERM_LENGTH = 64
+
+# 各字段的权重：姓名 > 科目 > 简介
+FIELD_WEIGHTS = {
+    'name': 10,
+    'subjects': 5,
+    'bio': 1,
+}
+
+# 参与索引的教师字段，只有这些字段变化时才需要重建索引
+INDEXED_FIELDS = tuple(FIELD_WEIGHTS)
+
+
+def tokenize(text):
+    """索引用切分：中文输出单字和双字，英文输出单词"""
+    terms = []
+    for run in TOKEN_RE.findall((text or '').lower()):
+        if CJK_RE.match(run):
+            terms.extend(run)
+            terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            terms.append(run[:MAX_TERM_LENGTH])
+    return terms
+
+
+def tokenize_query(text):
+    """查询用切分：中文连续两字以上只用双字匹配，单字用单字匹配"""
+    terms = []
+    for run in TOKEN_RE.findall((text or '').lower()):
+        if CJK_RE.match(run):
+            if len(run) == 1:
+                terms.append(run)
+            else:
+                terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            terms.append(run[:MAX_TERM_LENGTH])
+    return list(dict.fromkeys(terms))
+
+
+def term_condition(term):
+    """查询词项的匹配条件：中文精确匹配，英文/数字按前缀匹配
+
+    前缀匹配写成 [term, 下一个前缀) 的范围查询而不是 LIKE，各数据库都能使用词项索引
+    """
+    if CJK_RE.match(term):
+        return models.Q(term=term)
+    upper = term[:-1] + chr(ord(term[-1]) + 1)
+    return models.Q(term__gte=term, term__lt=upper)
+
+
+def build_terms(fields, field_weights):
+    """根据字段内容计算 {词项: 权重}，权重 = Σ 字段权重 × 出现次数"""
+    weights = {}
+    for field, weight in field_weights.items():
+        for term in tokenize(fields.get(field)):
+            weights[term] = weights.get(term, 0) + weight
+    return weights
+
+
+def index_teacher(teacher):
+    """重建单个教师的索引"""
+    from .models import TeacherSearchTerm
+    weights = build_terms(
+        {field: getattr(teacher, field) for field in INDEXED_FIELDS}, FIELD_WEIGHTS
+    )
+    with transaction.atomic():
+        TeacherSearchTerm.objects.filter(teacher=teacher).delete()
+        TeacherSearchTerm.objects.bulk_create([
+            TeacherSearchTerm(teacher=teacher, term=term, weight=weight)
+            for term, weight in weights.items()
+        ])
+
+
+def rebuild_index(batch_size=500):
+    """重建全部教师的索引，返回索引的教师数量"""
+    from .models import Teacher, TeacherSearchTerm
+    count = 0
+    with transaction.atomic():
+        TeacherSearchTerm.objects.all().delete()
+        buffer = []
+        for teacher in Teacher.objects.only('id', *INDEXED_FIELDS).iterator(chunk_size=batch_size):
+            count += 1
+            weights = build_terms(
+                {field: getattr(teacher, field) for field in INDEXED_FIELDS}, FIELD_WEIGHTS
+            )
+            buffer.extend(
+                TeacherSearchTerm(teacher_id=teacher.pk, term=term, weight=weight)
+                for term, weight in weights.items()
+            )
+            if len(buffer) >= batch_size * 20:
+                TeacherSearchTerm.objects.bulk_create(buffer, batch_size=batch_size)
+                buffer = []
+        TeacherSearchTerm.objects.bulk_create(buffer, batch_size=batch_size)
+    return count
+
+
+def search_teachers(queryset, query):
+    """在 queryset 中按索引搜索，返回带 search_rank 注解的结果（未排序）
+
+    必须命中查询中的全部词项（英文/数字为前缀），search_rank 为命中词项的权重之和；
+    查询切分后没有词项时返回空结果
+    """
+    from .models import TeacherSearchTerm
+    terms = tokenize_query(query)
+    if not terms:
+        return queryset.none()
+    conditions = [term_condition(term) for term in terms]
+    # 前缀可能命中同一教师的多个词项，因此每个查询词项分别过滤
+    for condition in conditions:
+        queryset = queryset.filter(pk__in=TeacherSearchTerm.objects.filter(condition).values('teacher_id'))
+    any_term = models.Q()
+    for condition in conditions:
+        any_term |= condition
+    rank = TeacherSearchTerm.objects.filter(any_term, teacher_id=OuterRef('pk')).values('teacher_id').annotate(
+        rank=models.Sum('weight')
+    ).values('rank')
+    return queryset.annotate(search_rank=Subquery(rank))
+
+
+class TeacherSearchFilter(BaseFilterBackend):
+    """基于索引的教师搜索（替代 SearchFilter 的 icontains 全表扫描）
+
+    使用与 SearchFilter 相同的 ?search= 参数；未指定 ?ordering= 时按相关度排序，
+    因此应放在 OrderingFilter 之后
+    """
+    search_param = api_settings.SEARCH_PARAM
+    ordering_param = api_settings.ORDERING_PARAM
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+        # 只有标点等无法切分出词项的查询没有结果
+        if not tokenize_query(query):
+            return queryset.none()
+        queryset = search_teachers(queryset, query)
+        if not request.query_params.get(self.ordering_param):
+            queryset = queryset.order_by('-search_rank', 'pk')
+        return queryset
@@ -1,4 +1,8 @@
 from rest_framework import serializers
+
+from ratemyprofessor.fastpath import FastBatch
+from ratemyprofessor.sparse import SparseFieldsetMixin
+
 from .models import Teacher
 
 
@@ -20,9 +24,7 @@ class TeacherAdminSerializer(serializers.ModelSerializer):
         ]
     
     def get_subjects_list(self, obj):
-        if obj.subjects:
-            return [subject.strip() for subject in obj.subjects.split(',')]
-        return []
+        return obj.get_subjects_list()
     
     def validate_subjects(self, value):
         """验证科目字段"""
@@ -43,9 +45,21 @@ class TeacherAdminSerializer(serializers.ModelSerializer):
         return value.strip()
 
 
-class TeacherListSerializer(serializers.ModelSerializer):
+class TeacherFieldsetMixin(SparseFieldsetMixin):
+    """教师序列化器的稀疏字段集：科目来自预取的科目关联，不需要科目时跳过预取"""
+    field_columns = {'subjects_list': ()}
+    
+    def optimize_queryset(self, queryset):
+        if 'subjects_list' not in self.fields:
+            queryset = queryset.prefetch_related(None)
+        return super().optimize_queryset(queryset)
+
+
+class TeacherListSerializer(TeacherFieldsetMixin, serializers.ModelSerializer):
     """教师列表序列化器"""
     subjects_list = serializers.SerializerMethodField()
+    # 列表快速序列化路径（见 ratemyprofessor.fastpath）
+    fast_fields = {'subjects_list': FastBatch(Teacher.subject_lists)}
     
     class Meta:
         model = Teacher
@@ -56,15 +70,15 @@ class TeacherListSerializer(serializers.ModelSerializer):
         ]
     
     def get_subjects_list(self, obj):
-        if obj.subjects:
-            return [subject.strip() for subject in obj.subjects.split(',')]
-        return []
+        return obj.get_subjects_list()
 
 
-class TeacherDetailSerializer(serializers.ModelSerializer):
+class TeacherDetailSerializer(TeacherFieldsetMixin, serializers.ModelSerializer):
     """教师详情序列化器"""
     subjects_list = serializers.SerializerMethodField()
     recent_reviews = serializers.SerializerMethodField()
+    # 最新评价单独读取（见 get_recent_reviews）
+    field_columns = {**TeacherFieldsetMixin.field_columns, 'recent_reviews': ()}
     
     class Meta:
         model = Teacher
@@ -76,11 +90,16 @@ class TeacherDetailSerializer(serializers.ModelSerializer):
         ]
     
     def get_subjects_list(self, obj):
-        if obj.subjects:
-            return [subject.strip() for subject in obj.subjects.split(',')]
-        return []
+        return obj.get_subjects_list()
     
     def get_recent_reviews(self, obj):
-        from reviews.serializers import ReviewSerializer
-        recent_reviews = obj.review_set.all()[:5]  # 获取最近5条评价
-        return ReviewSerializer(recent_reviews, many=True).data
+        from reviews.recent import get_recent_reviews
+        # 同一次序列化中的所有教师一起读取（缓存 + 一次预取查询），避免逐个教师查询
+        recent = self.root.__dict__.setdefault('_recent_reviews', {})
+        if obj.pk not in recent:
+            if isinstance(self.root, serializers.ListSerializer):
+                teachers = [teacher for teacher in self.root.instance if teacher.pk not in recent]
+            else:
+                teachers = [obj]
+            recent.update(get_recent_reviews(teachers))
+        return recent[obj.pk]
@@ -0,0 +1,31 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_teacher_cache
+from .models import Teacher
+from .search import INDEXED_FIELDS, index_teacher
+from .stats import invalidate_department_rollup
+
+
+@receiver(post_save, sender=Teacher)
+@receiver(post_delete, sender=Teacher)
+def teacher_changed(sender, instance, **kwargs):
+    """教师新增、修改（包括统计字段更新）或删除后使汇总缓存和接口响应缓存失效"""
+    invalidate_department_rollup()
+    invalidate_teacher_cache([instance.pk])
+
+
+@receiver(post_save, sender=Teacher)
+def reindex_teacher(sender, instance, update_fields=None, **kwargs):
+    """姓名、简介或科目变化时更新搜索索引（仅更新统计字段时跳过）"""
+    if update_fields is not None and not set(update_fields) & set(INDEXED_FIELDS):
+        return
+    index_teacher(instance)
+
+
+@receiver(post_save, sender=Teacher)
+def sync_subject_tags(sender, instance, update_fields=None, **kwargs):
+    """subjects 字符串变化时同步规范化的科目关联"""
+    if update_fields is not None and 'subjects' not in update_fields:
+        return
+    instance.sync_subject_tags()
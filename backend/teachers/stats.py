@@ -0,0 +1,53 @@
+"""
+教师统计汇总
+
+按系别的汇总数据由一次 GROUP BY 查询得到，结果保存在统计缓存中（见 ratemyprofessor.stats_cache），
+教师或评价发生变化时更新版本号使其过期，而不是每次请求都重新计算；
+过期后由一个请求重新计算，其他并发请求继续使用旧的汇总
+"""
+from django.db import models
+
+from ratemyprofessor.response_cache import bump_versions
+from ratemyprofessor.stats_cache import cached_stats
+
+from .models import Teacher
+
+# 统计缓存的名称，同时也是汇总依赖的版本号名称
+DEPARTMENT_ROLLUP_STATS = 'teachers:department_rollup'
+
+
+def build_department_rollup():
+    """一次分组聚合计算系别汇总"""
+    rows = Teacher.objects.values('department').annotate(
+        teacher_count=models.Count('id'),
+        avg_rating=models.Avg('average_rating'),
+        review_count=models.Sum('total_reviews'),
+    ).order_by('department')
+
+    department_stats = []
+    total_teachers = 0
+    total_reviews = 0
+    for row in rows:
+        total_teachers += row['teacher_count']
+        total_reviews += row['review_count'] or 0
+        department_stats.append({
+            'department': row['department'],
+            'teacher_count': row['teacher_count'],
+            'avg_rating': row['avg_rating'] or 0,
+        })
+
+    return {
+        'total_teachers': total_teachers,
+        'total_reviews': total_reviews,
+        'department_stats': department_stats,
+    }
+
+
+def get_department_rollup():
+    """读取系别汇总，缓存过期时由一个请求重新计算"""
+    return cached_stats(DEPARTMENT_ROLLUP_STATS, build_department_rollup, [DEPARTMENT_ROLLUP_STATS])
+
+
+def invalidate_department_rollup():
+    """在事务提交后使系别汇总过期"""
+    bump_versions([DEPARTMENT_ROLLUP_STATS])
@@ -0,0 +1,305 @@
+from contextlib import nullcontext
+from decimal import Decimal
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import transaction
+from django.test import RequestFactory, TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ratemyprofessor.middleware import count_queries
+from ratemyprofessor.query_budgets import REVIEW_DATA, QueryBudgetTestMixin
+from ratemyprofessor.query_plans import QueryPlanTestMixin
+from ratemyprofessor.response_cache import get_versions
+from reviews.models import Review
+
+from .cache import TEACHER_LIST_VERSION, teacher_version
+from .models import Subject, Teacher, split_subjects
+from .views import TeacherViewSet
+
+
+class ConditionalRequestTests(TestCase):
+    """教师列表/详情的 ETag 在绕过信号的写入（其他进程、批量更新）后同样会变化"""
+
+    def setUp(self):
+        cache.clear()
+        self.teacher = Teacher.objects.create(name='张老师', department='计算机与软件工程', subjects='数据库')
+
+    def assert_refreshed(self, url, check):
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # queryset.update() 不触发信号，本进程的版本号不会更新
+        Teacher.objects.filter(pk=self.teacher.pk).update(name='李老师', updated_at=timezone.now())
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        check(response.json())
+
+    def test_detail_changes_without_version_bump(self):
+        self.assert_refreshed(
+            reverse('teacher-detail', kwargs={'pk': self.teacher.pk}),
+            lambda data: self.assertEqual(data['name'], '李老师'),
+        )
+
+    def test_list_changes_without_version_bump(self):
+        self.assert_refreshed(
+            reverse('teacher-list'),
+            lambda data: self.assertEqual(data['results'][0]['name'], '李老师'),
+        )
+
+    def test_invalid_pk_returns_404(self):
+        self.assertEqual(self.client.get('/api/teachers/abc/').status_code, 404)
+
+
+class SubjectsListTests(TestCase):
+    """subjects_list 去掉空项和重复项并规范化大小写，预取科目关联和直接拆分字符串的结果一致"""
+
+    def test_split_subjects(self):
+        self.assertEqual(split_subjects(' Java, ,数据库,JAVA ,'), ['java', '数据库'])
+        self.assertEqual(split_subjects(''), [])
+        self.assertEqual(split_subjects(None), [])
+
+    def test_prefetched_and_split_agree(self):
+        teacher = Teacher.objects.create(name='张老师', subjects='Java,,数据库, Java')
+        self.assertEqual(teacher.subjects, 'Java,,数据库, Java')
+        self.assertEqual(teacher.get_subjects_list(), ['java', '数据库'])
+        prefetched = Teacher.objects.with_subjects().get(pk=teacher.pk)
+        self.assertEqual(prefetched.get_subjects_list(), ['java', '数据库'])
+        response = self.client.get(reverse('teacher-detail', kwargs={'pk': teacher.pk}))
+        self.assertEqual(response.json()['subjects_list'], ['java', '数据库'])
+
+    def test_case_only_differences_share_subject(self):
+        # 大小写不同的科目名是同一个科目（不区分大小写的排序规则下不会 KeyError）
+        first = Teacher.objects.create(name='张老师', subjects='Java')
+        second = Teacher.objects.create(name='李老师', subjects='JAVA , java')
+        self.assertEqual(list(Subject.objects.values_list('name', flat=True)), ['java'])
+        self.assertEqual(second.get_subjects_list(), ['java'])
+        response = self.client.get(reverse('teacher-list'), {'subjects': ' jAvA'})
+        self.assertEqual(
+            {teacher['id'] for teacher in response.json()['results']}, {first.pk, second.pk}
+        )
+
+
+class TeacherSearchTests(TestCase):
+    """?search= 的中文词项精确匹配，英文/数字词项按前缀匹配"""
+
+    def setUp(self):
+        cache.clear()
+        self.zhang = Teacher.objects.create(name='Zhang Wei', subjects='Java,数据库')
+        self.zhao = Teacher.objects.create(name='Zhao Lei', subjects='Python')
+        self.wang = Teacher.objects.create(name='王老师', subjects='操作系统')
+
+    def search(self, query):
+        response = self.client.get(reverse('teacher-list'), {'search': query})
+        return {teacher['id'] for teacher in response.json()['results']}
+
+    def test_latin_prefix(self):
+        self.assertEqual(self.search('Zha'), {self.zhang.pk, self.zhao.pk})
+        self.assertEqual(self.search('Jav'), {self.zhang.pk})
+        self.assertEqual(self.search('zhang'), {self.zhang.pk})
+
+    def test_all_terms_must_match(self):
+        self.assertEqual(self.search('zha pyth'), {self.zhao.pk})
+        self.assertEqual(self.search('zhx'), set())
+
+    def test_cjk_terms(self):
+        self.assertEqual(self.search('王'), {self.wang.pk})
+        self.assertEqual(self.search('数据库'), {self.zhang.pk})
+
+    def test_query_without_terms_returns_nothing(self):
+        self.assertEqual(self.search('!!!'), set())
+        self.assertEqual(len(self.search('')), 3)
+
+
+class SparseFieldsTests(TestCase):
+    """?fields= / ?omit= 裁剪响应字段（未知字段名忽略），queryset 只读取输出需要的列"""
+
+    def setUp(self):
+        cache.clear()
+        self.teacher = Teacher.objects.create(name='张老师', bio='很长的简介', subjects='数据库')
+        self.detail_url = reverse('teacher-detail', kwargs={'pk': self.teacher.pk})
+
+    def get(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_fields_limit_keys(self):
+        self.assertEqual(set(self.get(self.detail_url, fields='id,bio')), {'id', 'bio'})
+        for fast in (True, False):
+            with self.subTest(fast=fast), self.settings(FAST_LIST_SERIALIZATION=fast):
+                results = self.get(reverse('teacher-list'), fields='id, name')['results']
+                self.assertEqual([set(item) for item in results], [{'id', 'name'}])
+
+    def test_omit_removes_keys(self):
+        full = set(self.get(self.detail_url))
+        self.assertEqual(
+            set(self.get(self.detail_url, omit='bio,recent_reviews')), full - {'bio', 'recent_reviews'}
+        )
+
+    def test_unknown_fields_are_ignored(self):
+        self.assertEqual(set(self.get(self.detail_url, fields='id,missing')), {'id'})
+        self.assertEqual(self.get(self.detail_url, omit='missing'), self.get(self.detail_url))
+
+    def teacher_queries(self, **params):
+        with count_queries(details=True) as queries:
+            self.get(self.detail_url, **params)
+        # 读取教师整行的查询（不包括只读 updated_at/review_version 的指纹查询）
+        return [
+            sql for sql in queries.queries
+            if 'FROM "teachers_teacher"' in sql and '"teachers_teacher"."name"' in sql
+        ]
+
+    def test_queryset_reads_only_needed_columns(self):
+        [sql] = self.teacher_queries()
+        self.assertIn('"teachers_teacher"."bio"', sql)
+
+        cache.clear()
+        [sql] = self.teacher_queries(fields='id,name')
+        self.assertNotIn('"teachers_teacher"."bio"', sql)
+        self.assertNotIn('"teachers_teacher"."department"', sql)
+
+    def test_only_defers_unused_columns(self):
+        view = TeacherViewSet(
+            action='retrieve', action_map={'get': 'retrieve'}, format_kwarg=None, kwargs={}
+        )
+        view.request = view.initialize_request(
+            RequestFactory().get(self.detail_url, {'fields': 'id,name'})
+        )
+        teacher = view.filter_queryset(view.get_queryset()).get(pk=self.teacher.pk)
+        self.assertIn('bio', teacher.get_deferred_fields())
+        self.assertNotIn('name', teacher.get_deferred_fields())
+
+
+class ReviewDeltaStatsTests(TransactionTestCase):
+    """按评价增量维护的教师统计与全量聚合的结果一致
+
+    使用 TransactionTestCase：事务外的写入直接按增量更新，事务中的写入在提交时按累加的增量更新，两条路径都要覆盖
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.teacher = Teacher.objects.create(name='张老师', subjects='数据库')
+        self.other = Teacher.objects.create(name='李老师', subjects='操作系统')
+
+    def create_review(self, teacher, **data):
+        return Review.objects.create(teacher=teacher, reviewer_name='同学', **{**REVIEW_DATA, **data})
+
+    def assert_matches_aggregate(self, *teachers):
+        stats = Teacher.aggregate_review_stats([teacher.pk for teacher in teachers])
+        for teacher in teachers:
+            expected = Teacher(pk=teacher.pk)
+            expected.set_review_stats(stats.get(teacher.pk))
+            teacher.refresh_from_db()
+            for field in Teacher.STATS_FIELDS:
+                if field != 'updated_at':
+                    self.assertEqual(getattr(teacher, field), getattr(expected, field), f'{teacher.name}.{field}')
+
+    def test_rating_edit(self):
+        for atomic in (False, True):
+            with self.subTest(atomic=atomic):
+                review = self.create_review(self.teacher, overall_rating=5, would_take_again=True)
+                self.create_review(self.teacher, overall_rating=2, difficulty_rating=4)
+                with transaction.atomic() if atomic else nullcontext():
+                    review.overall_rating = 1
+                    review.difficulty_rating = 5
+                    review.would_take_again = False
+                    review.save()
+                self.assert_matches_aggregate(self.teacher)
+
+    def test_move_review_to_another_teacher(self):
+        review = self.create_review(self.teacher, overall_rating=5)
+        self.create_review(self.teacher, overall_rating=3)
+        self.create_review(self.other, overall_rating=1)
+        review.teacher = self.other
+        review.save()
+        self.assert_matches_aggregate(self.teacher, self.other)
+        self.assertEqual(self.teacher.total_reviews, 1)
+        self.assertEqual(self.other.average_rating, Decimal('3.00'))
+
+    def test_delete_last_review(self):
+        # 删除总是在事务中执行（Collector），统计在提交时按增量更新
+        self.create_review(self.teacher).delete()
+        self.teacher.refresh_from_db()
+        self.assertEqual(self.teacher.total_reviews, 0)
+        self.assertEqual(self.teacher.average_rating, 0)
+        self.assertEqual(self.teacher.difficulty_rating, 0)
+        self.assertEqual(self.teacher.would_take_again, 0)
+        self.assert_matches_aggregate(self.teacher)
+
+class RebuildTeacherStatsTests(TestCase):
+    """rebuild_teacher_stats 写回统计后使改动教师的缓存失效"""
+
+    def setUp(self):
+        cache.clear()
+        self.teacher = Teacher.objects.create(name='张老师', subjects='数据库')
+        self.untouched = Teacher.objects.create(name='李老师', subjects='操作系统')
+        # 绕过信号制造统计偏差
+        Teacher.objects.filter(pk=self.teacher.pk).update(total_reviews=3, rating_sum=12)
+
+    def test_rebuild_invalidates_changed_teachers(self):
+        names = [teacher_version(self.teacher.pk), teacher_version(self.untouched.pk), TEACHER_LIST_VERSION]
+        before = get_versions(names)
+        updated_at = Teacher.objects.get(pk=self.teacher.pk).updated_at
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('rebuild_teacher_stats', stdout=StringIO())
+        after = get_versions(names)
+
+        self.teacher.refresh_from_db()
+        self.assertEqual(self.teacher.total_reviews, 0)
+        self.assertGreater(self.teacher.updated_at, updated_at)
+        self.assertNotEqual(after[names[0]], before[names[0]])
+        self.assertEqual(after[names[1]], before[names[1]])
+        self.assertNotEqual(after[names[2]], before[names[2]])
+
+    def test_teacher_ids_limits_rebuild(self):
+        Teacher.objects.filter(pk=self.untouched.pk).update(total_reviews=5, rating_sum=20)
+        call_command('rebuild_teacher_stats', teacher_ids=str(self.teacher.pk), stdout=StringIO())
+        self.teacher.refresh_from_db()
+        self.untouched.refresh_from_db()
+        self.assertEqual(self.teacher.total_reviews, 0)
+        self.assertEqual(self.untouched.total_reviews, 5)
+        self.assertEqual(self.untouched.rating_sum, 20)
+
+    def test_dry_run_writes_nothing(self):
+        updated_at = Teacher.objects.get(pk=self.teacher.pk).updated_at
+        stdout = StringIO()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            call_command('rebuild_teacher_stats', dry_run=True, stdout=stdout)
+        self.teacher.refresh_from_db()
+        self.assertEqual(self.teacher.total_reviews, 3)
+        self.assertEqual(self.teacher.rating_sum, 12)
+        self.assertEqual(self.teacher.updated_at, updated_at)
+        self.assertEqual(callbacks, [])
+        self.assertIn('total_reviews: 3 → 0', stdout.getvalue())
+
+    def test_invalid_teacher_ids(self):
+        with self.assertRaises(CommandError):
+            call_command('rebuild_teacher_stats', teacher_ids='1,a', stdout=StringIO())
+
+
+class TeacherQueryBudgetTests(QueryBudgetTestMixin, TransactionTestCase):
+    """教师接口的查询数不超过视图声明的预算"""
+    urlconf = 'teachers.urls'
+    scenarios = [
+        ('teacher-stats', 'GET', {}, None, None, 200),
+        ('teacher-list', 'GET', {}, None, None, 200),
+        ('teacher-list', 'POST', {}, lambda f: {
+            'name': '新教师', 'department': '计算机与软件工程', 'subjects': '软件工程,数据库',
+        }, None, 201),
+        ('teacher-detail', 'GET', lambda f: {'pk': f['teacher'].pk}, None, None, 200),
+        ('teacher-detail', 'PATCH', lambda f: {'pk': f['teacher'].pk}, lambda f: {
+            'bio': '更新后的简介',
+        }, None, 200),
+        ('teacher-detail', 'DELETE', lambda f: {'pk': f['spare_teacher'].pk}, None, None, 204),
+        ('teacher-batch', 'GET', {}, lambda f: {'ids': f['teacher_ids']}, None, 200),
+    ]
+
+
+class TeacherQueryPlanTests(QueryPlanTestMixin, TestCase):
+    """教师列表的过滤和排序组合都能使用索引"""
+    view_class = TeacherViewSet
+    # name/department 使用 icontains（'%关键词%'）子串匹配，B-tree 索引无法使用
+    expected_scans = {'name', 'department'}
@@ -1,13 +1,24 @@
-from django.db.models import Q, Avg
-from django.db import models
 from rest_framework import generics, filters, viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import api_view
 from django_filters.rest_framework import DjangoFilterBackend
 from django_filters import rest_framework as filters_rest
 
-from .models import Teacher
+from ratemyprofessor.batch import BatchRetrieveMixin
+from ratemyprofessor.conditional import ConditionalGetMixin
+from ratemyprofessor.fastpath import FastListMixin
+from ratemyprofessor.middleware import query_budget
+from ratemyprofessor.response_cache import ResponseCacheMixin
+from ratemyprofessor.sparse import SparseFieldsViewMixin
+
+from .cache import (
+    TEACHER_DETAIL_NAMESPACE, TEACHER_LIST_NAMESPACE, TEACHER_LIST_VERSION,
+    teacher_detail_fingerprint, teacher_list_fingerprint, teacher_version,
+)
+from .models import Teacher, normalize_subject
 from .serializers import TeacherListSerializer, TeacherDetailSerializer, TeacherAdminSerializer
+from .search import TeacherSearchFilter
+from .stats import get_department_rollup
 
 
 class TeacherFilter(filters_rest.FilterSet):
@@ -23,17 +34,25 @@ class TeacherFilter(filters_rest.FilterSet):
         fields = ['name', 'department', 'subjects', 'min_rating', 'max_difficulty']
     
     def filter_subjects(self, queryset, name, value):
-        return queryset.filter(subjects__icontains=value)
+        # 通过科目关联表精确匹配（走索引），不再使用 icontains 子串匹配；科目名按规范化形式存储
+        return queryset.filter(subject_links__subject__name=normalize_subject(value))
 
 
-class TeacherViewSet(viewsets.ModelViewSet):
+class TeacherViewSet(
+    ConditionalGetMixin, ResponseCacheMixin, FastListMixin, BatchRetrieveMixin, SparseFieldsViewMixin,
+    viewsets.ModelViewSet,
+):
     """教师管理视图集 - 支持完整CRUD操作"""
-    queryset = Teacher.objects.all()
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    queryset = Teacher.objects.with_subjects()
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, TeacherSearchFilter]
     filterset_class = TeacherFilter
-    search_fields = ['name', 'bio', 'subjects']
     ordering_fields = ['average_rating', 'difficulty_rating', 'total_reviews', 'name']
     ordering = ['-average_rating']
+    # 各操作的查询预算（见 tests.py 中的查询预算测试）
+    query_budget = {
+        'list': 4, 'retrieve': 4, 'batch': 3,
+        'create': 11, 'update': 15, 'partial_update': 15, 'destroy': 9,
+    }
     
     # 临时禁用认证要求（开发阶段）
     authentication_classes = []
@@ -47,6 +66,21 @@ class TeacherViewSet(viewsets.ModelViewSet):
             return TeacherAdminSerializer
         return TeacherDetailSerializer
     
+    def get_response_cache(self):
+        """列表按列表版本号缓存，详情按教师版本号缓存"""
+        if self.action == 'list':
+            return TEACHER_LIST_NAMESPACE, [TEACHER_LIST_VERSION]
+        if self.action == 'retrieve':
+            return TEACHER_DETAIL_NAMESPACE, [teacher_version(self.kwargs[self.lookup_field])]
+        return None
+    
+    def get_fingerprint(self):
+        if self.action == 'list':
+            return teacher_list_fingerprint()
+        if self.action == 'retrieve':
+            return teacher_detail_fingerprint(self.kwargs[self.lookup_field])
+        return ()
+    
     def perform_create(self, serializer):
         """创建教师时的额外处理"""
         teacher = serializer.save()
@@ -73,44 +107,42 @@ class TeacherViewSet(viewsets.ModelViewSet):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class TeacherListView(generics.ListAPIView):
+class TeacherListView(
+    ConditionalGetMixin, ResponseCacheMixin, FastListMixin, SparseFieldsViewMixin, generics.ListAPIView
+):
     """教师列表视图 - 向后兼容"""
-    queryset = Teacher.objects.all()
+    queryset = Teacher.objects.with_subjects()
     serializer_class = TeacherListSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, TeacherSearchFilter]
     filterset_class = TeacherFilter
-    search_fields = ['name', 'bio', 'subjects']
     ordering_fields = ['average_rating', 'difficulty_rating', 'total_reviews', 'name']
     ordering = ['-average_rating']
+    query_budget = {'GET': 4}
+    
+    def get_response_cache(self):
+        return TEACHER_LIST_NAMESPACE, [TEACHER_LIST_VERSION]
+    
+    def get_fingerprint(self):
+        return teacher_list_fingerprint()
 
 
-class TeacherDetailView(generics.RetrieveAPIView):
+class TeacherDetailView(
+    ConditionalGetMixin, ResponseCacheMixin, SparseFieldsViewMixin, generics.RetrieveAPIView
+):
     """教师详情视图 - 向后兼容"""
-    queryset = Teacher.objects.all()
+    queryset = Teacher.objects.with_subjects()
     serializer_class = TeacherDetailSerializer
+    query_budget = {'GET': 4}
+    
+    def get_response_cache(self):
+        return TEACHER_DETAIL_NAMESPACE, [teacher_version(self.kwargs[self.lookup_field])]
+    
+    def get_fingerprint(self):
+        return teacher_detail_fingerprint(self.kwargs[self.lookup_field])
 
 
+@query_budget(1)
 @api_view(['GET'])
 def teacher_stats(request):
-    """教师统计信息"""
-    total_teachers = Teacher.objects.count()
-    total_reviews = sum(teacher.total_reviews for teacher in Teacher.objects.all())
-    
-    # 按系别统计
-    departments = Teacher.objects.values('department').distinct()
-    department_stats = []
-    for dept in departments:
-        dept_teachers = Teacher.objects.filter(department=dept['department'])
-        department_stats.append({
-            'department': dept['department'],
-            'teacher_count': dept_teachers.count(),
-            'avg_rating': dept_teachers.aggregate(
-                avg=models.Avg('average_rating')
-            )['avg'] or 0
-        })
-    
-    return Response({
-        'total_teachers': total_teachers,
-        'total_reviews': total_reviews,
-        'department_stats': department_stats
-    })
+    """教师统计信息（来自统计缓存的系别汇总）"""
+    return Response(get_department_rollup())
@@ -20,7 +20,7 @@ import {
   TrendingUp as TrendingIcon,
 } from '@mui/icons-material';
 
-import { teachersApi } from '../services/api';
+import { homeApi } from '../services/api';
 import { Teacher } from '../types';
 
 // 本地类型定义
@@ -44,19 +44,16 @@ const HomePage: React.FC = () => {
     try {
       setLoading(true);
       
-      // 并行请求数据
-      const [teacherStatsRes, topTeachersRes] = await Promise.all([
-        teachersApi.getTeacherStats(),
-        teachersApi.getTeachers({ ordering: '-average_rating', page_size: 8 }),
-      ]);
+      // 一次请求获取首页汇总数据
+      const home = await homeApi.getHome();
 
       setStats({
-        teachers: teacherStatsRes.total_teachers,
-        reviews: teacherStatsRes.total_reviews,
-        departments: teacherStatsRes.teachers_with_reviews || 1,
+        teachers: home.teacher_stats.total_teachers,
+        reviews: home.teacher_stats.total_reviews,
+        departments: home.teacher_stats.department_stats.length || 1,
       });
       
-      setTopTeachers(topTeachersRes.results || []);
+      setTopTeachers(home.top_teachers || []);
       
     } catch (error) {
       console.error('加载数据失败:', error);
@@ -1,6 +1,7 @@
 import axios, { AxiosResponse } from 'axios';
 import {
   ApiResponse,
+  BatchResponse,
   LoginCredentials,
   TokenResponse,
   UserProfile,
@@ -11,6 +12,7 @@ import {
   CreateReviewData,
   ReviewStats,
   ReviewListParams,
+  HomeBundle,
   User,
   UserFormData,
   UserStats,
@@ -91,6 +93,10 @@ export const teachersApi = {
   getTeacher: (id: number): Promise<Teacher> => 
     api.get(`/teachers/${id}/`),
   
+  // 按ID批量获取教师详情（按传入顺序返回）
+  getTeachersByIds: (ids: number[]): Promise<BatchResponse<Teacher>> => 
+    api.get('/teachers/batch/', { params: { ids: ids.join(',') } }),
+  
   // 获取教师统计
   getTeacherStats: (): Promise<TeacherStats> => 
     api.get('/teachers/stats/'),
@@ -141,11 +147,25 @@ export const reviewsApi = {
   markHelpful: (reviewId: number): Promise<{ helpful_count: number }> => 
     api.post(`/reviews/${reviewId}/helpful/`),
   
+  // 按ID批量获取评价（按传入顺序返回）
+  getReviewsByIds: (ids: number[]): Promise<BatchResponse<Review>> => 
+    api.get('/reviews/batch/', { params: { ids: ids.join(',') } }),
+  
   // 获取评价统计
   getReviewStats: (): Promise<ReviewStats> => 
     api.get('/reviews/stats/'),
 };
 
+// =============================================
+// 首页API
+// =============================================
+
+export const homeApi = {
+  // 获取首页汇总（教师统计、评价统计、评分最高的教师和最新评价）
+  getHome: (): Promise<HomeBundle> => 
+    api.get('/home/'),
+};
+
 // =============================================
 // 用户管理API
 // =============================================
@@ -9,6 +9,12 @@ export interface ApiResponse<T> {
   previous?: string;
 }
 
+// 批量读取接口（?ids=1,2,3）的响应：按请求顺序返回，不存在的主键列在 missing 中
+export interface BatchResponse<T> {
+  results: T[];
+  missing: number[];
+}
+
 export interface ApiError {
   detail?: string;
   message?: string;
@@ -129,6 +135,31 @@ export interface ReviewStats {
   recent_reviews: Review[];
 }
 
+// =============================================
+// 首页汇总类型（/api/home/）
+// =============================================
+
+export interface DepartmentStats {
+  department: string;
+  teacher_count: number;
+  avg_rating: number;
+}
+
+export interface HomeBundle {
+  teacher_stats: {
+    total_teachers: number;
+    total_reviews: number;
+    department_stats: DepartmentStats[];
+  };
+  review_stats: {
+    total_reviews: number;
+    rating_stats: { [key: string]: number };
+    course_stats: { [code: string]: { name: string; count: number } };
+  };
+  top_teachers: Teacher[];
+  recent_reviews: Review[];
+}
+
 // =============================================
 // 用户管理相关类型
 // =============================================